@@ -1,3 +1,5 @@
+# For real batches (concurrent, rate-limited and resumable), use:
+#   python -m src.batch inputs.jsonl --output results.jsonl
 import os
 import sys
 import time
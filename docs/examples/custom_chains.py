@@ -8,13 +8,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../s
 from voice_llm import VoiceLLM
 from utils.logger import setup_logging
 from utils.config import config
-from llm.chains import get_conversation_chain # Import to demonstrate direct chain creation if needed
-from llm.prompts import get_creative_chat_prompt, get_technical_qa_prompt # Import specific prompts
 
 def run_custom_chain_example():
     """
-    Demonstrates using VoiceLLM to switch between different conversational personas
-    by reconfiguring its internal LangChain.
+    Demonstrates using VoiceLLM to switch between different conversational personas.
+    Personas are prompt files in config/prompts/; switching reuses the pooled
+    LLM client instead of building a new chain from scratch.
     """
     print("\n--- Starting Custom Chains Example ---")
     llm_app = None
@@ -35,19 +34,9 @@ def run_custom_chain_example():
 
         # --- Test 2: Creative Chain ---
         print("\n--- Switching to Creative Chain ---")
-        # To change the chain type, we re-initialize the conversation_chain
-        # in the VoiceLLM instance, typically with a new prompt and fresh memory.
-        # For simplicity, we'll get a new chain directly and assign it.
-        # In a real app, you might expose a method in VoiceLLM to switch personas.
-        
-        # We'll create a new chain instance directly for demonstration purposes
-        # This clears the previous conversation memory for this new creative interaction
-        llm_app.conversation_chain = get_conversation_chain(
-            llm_model=llm_app.llm,
-            memory_instance=llm_app.memory, # Reusing the memory instance, but it's cleared when assigned to a new chain
-            chain_type="creative"
-        )
-        # Clear memory if you want a fresh start for the new chain type
+        # Persona chains share the pooled LLM client and the session memory.
+        llm_app.set_persona("creative")
+        # Clear memory if you want a fresh start for the new persona
         llm_app.memory.clear()
 
         user_input_creative = "Imagine a world where animals can talk. What's the first thing they would complain about?"
@@ -59,11 +48,7 @@ def run_custom_chain_example():
 
         # --- Test 3: Technical Chain ---
         print("\n--- Switching to Technical Chain ---")
-        llm_app.conversation_chain = get_conversation_chain(
-            llm_model=llm_app.llm,
-            memory_instance=llm_app.memory,
-            chain_type="technical"
-        )
+        llm_app.set_persona("technical")
         llm_app.memory.clear()
 
         user_input_technical = "Explain the difference between TCP and UDP protocols in networking."
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+scripts/bench_import.py
+
+Measures the import time of the application's entry points with
+``python -X importtime`` and fails if any exceeds its budget or pulls in a
+heavy dependency at import time (audio devices, LangChain, the OpenAI SDK).
+Those are loaded on first use, so web workers and the CLI start quickly.
+
+Usage: python scripts/bench_import.py [--target-ms 500] [--top 10] [module ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["src.web", "src.asgi", "src.main"]
+
+# Modules that must only be imported on first use
+HEAVY_MODULES = ["sounddevice", "soundfile", "pydub", "langchain", "langchain_core", "openai"]
+
+
+def measure(module: str) -> tuple[float, list[tuple[int, str]], list[str]]:
+    """
+    Imports ``module`` in a fresh interpreter.
+
+    Returns:
+        The cumulative import time in ms, the (self µs, name) entries of every
+        imported module, and the heavy modules that were loaded.
+    """
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    total_us = 0
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((int(self_us), name))
+        if name == module:
+            total_us = int(cumulative_us)
+    heavy = [m for m in result.stdout.strip().split(",") if m]
+    return total_us / 1000, entries, heavy
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark entry-point import time.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--target-ms", type=float, default=500.0, help="Budget per module (default: 500)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list (default: 10)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        total_ms, entries, heavy = measure(module)
+        ok = total_ms <= args.target_ms and not heavy
+        failed |= not ok
+        print(f"{module}: {total_ms:.1f} ms (target {args.target_ms:.0f} ms) {'OK' if ok else 'FAIL'}")
+        for self_us, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"    {self_us / 1000:8.1f} ms  {name.strip()}")
+        if heavy:
+            print(f"    loaded at import time: {', '.join(heavy)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
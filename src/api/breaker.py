@@ -0,0 +1,213 @@
+"""
+Per-endpoint circuit breakers for the OpenAI API.
+
+When TTS or Whisper is degraded, each call would otherwise wait through
+all its retries before failing, tying up a worker for up to half a minute.
+A breaker counts consecutive failed calls, and (if ``latency_threshold``
+is set) interactive calls slower than it, for its endpoint. After
+``failure_threshold`` in a row it opens: calls fail at once with a ``CircuitOpenError``
+subclass, which the pipeline turns into a degraded result (a text-only
+answer, recently synthesized audio, or a clear "temporarily unavailable"
+error).
+
+After ``reset_timeout`` seconds the breaker goes half-open and lets one
+probe call through. If the probe succeeds the breaker closes, otherwise
+it opens for another ``reset_timeout``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from src.api.scheduler import INTERACTIVE, current_lane
+from src.utils.config import config
+from src.utils.deadline import expired as deadline_expired
+from src.utils.exceptions import CircuitOpenError
+from src.utils.metrics import REGISTRY
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Gauge values for openai_circuit_state
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_REJECTIONS = REGISTRY.counter(
+    "openai_circuit_rejections_total", "OpenAI calls failed fast because the endpoint's circuit was open.",
+    ["endpoint"],
+)
+
+
+class CircuitBreaker:
+    """Tracks one endpoint's health and decides whether calls may go through."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_threshold: int = 5,
+        latency_threshold: float = 0.0,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            endpoint: Endpoint name, used in errors and metrics.
+            failure_threshold: Consecutive failures (or slow calls) that open the circuit.
+            latency_threshold: Seconds after which a successful call still
+                counts as a failure (0 disables).
+            reset_timeout: Seconds the circuit stays open before a probe.
+        """
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        """The current state; an open circuit past its timeout reads as half-open."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Admits a call, or fails fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a
+                probe already in flight.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining <= 0:
+                    self._state = HALF_OPEN
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self._rejected += 1
+            retry_after = max(1, math.ceil(self.reset_timeout - (time.monotonic() - self._opened_at)))
+        CIRCUIT_REJECTIONS.inc(endpoint=self.endpoint)
+        raise CircuitOpenError(
+            f"The {self.endpoint} service is temporarily unavailable", self.endpoint, retry_after
+        )
+
+    def record(self, ok: bool, latency: float = 0.0) -> None:
+        """Records the outcome of an admitted call."""
+        if ok and self.latency_threshold and latency > self.latency_threshold:
+            ok = False
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._state = CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def abandon(self) -> None:
+        """Forgets an admitted call that was cancelled, so it neither counts nor blocks probes."""
+        with self._lock:
+            self._probing = False
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns the state, consecutive failures and open/rejection counts."""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._opened,
+                "rejected": self._rejected,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint: str) -> Optional[CircuitBreaker]:
+    """
+    Returns the process-wide breaker for ``endpoint``, creating it from
+    config on first use, or None if ``CIRCUIT_BREAKER`` is off.
+    """
+    if not config.CIRCUIT_BREAKER:
+        return None
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = _breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                    latency_threshold=config.BREAKER_LATENCY_THRESHOLD,
+                    reset_timeout=config.BREAKER_RESET_TIMEOUT,
+                )
+    return breaker
+
+
+@contextlib.contextmanager
+def guarded(endpoint: str, unavailable: type[CircuitOpenError]) -> Iterator[None]:
+    """
+    Runs the block under ``endpoint``'s breaker (if enabled). A rejected call
+    raises ``unavailable``, a ``CircuitOpenError`` subclass that is also the
+    endpoint's usual error type.
+    """
+    breaker = get_breaker(endpoint)
+    if breaker is None:
+        yield
+        return
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        raise unavailable(str(e), e.endpoint, e.retry_after) from None
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if deadline_expired():
+            # Out of turn time: says nothing about the endpoint's health
+            breaker.abandon()
+        else:
+            breaker.record(False)
+        raise
+    except BaseException:
+        # Cancelled by the caller: likewise
+        breaker.abandon()
+        raise
+    # Background and batch calls (e.g. long job transcriptions) are slow by
+    # nature; only their errors count against the shared breaker
+    latency = time.perf_counter() - start if current_lane() == INTERACTIVE else 0.0
+    breaker.record(True, latency)
+
+
+def breaker_metrics() -> dict[str, dict[str, Any]]:
+    """Returns each breaker's metrics, keyed by endpoint."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.endpoint: breaker.metrics() for breaker in breakers}
+
+
+REGISTRY.gauge_callback(
+    "openai_circuit_state", "Circuit breaker state per OpenAI endpoint (0 closed, 1 half-open, 2 open).",
+    ["endpoint"],
+    lambda: [({"endpoint": endpoint}, _STATE_VALUES[m["state"]]) for endpoint, m in breaker_metrics().items()],
+)
@@ -0,0 +1,324 @@
+"""
+Hedged requests: cutting tail latency by racing a duplicate request.
+
+If a call hasn't completed after an adaptive delay (a high percentile of
+that endpoint's recent latencies), a second identical request is sent and
+whichever succeeds first wins. Most calls finish before the delay, so only
+the slowest few percent are duplicated. A budget caps hedges to a fraction
+of calls, so a general slowdown can't double the load on the provider.
+
+Async losers are cancelled. A sync loser can't be interrupted mid-request,
+so it runs to completion in the background and its result is discarded.
+For the same reason a sync call that may be hedged runs its original
+request on the hedger's thread pool, so the caller can return as soon as
+either request wins. Calls that can't be hedged (no latency data, no budget,
+or no free pool thread for both requests, losers still running included)
+run on the caller's thread, so the pool never queues work.
+
+``Hedger.stats`` compares what callers saw with what single attempts took
+(the tail hedging removed) against the extra requests it cost.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Optional
+
+from src.utils.config import config
+from src.utils.metrics import REGISTRY
+
+HEDGED_REQUESTS = REGISTRY.counter(
+    "openai_hedged_requests_total", "Duplicate (hedge) requests sent for slow OpenAI calls.", ["endpoint"]
+)
+HEDGE_WINS = REGISTRY.counter(
+    "openai_hedge_wins_total", "Hedged calls where the duplicate request finished first.", ["endpoint"]
+)
+
+# Most hedge tokens an endpoint can bank, i.e. the largest burst of hedges
+_MAX_TOKENS = 10.0
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Returns the ``q`` quantile (0-1) of ``values`` (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class _EndpointState:
+    """Latency windows, hedge budget and counters of one endpoint."""
+
+    def __init__(self, window: int) -> None:
+        self.attempt_latencies: deque = deque(maxlen=window)
+        self.observed_latencies: deque = deque(maxlen=window)
+        self.tokens = _MAX_TOKENS
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+class Hedger:
+    """
+    Runs calls with hedging. Each call is ``attempt(i)`` for attempt index
+    ``i`` (0 for the original request, 1 for the hedge), so attempts can
+    write to separate files; ``discard(i)`` cleans up after a losing attempt.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.5,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 32,
+    ) -> None:
+        """
+        Args:
+            percentile: Latency quantile (0-1) after which a hedge is sent.
+            min_delay: Lower bound in seconds on the hedge delay.
+            budget: Maximum hedges as a fraction of calls.
+            min_samples: Latencies needed before an endpoint is hedged.
+            window: Recent latencies kept per endpoint.
+            max_workers: Threads running sync attempts; also the most sync
+                attempts (abandoned losers included) running at once.
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, _EndpointState] = {}
+        # Sync attempts on the executor, abandoned losers included
+        self._running = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def _state(self, endpoint: str) -> _EndpointState:
+        """Caller holds the lock."""
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            state = self._endpoints[endpoint] = _EndpointState(self.window)
+        return state
+
+    # ── Policy ────────────────────────────────────────────────
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there's too little latency data."""
+        with self._lock:
+            latencies = list(self._state(endpoint).attempt_latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, _percentile(latencies, self.percentile))
+
+    def _start_call(self, endpoint: str) -> None:
+        with self._lock:
+            state = self._state(endpoint)
+            state.calls += 1
+            state.tokens = min(_MAX_TOKENS, state.tokens + self.budget)
+
+    def _can_hedge(self, endpoint: str) -> bool:
+        """True if a sync call could be hedged now: a budget token and pool threads for both attempts."""
+        with self._lock:
+            return self._state(endpoint).tokens >= 1.0 and self._running + 2 <= self.max_workers
+
+    def _take_hedge_token(self, endpoint: str, sync: bool = False) -> bool:
+        with self._lock:
+            state = self._state(endpoint)
+            if state.tokens < 1.0 or (sync and self._running >= self.max_workers):
+                return False
+            state.tokens -= 1.0
+            state.hedged += 1
+        HEDGED_REQUESTS.inc(endpoint=endpoint)
+        return True
+
+    def _record_attempt(self, endpoint: str, latency: float) -> None:
+        with self._lock:
+            self._state(endpoint).attempt_latencies.append(latency)
+
+    def _finish_call(self, endpoint: str, started: float, hedge_won: bool) -> None:
+        with self._lock:
+            state = self._state(endpoint)
+            state.observed_latencies.append(time.perf_counter() - started)
+            if hedge_won:
+                state.hedge_wins += 1
+        if hedge_won:
+            HEDGE_WINS.inc(endpoint=endpoint)
+
+    # ── Sync ──────────────────────────────────────────────────
+
+    def _submit(self, fn: Callable[[int], Any], index: int) -> Future:
+        """Runs an attempt on the pool, in a copy of the caller's context (trace span, API lane)."""
+        with self._lock:
+            self._running += 1
+        future = self._executor.submit(contextvars.copy_context().run, fn, index)
+        future.add_done_callback(self._attempt_done)
+        return future
+
+    def _attempt_done(self, _future: Future) -> None:
+        with self._lock:
+            self._running -= 1
+
+    def call(
+        self,
+        endpoint: str,
+        attempt: Callable[[int], Any],
+        discard: Optional[Callable[[int], None]] = None,
+    ) -> tuple[Any, int]:
+        """
+        Runs ``attempt(0)``, racing it against ``attempt(1)`` if it is slow.
+
+        Returns:
+            A tuple of (result, index of the winning attempt).
+
+        Raises:
+            The original attempt's exception if every attempt failed.
+        """
+        started = time.perf_counter()
+        self._start_call(endpoint)
+
+        def timed(index: int) -> Any:
+            attempt_start = time.perf_counter()
+            result = attempt(index)
+            self._record_attempt(endpoint, time.perf_counter() - attempt_start)
+            return result
+
+        delay = self.hedge_delay(endpoint)
+        if delay is None or not self._can_hedge(endpoint):
+            # Nothing to race: stay on the caller's thread
+            result = timed(0)
+            self._finish_call(endpoint, started, hedge_won=False)
+            return result, 0
+
+        futures = [self._submit(timed, 0)]
+        done, _ = wait(futures, timeout=delay)
+        if not done and self._take_hedge_token(endpoint, sync=True):
+            futures.append(self._submit(timed, 1))
+
+        pending = set(futures)
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in futures if f in done and f.exception() is None), None)
+        if winner is None:
+            raise futures[0].exception()
+
+        index = futures.index(winner)
+        for i, future in enumerate(futures):
+            if future is not winner and discard is not None:
+                future.add_done_callback(lambda _f, i=i: discard(i))
+        self._finish_call(endpoint, started, hedge_won=index == 1)
+        return winner.result(), index
+
+    # ── Async ─────────────────────────────────────────────────
+
+    async def acall(
+        self,
+        endpoint: str,
+        attempt: Callable[[int], Awaitable[Any]],
+        discard: Optional[Callable[[int], None]] = None,
+    ) -> tuple[Any, int]:
+        """Async version of :meth:`call`; the losing attempt is cancelled."""
+        started = time.perf_counter()
+        self._start_call(endpoint)
+
+        async def timed(index: int) -> Any:
+            attempt_start = time.perf_counter()
+            result = await attempt(index)
+            self._record_attempt(endpoint, time.perf_counter() - attempt_start)
+            return result
+
+        delay = self.hedge_delay(endpoint)
+        if delay is None:
+            result = await timed(0)
+            self._finish_call(endpoint, started, hedge_won=False)
+            return result, 0
+
+        tasks = [asyncio.ensure_future(timed(0))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._take_hedge_token(endpoint):
+                tasks.append(asyncio.ensure_future(timed(1)))
+
+            pending = set(tasks)
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in tasks if t in done and t.exception() is None), None)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if winner is None:
+            raise tasks[0].exception()
+
+        index = tasks.index(winner)
+        for i, task in enumerate(tasks):
+            # Runs once the cancellation has unwound the loser
+            if task is not winner:
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                if discard is not None:
+                    task.add_done_callback(lambda _t, i=i: discard(i))
+        self._finish_call(endpoint, started, hedge_won=index == 1)
+        return winner.result(), index
+
+    # ── Stats ─────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns per-endpoint hedging stats: calls, hedges sent and won, the
+        share of extra requests, and p50/p95/p99 of single-attempt latency
+        (roughly the unhedged latency) next to what callers observed.
+        """
+        with self._lock:
+            snapshot = {
+                endpoint: (state.calls, state.hedged, state.hedge_wins,
+                           list(state.attempt_latencies), list(state.observed_latencies))
+                for endpoint, state in self._endpoints.items()
+            }
+        stats = {}
+        for endpoint, (calls, hedged, wins, attempts, observed) in snapshot.items():
+            entry: dict[str, Any] = {
+                "calls": calls,
+                "hedged": hedged,
+                "hedge_wins": wins,
+                "extra_request_ratio": round(hedged / calls, 4) if calls else 0.0,
+            }
+            for label, latencies in (("attempt", attempts), ("observed", observed)):
+                for q in (0.5, 0.95, 0.99):
+                    entry[f"{label}_p{int(q * 100)}_s"] = round(_percentile(latencies, q), 4) if latencies else None
+            stats[endpoint] = entry
+        return stats
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Optional[Hedger]:
+    """
+    Returns the process-wide hedger, creating it from config on first use,
+    or None if ``REQUEST_HEDGING`` is off.
+    """
+    global _hedger
+    if _hedger is None and config.REQUEST_HEDGING:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger(
+                    percentile=config.HEDGE_PERCENTILE,
+                    min_delay=config.HEDGE_MIN_DELAY,
+                    budget=config.HEDGE_BUDGET,
+                    min_samples=config.HEDGE_MIN_SAMPLES,
+                )
+    return _hedger
+
+
+def hedging_stats() -> dict[str, dict[str, Any]]:
+    """Returns the hedger's stats, or an empty dict if it isn't in use."""
+    return _hedger.stats() if _hedger is not None else {}
@@ -1,45 +1,178 @@
 """
 Unified client for interacting with OpenAI APIs (GPT, Whisper, TTS).
 Includes automatic retry logic for transient failures using tenacity.
+
+Identical concurrent transcriptions (same audio bytes) and syntheses (same
+text, model and voice) are coalesced into one API request when
+``REQUEST_COALESCING`` is on; see ``src.api.singleflight``. Slow ones are
+raced against a duplicate request when ``REQUEST_HEDGING`` is on; see
+``src.api.hedging``. Each endpoint's circuit breaker (``src.api.breaker``)
+fails calls fast while the endpoint keeps failing. Under a turn deadline
+(``src.utils.deadline``) each call's timeout is the time left, and retries
+that couldn't finish in time are skipped.
 """
 
+import asyncio
+import logging
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from src.api.breaker import guarded
+from src.api.hedging import get_hedger
+from src.api.singleflight import AsyncSingleFlight, SingleFlight
+from src.api.transport import get_async_http_client, get_http_client
+from src.audio.storage import file_digest
 from src.utils.config import config
+from src.utils.deadline import remaining as deadline_remaining
 from src.utils.exceptions import (
     TranscriptionError,
     ChatCompletionError,
     SynthesisError,
     AudioFileNotFoundError,
+    ChatUnavailableError,
+    CircuitOpenError,
+    SynthesisUnavailableError,
+    TranscriptionUnavailableError,
+    DeadlineExceededError,
+)
+from src.utils.metrics import (
+    API_COALESCED,
+    API_ERRORS,
+    API_REQUEST_SECONDS,
+    API_RETRIES,
+    BYTES_RECEIVED,
+    BYTES_SENT,
+    TOKENS,
 )
+from src.utils.tracing import add_event, span
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTIONS = "transcriptions"
+CHAT = "chat"
+SPEECH = "speech"
+
+
+def _count_retry(endpoint: str):
+    """tenacity ``before_sleep`` hook counting each retried attempt."""
+    def before_sleep(retry_state) -> None:
+        API_RETRIES.inc(endpoint=endpoint)
+        add_event(
+            "retry",
+            attempt=retry_state.attempt_number,
+            error=str(retry_state.outcome.exception()),
+            sleep_s=retry_state.next_action.sleep if retry_state.next_action else 0.0,
+        )
+    return before_sleep
+
+
+def _out_of_time(retry_state) -> bool:
+    """tenacity ``stop`` condition: True if another attempt couldn't finish before the turn deadline."""
+    left = deadline_remaining()
+    if left is None:
+        return False
+    # Average duration of the attempts so far, not counting the waits between them
+    attempt_s = (retry_state.seconds_since_start - retry_state.idle_for) / retry_state.attempt_number
+    if left >= retry_state.upcoming_sleep + attempt_s:
+        return False
+    add_event("retry_skipped", attempt=retry_state.attempt_number, remaining_s=round(left, 3))
+    return True
+
+
+# Process-wide, so calls from every client instance (and session) coalesce
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+
+def _read_bytes(path: str) -> bytes:
+    """Reads a synthesized file so coalesced callers can write their own copy."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _attempt_paths(path: str) -> tuple[str, str]:
+    """
+    Separate output files for a hedged synthesis's two attempts, unique per
+    call so a loser from an earlier retry can't touch a later one's files.
+    """
+    root, ext = os.path.splitext(path)
+    call = os.urandom(4).hex()
+    return f"{root}.{call}.hedge0{ext}", f"{root}.{call}.hedge1{ext}"
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _file_size(path: str) -> int:
+    """Returns a file's size in bytes, or 0 if it can't be read."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
 
 
 class OpenAIClient:
     """
     Unified client for interacting with OpenAI APIs (GPT, Whisper, TTS).
     Uses tenacity for automatic retries on transient API errors.
+    All instances share the process-wide HTTP transport (connection pool).
     """
 
     def __init__(self) -> None:
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY, http_client=get_http_client())
         self.whisper_model: str = config.WHISPER_MODEL
         self.tts_model: str = config.TTS_MODEL
         self.tts_voice: str = config.TTS_VOICE
+        self._async_client: AsyncOpenAI | None = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async SDK client on the shared async transport, created on first use."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=config.OPENAI_API_KEY, http_client=get_async_http_client()
+            )
+        return self._async_client
+
+    def _sdk(self) -> OpenAI:
+        """
+        SDK client for one API call. Under a turn deadline, the call's timeout
+        is the time left and the SDK doesn't retry (our retries are deadline-aware).
+
+        Raises:
+            DeadlineExceededError: If the deadline has already passed.
+        """
+        return self._with_deadline(self.client)
+
+    def _async_sdk(self) -> AsyncOpenAI:
+        """Async version of :meth:`_sdk`."""
+        return self._with_deadline(self.async_client)
+
+    @staticmethod
+    def _with_deadline(client):
+        left = deadline_remaining()
+        if left is None:
+            return client
+        if left <= 0:
+            raise DeadlineExceededError("Turn deadline exceeded before the API call")
+        return client.with_options(timeout=left, max_retries=0)
 
     # ── Whisper (Speech-to-Text) ──────────────────────────────
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True,
-    )
     def _call_whisper_api(self, audio_file_path: str) -> str:
-        """Low-level Whisper API call with automatic retry."""
-        with open(audio_file_path, "rb") as audio_file:
-            transcript = self.client.audio.transcriptions.create(
+        """Low-level Whisper API call (a single request)."""
+        with span("openai.transcriptions.attempt"), open(audio_file_path, "rb") as audio_file:
+            transcript = self._sdk().audio.transcriptions.create(
                 model=self.whisper_model,
                 file=audio_file,
                 response_format="text",
@@ -61,33 +194,75 @@ class OpenAIClient:
             TranscriptionError: If the Whisper API call fails.
         """
         if not os.path.exists(audio_file_path):
-            print(f"Error: Audio file not found at {audio_file_path}")
+            logger.error(f"Error: Audio file not found at {audio_file_path}")
             raise AudioFileNotFoundError(f"Audio file not found at {audio_file_path}")
+        if not config.REQUEST_COALESCING:
+            return self._transcribe(audio_file_path)
+
+        key = (TRANSCRIPTIONS, self.whisper_model, file_digest(audio_file_path))
+        transcript, leader = _flights.do(key, lambda: self._transcribe(audio_file_path))
+        if not leader:
+            API_COALESCED.inc(endpoint=TRANSCRIPTIONS)
+        return transcript
 
+    def _transcribe(self, audio_file_path: str) -> str:
+        """Transcribes with retries, recording metrics. Raises TranscriptionError."""
         try:
-            print(f"Transcribing audio from {audio_file_path} using Whisper model: {self.whisper_model}...")
-            return self._call_whisper_api(audio_file_path)
+            logger.debug("Transcribing audio from %s using Whisper model: %s...", audio_file_path, self.whisper_model)
+            with guarded(TRANSCRIPTIONS, TranscriptionUnavailableError), \
+                    span("openai.transcriptions", {"model": self.whisper_model}), \
+                    API_REQUEST_SECONDS.time(endpoint=TRANSCRIPTIONS):
+                transcript = self._whisper(audio_file_path)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
-            print(f"Error during audio transcription: {e}")
+            API_ERRORS.inc(endpoint=TRANSCRIPTIONS)
+            logger.error(f"Error during audio transcription: {e}")
             raise TranscriptionError(f"Could not transcribe audio: {e}") from e
+        BYTES_SENT.inc(_file_size(audio_file_path), endpoint=TRANSCRIPTIONS)
+        BYTES_RECEIVED.inc(len(transcript.encode()), endpoint=TRANSCRIPTIONS)
+        return transcript
+
+    @retry(
+        stop=stop_after_attempt(3) | _out_of_time,
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Exception),
+        reraise=True,
+        before_sleep=_count_retry(TRANSCRIPTIONS),
+    )
+    def _whisper(self, audio_file_path: str) -> str:
+        """Calls Whisper with automatic retry, hedging each request if it is slow and hedging is on."""
+        hedger = get_hedger()
+        if hedger is None:
+            return self._call_whisper_api(audio_file_path)
+        transcript, _ = hedger.call(TRANSCRIPTIONS, lambda _i: self._call_whisper_api(audio_file_path))
+        return transcript
 
     # ── GPT (Chat Completion) ─────────────────────────────────
 
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(3) | _out_of_time,
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type(Exception),
         reraise=True,
+        before_sleep=_count_retry(CHAT),
     )
     def _call_chat_api(self, messages: list, model: str, temperature: float, max_tokens: int) -> str:
         """Low-level Chat Completion API call with automatic retry."""
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        return response.choices[0].message.content
+        with span("openai.chat.attempt") as attempt:
+            response = self._sdk().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                TOKENS.inc(int(usage.prompt_tokens), model=model, direction="in")
+                TOKENS.inc(int(usage.completion_tokens), model=model, direction="out")
+                attempt.set_attribute("tokens_in", int(usage.prompt_tokens))
+                attempt.set_attribute("tokens_out", int(usage.completion_tokens))
+            return response.choices[0].message.content
 
     def get_chat_completion(self, messages: list, model: str, temperature: float, max_tokens: int) -> str:
         """
@@ -103,31 +278,32 @@ class OpenAIClient:
             Generated text response.
 
         Raises:
-            ChatCompletionError: If the Chat Completion API call fails.
+            ChatCompletionError: If the Chat Completion API call fails
+                (``ChatUnavailableError`` while its circuit breaker is open).
         """
         try:
-            print(f"Generating chat completion using model: {model}...")
-            return self._call_chat_api(messages, model, temperature, max_tokens)
+            logger.debug("Generating chat completion using model: %s...", model)
+            with guarded(CHAT, ChatUnavailableError), span("openai.chat", {"model": model}), \
+                    API_REQUEST_SECONDS.time(endpoint=CHAT):
+                return self._call_chat_api(messages, model, temperature, max_tokens)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
-            print(f"Error during chat completion: {e}")
+            API_ERRORS.inc(endpoint=CHAT)
+            logger.error(f"Error during chat completion: {e}")
             raise ChatCompletionError(f"Could not generate response: {e}") from e
 
     # ── TTS (Text-to-Speech) ──────────────────────────────────
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
-        reraise=True,
-    )
     def _call_tts_api(self, text: str, output_file_path: str) -> str:
-        """Low-level TTS API call with automatic retry."""
-        response = self.client.audio.speech.create(
-            model=self.tts_model,
-            voice=self.tts_voice,
-            input=text,
-        )
-        response.stream_to_file(output_file_path)
+        """Low-level TTS API call (a single request)."""
+        with span("openai.speech.attempt"):
+            response = self._sdk().audio.speech.create(
+                model=self.tts_model,
+                voice=self.tts_voice,
+                input=text,
+            )
+            response.stream_to_file(output_file_path)
         return output_file_path
 
     def synthesize_speech(self, text: str, output_file_path: str) -> str:
@@ -144,12 +320,189 @@ class OpenAIClient:
         Raises:
             SynthesisError: If the TTS API call fails.
         """
+        if not config.REQUEST_COALESCING:
+            return self._synthesize(text, output_file_path)
+
+        key = (SPEECH, self.tts_model, self.tts_voice, text)
+        result, leader = _flights.do(key, lambda: self._synthesize(text, output_file_path), share=_read_bytes)
+        if leader:
+            return result
+        API_COALESCED.inc(endpoint=SPEECH)
+        _write_bytes(output_file_path, result)
+        return output_file_path
+
+    def _synthesize(self, text: str, output_file_path: str) -> str:
+        """Synthesizes with retries, recording metrics. Raises SynthesisError."""
         try:
-            print(f"Synthesizing speech for text: '{text[:50]}...' using TTS model: {self.tts_model}, voice: {self.tts_voice}...")
+            logger.debug("Synthesizing speech for text: '%.50s...' using TTS model: %s, voice: %s...", text, self.tts_model, self.tts_voice)
+            with guarded(SPEECH, SynthesisUnavailableError), \
+                    span("openai.speech", {"model": self.tts_model, "chars": len(text)}), \
+                    API_REQUEST_SECONDS.time(endpoint=SPEECH):
+                path = self._tts(text, output_file_path)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except Exception as e:
+            API_ERRORS.inc(endpoint=SPEECH)
+            logger.error(f"Error during speech synthesis: {e}")
+            raise SynthesisError(f"Could not synthesize speech: {e}") from e
+        BYTES_SENT.inc(len(text.encode()), endpoint=SPEECH)
+        BYTES_RECEIVED.inc(_file_size(path), endpoint=SPEECH)
+        return path
+
+    @retry(
+        stop=stop_after_attempt(3) | _out_of_time,
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Exception),
+        reraise=True,
+        before_sleep=_count_retry(SPEECH),
+    )
+    def _tts(self, text: str, output_file_path: str) -> str:
+        """
+        Calls TTS with automatic retry, hedging each request if it is slow and
+        hedging is on. Each hedged attempt writes its own file; the winner's
+        is moved into place.
+        """
+        hedger = get_hedger()
+        if hedger is None:
             return self._call_tts_api(text, output_file_path)
+        paths = _attempt_paths(output_file_path)
+        path, _ = hedger.call(
+            SPEECH, lambda i: self._call_tts_api(text, paths[i]), discard=lambda i: _remove(paths[i])
+        )
+        os.replace(path, output_file_path)
+        return output_file_path
+
+    # ── Async variants (used by the ASGI server) ──────────────
+
+    async def _acall_whisper_api(self, audio_file_path: str) -> str:
+        """Low-level async Whisper API call (a single request)."""
+        with span("openai.transcriptions.attempt"), open(audio_file_path, "rb") as audio_file:
+            transcript = await self._async_sdk().audio.transcriptions.create(
+                model=self.whisper_model,
+                file=audio_file,
+                response_format="text",
+            )
+        return transcript.text if hasattr(transcript, "text") else transcript
+
+    async def atranscribe_audio(self, audio_file_path: str) -> str:
+        """
+        Async version of :meth:`transcribe_audio`.
+
+        Raises:
+            AudioFileNotFoundError: If the audio file does not exist.
+            TranscriptionError: If the Whisper API call fails.
+        """
+        if not os.path.exists(audio_file_path):
+            logger.error(f"Error: Audio file not found at {audio_file_path}")
+            raise AudioFileNotFoundError(f"Audio file not found at {audio_file_path}")
+        if not config.REQUEST_COALESCING:
+            return await self._atranscribe(audio_file_path)
+
+        digest = await asyncio.to_thread(file_digest, audio_file_path)
+        key = (TRANSCRIPTIONS, self.whisper_model, digest)
+        transcript, leader = await _async_flights.do(key, lambda: self._atranscribe(audio_file_path))
+        if not leader:
+            API_COALESCED.inc(endpoint=TRANSCRIPTIONS)
+        return transcript
+
+    async def _atranscribe(self, audio_file_path: str) -> str:
+        """Async version of :meth:`_transcribe`."""
+        try:
+            with guarded(TRANSCRIPTIONS, TranscriptionUnavailableError), \
+                    span("openai.transcriptions", {"model": self.whisper_model}), \
+                    API_REQUEST_SECONDS.time(endpoint=TRANSCRIPTIONS):
+                transcript = await self._awhisper(audio_file_path)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
-            print(f"Error during speech synthesis: {e}")
+            API_ERRORS.inc(endpoint=TRANSCRIPTIONS)
+            logger.error(f"Error during audio transcription: {e}")
+            raise TranscriptionError(f"Could not transcribe audio: {e}") from e
+        BYTES_SENT.inc(_file_size(audio_file_path), endpoint=TRANSCRIPTIONS)
+        BYTES_RECEIVED.inc(len(transcript.encode()), endpoint=TRANSCRIPTIONS)
+        return transcript
+
+    @retry(
+        stop=stop_after_attempt(3) | _out_of_time,
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Exception),
+        reraise=True,
+        before_sleep=_count_retry(TRANSCRIPTIONS),
+    )
+    async def _awhisper(self, audio_file_path: str) -> str:
+        """Async version of :meth:`_whisper`."""
+        hedger = get_hedger()
+        if hedger is None:
+            return await self._acall_whisper_api(audio_file_path)
+        transcript, _ = await hedger.acall(TRANSCRIPTIONS, lambda _i: self._acall_whisper_api(audio_file_path))
+        return transcript
+
+    async def _acall_tts_api(self, text: str, output_file_path: str) -> str:
+        """Low-level async TTS API call (a single request)."""
+        with span("openai.speech.attempt"):
+            response = await self._async_sdk().audio.speech.create(
+                model=self.tts_model,
+                voice=self.tts_voice,
+                input=text,
+            )
+            await response.astream_to_file(output_file_path)
+        return output_file_path
+
+    async def asynthesize_speech(self, text: str, output_file_path: str) -> str:
+        """
+        Async version of :meth:`synthesize_speech`.
+
+        Raises:
+            SynthesisError: If the TTS API call fails.
+        """
+        if not config.REQUEST_COALESCING:
+            return await self._asynthesize(text, output_file_path)
+
+        key = (SPEECH, self.tts_model, self.tts_voice, text)
+        result, leader = await _async_flights.do(
+            key, lambda: self._asynthesize(text, output_file_path), share=_read_bytes
+        )
+        if leader:
+            return result
+        API_COALESCED.inc(endpoint=SPEECH)
+        await asyncio.to_thread(_write_bytes, output_file_path, result)
+        return output_file_path
+
+    async def _asynthesize(self, text: str, output_file_path: str) -> str:
+        """Async version of :meth:`_synthesize`."""
+        try:
+            with guarded(SPEECH, SynthesisUnavailableError), \
+                    span("openai.speech", {"model": self.tts_model, "chars": len(text)}), \
+                    API_REQUEST_SECONDS.time(endpoint=SPEECH):
+                path = await self._atts(text, output_file_path)
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except Exception as e:
+            API_ERRORS.inc(endpoint=SPEECH)
+            logger.error(f"Error during speech synthesis: {e}")
             raise SynthesisError(f"Could not synthesize speech: {e}") from e
+        BYTES_SENT.inc(len(text.encode()), endpoint=SPEECH)
+        BYTES_RECEIVED.inc(_file_size(path), endpoint=SPEECH)
+        return path
+
+    @retry(
+        stop=stop_after_attempt(3) | _out_of_time,
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(Exception),
+        reraise=True,
+        before_sleep=_count_retry(SPEECH),
+    )
+    async def _atts(self, text: str, output_file_path: str) -> str:
+        """Async version of :meth:`_tts`."""
+        hedger = get_hedger()
+        if hedger is None:
+            return await self._acall_tts_api(text, output_file_path)
+        paths = _attempt_paths(output_file_path)
+        path, _ = await hedger.acall(
+            SPEECH, lambda i: self._acall_tts_api(text, paths[i]), discard=lambda i: _remove(paths[i])
+        )
+        os.replace(path, output_file_path)
+        return output_file_path
 
 
 # Example usage (for testing purposes, not typically run directly)
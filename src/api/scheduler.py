@@ -0,0 +1,393 @@
+"""
+Priority lanes for outgoing OpenAI API requests.
+
+Every request to the API, whether from ``OpenAIClient`` or LangChain's
+``ChatOpenAI``, passes through the shared HTTP transport. The transport
+takes a slot from the process-wide :class:`PriorityScheduler` before
+sending. Requests belong to one of three lanes, taken from the caller's
+context (see :func:`priority`):
+
+- ``interactive``: a user is waiting on the turn. This is the default.
+- ``background``: async jobs (``POST /api/jobs``).
+- ``batch``: offline batch runs (``python -m src.batch`` and the work queue).
+
+At most ``max_concurrency`` requests are in flight. ``reserved_interactive``
+of those slots can only be used by interactive requests, so a batch run can
+never occupy all of them. A freed slot goes to the oldest interactive waiter
+first, then background, then batch. Queued batch work therefore waits
+whenever anyone more urgent is queued. Requests already in flight are never
+cancelled. Queue waits are recorded per lane in the
+``openai_lane_queue_wait_seconds`` histogram.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator, Optional
+
+import httpx
+
+from src.utils.config import config
+from src.utils.deadline import remaining
+from src.utils.exceptions import DeadlineExceededError
+from src.utils.metrics import REGISTRY
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+
+# Highest priority first
+LANES: tuple[str, ...] = (INTERACTIVE, BACKGROUND, BATCH)
+
+_lane: contextvars.ContextVar[str] = contextvars.ContextVar("api_lane", default=INTERACTIVE)
+
+LANE_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "openai_lane_queue_wait_seconds",
+    "Time OpenAI requests waited for a scheduler slot, by priority lane.",
+    ["lane"],
+)
+
+
+@contextlib.contextmanager
+def priority(lane: str) -> Iterator[None]:
+    """
+    Sends the API requests made inside the block (including from tasks and
+    ``asyncio.to_thread`` calls started inside it) in ``lane``.
+
+    Raises:
+        ValueError: If ``lane`` is not one of :data:`LANES`.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown priority lane '{lane}'; expected one of {LANES}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        try:
+            _lane.reset(token)
+        except ValueError:
+            pass  # Closed from another context
+
+
+def current_lane() -> str:
+    """Returns the caller's priority lane."""
+    return _lane.get()
+
+
+class PriorityScheduler:
+    """
+    A bounded pool of request slots shared by prioritised lanes, with a
+    share reserved for interactive requests.
+
+    A released slot is handed directly to the chosen waiter, so a lower
+    lane can't take it from a queued higher one.
+    """
+
+    def __init__(self, max_concurrency: int, reserved_interactive: int = 0) -> None:
+        """
+        Args:
+            max_concurrency: Maximum requests in flight.
+            reserved_interactive: Slots only interactive requests may use.
+        """
+        self.max_concurrency = max_concurrency
+        self.reserved_interactive = min(reserved_interactive, max_concurrency - 1)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_lane = {lane: 0 for lane in LANES}
+        # Each waiter is a threading.Event or an (event loop, asyncio.Future) pair
+        self._waiters: dict[str, deque] = {lane: deque() for lane in LANES}
+        self._admitted = {lane: 0 for lane in LANES}
+
+    # ── Slots ─────────────────────────────────────────────────
+
+    def _limit(self, lane: str) -> int:
+        """Slots ``lane`` may occupy in total."""
+        if lane == INTERACTIVE:
+            return self.max_concurrency
+        return self.max_concurrency - self.reserved_interactive
+
+    def _can_start(self, lane: str) -> bool:
+        """True if ``lane`` may take a free slot now. Caller holds the lock."""
+        if self._active >= self._limit(lane):
+            return False
+        # Don't overtake anyone queued in this or a higher lane
+        return not any(self._waiters[higher] for higher in LANES[: LANES.index(lane) + 1])
+
+    def _try_enter(self, lane: str, waiter: Any) -> bool:
+        """Takes a slot (True) or queues ``waiter``. Caller holds the lock."""
+        if self._can_start(lane):
+            self._take(lane)
+            return True
+        self._waiters[lane].append(waiter)
+        return False
+
+    def _take(self, lane: str) -> None:
+        self._active += 1
+        self._active_by_lane[lane] += 1
+        self._admitted[lane] += 1
+
+    def _withdraw(self, lane: str, waiter: Any) -> bool:
+        """
+        Removes a waiter that stopped waiting. Returns False if a slot was
+        already handed to it. Caller holds the lock.
+        """
+        try:
+            self._waiters[lane].remove(waiter)
+            return True
+        except ValueError:
+            return False
+
+    def _abandon(self, lane: str, waiter: Any) -> None:
+        """Gives up a waiter's place in the queue, or the slot it was just handed."""
+        with self._lock:
+            withdrawn = self._withdraw(lane, waiter)
+        if not withdrawn:
+            self.release(lane)
+
+    def _grant_waiters(self) -> list:
+        """Hands free slots to waiters, highest lane first. Caller holds the lock."""
+        granted = []
+        for lane in LANES:
+            queue = self._waiters[lane]
+            while queue and self._active < self._limit(lane):
+                self._take(lane)
+                granted.append(queue.popleft())
+            if queue:
+                # Lower lanes wait until this one's queue drains
+                break
+        return granted
+
+    @staticmethod
+    def _wake(waiter: Any) -> None:
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def acquire(self, lane: Optional[str] = None) -> str:
+        """
+        Waits (blocking this thread) for a slot in ``lane`` (default: the
+        caller's lane), for no longer than the turn deadline allows.
+
+        Returns:
+            The lane the slot was taken in; pass it to :meth:`release`.
+
+        Raises:
+            DeadlineExceededError: If the turn deadline passes while queued.
+        """
+        lane = lane or current_lane()
+        start = time.perf_counter()
+        waiter = threading.Event()
+        with self._lock:
+            entered = self._try_enter(lane, waiter)
+        if not entered:
+            left = remaining()
+            if not waiter.wait(None if left is None else max(0.0, left)):
+                self._abandon(lane, waiter)
+                raise DeadlineExceededError("Turn deadline exceeded while queued for an API request slot")
+        LANE_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, lane=lane)
+        return lane
+
+    async def aacquire(self, lane: Optional[str] = None) -> str:
+        """Async version of :meth:`acquire`; waits without blocking the event loop."""
+        lane = lane or current_lane()
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            entered = self._try_enter(lane, waiter)
+        if not entered:
+            left = remaining()
+            try:
+                await asyncio.wait_for(asyncio.shield(future), None if left is None else max(0.0, left))
+            except asyncio.TimeoutError:
+                self._abandon(lane, waiter)
+                raise DeadlineExceededError("Turn deadline exceeded while queued for an API request slot") from None
+            except asyncio.CancelledError:
+                # Caller went away while queued: give up the place (or the slot)
+                self._abandon(lane, waiter)
+                raise
+        LANE_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start, lane=lane)
+        return lane
+
+    def release(self, lane: str) -> None:
+        """Frees a slot taken in ``lane`` and hands free slots to waiters."""
+        with self._lock:
+            self._active -= 1
+            self._active_by_lane[lane] -= 1
+            granted = self._grant_waiters()
+        for waiter in granted:
+            self._wake(waiter)
+
+    # ── Metrics ───────────────────────────────────────────────
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns per-lane in-flight, queued and admitted counts."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "reserved_interactive": self.reserved_interactive,
+                "lanes": {
+                    lane: {
+                        "active": self._active_by_lane[lane],
+                        "queued": len(self._waiters[lane]),
+                        "admitted": self._admitted[lane],
+                    }
+                    for lane in LANES
+                },
+            }
+
+
+# ── HTTP transports ──────────────────────────────────────────
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that releases the scheduler slot when closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async response body that releases the scheduler slot when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(func):
+    """Wraps ``func`` so only the first call has an effect."""
+    lock = threading.Lock()
+    called = False
+
+    def wrapper() -> None:
+        nonlocal called
+        with lock:
+            if called:
+                return
+            called = True
+        func()
+    return wrapper
+
+
+class PriorityTransport(httpx.BaseTransport):
+    """
+    Wraps an ``httpx`` transport so each request holds a scheduler slot from
+    sending until its response body is closed (streamed bodies included).
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, scheduler: PriorityScheduler) -> None:
+        self._transport = transport
+        self._scheduler = scheduler
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        lane = self._scheduler.acquire()
+        release = _once(lambda: self._scheduler.release(lane))
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncPriorityTransport(httpx.AsyncBaseTransport):
+    """Async version of :class:`PriorityTransport`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: PriorityScheduler) -> None:
+        self._transport = transport
+        self._scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        lane = await self._scheduler.aacquire()
+        release = _once(lambda: self._scheduler.release(lane))
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_AsyncReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_scheduler: Optional[PriorityScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[PriorityScheduler]:
+    """
+    Returns the process-wide scheduler, creating it from config on first
+    use, or None if ``API_MAX_CONCURRENCY`` is 0 (no scheduling).
+    """
+    global _scheduler
+    if _scheduler is None and config.API_MAX_CONCURRENCY > 0:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = PriorityScheduler(
+                    config.API_MAX_CONCURRENCY, config.API_INTERACTIVE_RESERVED,
+                )
+    return _scheduler
+
+
+def scheduler_metrics() -> dict[str, Any]:
+    """Returns the scheduler's metrics, or an empty dict if it isn't in use."""
+    return _scheduler.metrics() if _scheduler is not None else {}
+
+
+def _lane_gauge(field: str):
+    """Callback reading one per-lane field of the scheduler's metrics for a scrape."""
+    return lambda: [
+        ({"lane": lane}, m[field]) for lane, m in scheduler_metrics().get("lanes", {}).items()
+    ]
+
+
+REGISTRY.gauge_callback(
+    "openai_lane_queued", "OpenAI requests waiting for a scheduler slot, by priority lane.", ["lane"],
+    _lane_gauge("queued"),
+)
+REGISTRY.gauge_callback(
+    "openai_lane_active", "OpenAI requests in flight, by priority lane.", ["lane"], _lane_gauge("active"),
+)
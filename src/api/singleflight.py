@@ -0,0 +1,150 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When a call with a given key is already in flight, later callers with the
+same key don't start their own: they wait for the first one (the leader)
+and get its result, or its exception. Once the call finishes, the key is
+free again, so this de-duplicates concurrent work without caching results.
+
+A ``share`` function can turn the leader's result into something every
+follower can use independently. It runs before anyone is released, and
+only when there are followers. ``OpenAIClient`` uses it to hand followers
+the synthesized audio as bytes rather than the leader's file, which the
+leader's caller may move.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Flight:
+    """State of one in-flight call."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.waiters = 0
+        self.shared: Any = None
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls made from threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        share: Optional[Callable[[Any], Any]] = None,
+    ) -> tuple[Any, bool]:
+        """
+        Runs ``fn`` unless a call with ``key`` is in flight, in which case it
+        waits for that call instead.
+
+        Args:
+            key: Identifies identical calls.
+            fn: The call to make.
+            share: Maps the leader's result to the value followers receive
+                (default: the result itself).
+
+        Returns:
+            A tuple of (result, True) for the leader, or (shared result,
+            False) for a follower.
+
+        Raises:
+            Whatever ``fn`` (or ``share``) raised, in every caller.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.shared, False
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.error = e
+            flight.done.set()
+            raise
+        with self._lock:
+            del self._flights[key]
+            waiters = flight.waiters
+        if waiters:
+            try:
+                flight.shared = share(result) if share is not None else result
+            except Exception as e:
+                flight.error = e
+        flight.done.set()
+        return result, True
+
+    def in_flight(self) -> int:
+        """Returns the number of keys with a call in flight."""
+        with self._lock:
+            return len(self._flights)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces identical concurrent calls made from coroutines on one event
+    loop. The call runs as its own task, so a cancelled leader doesn't
+    cancel it for the followers.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        share: Optional[Callable[[Any], Any]] = None,
+    ) -> tuple[Any, bool]:
+        """Async version of :meth:`SingleFlight.do`."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            flight.waiters += 1
+            await asyncio.shield(flight.task)
+            if flight.error is not None:
+                raise flight.error
+            return flight.shared, False
+
+        flight = self._flights[key] = _Flight()
+
+        async def run() -> Any:
+            try:
+                result = await fn()
+            finally:
+                # From here on, new callers start a new flight
+                del self._flights[key]
+            if flight.waiters:
+                try:
+                    flight.shared = share(result) if share is not None else result
+                except Exception as e:
+                    flight.error = e
+            return result
+
+        flight.task = asyncio.ensure_future(run())
+        # Retrieve the outcome even if every caller was cancelled
+        flight.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await asyncio.shield(flight.task), True
+
+    def in_flight(self) -> int:
+        """Returns the number of keys with a call in flight."""
+        return len(self._flights)
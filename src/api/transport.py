@@ -0,0 +1,183 @@
+"""
+Shared HTTP transport for every OpenAI call site.
+
+``OpenAIClient``, the Whisper/TTS wrappers and the LangChain ``ChatOpenAI``
+instances all send requests through the single ``httpx.Client`` returned by
+:func:`get_http_client`, so they share one keep-alive connection pool
+instead of each opening their own. Async call sites (the ASGI server) share
+the ``httpx.AsyncClient`` from :func:`get_async_http_client` the same way.
+HTTP/2 is enabled when the optional ``h2`` package is installed. Both
+clients send through the priority scheduler (``src.api.scheduler``), so
+interactive turns get API capacity ahead of background and batch work.
+Each request's timeouts are capped at the time left in the current turn
+(see ``src.utils.deadline``).
+
+:func:`prewarm_connections` opens connections (DNS, TCP, TLS) ahead of the
+first user turn so it doesn't pay the handshake latency.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
+
+from src.api.scheduler import AsyncPriorityTransport, PriorityTransport, get_scheduler
+from src.utils.config import config
+from src.utils.deadline import remaining
+from src.utils.exceptions import DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL: str = "https://api.openai.com/v1"
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """Returns True if the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _transport_options() -> dict:
+    """Keep-alive and pool limit options shared by sync and async transports."""
+    return {
+        "http2": config.HTTP2 and http2_available(),
+        "limits": httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT)
+
+
+def _cap_timeout(request: httpx.Request) -> None:
+    """Request hook capping the request's timeouts at the time left in the current turn."""
+    left = remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceededError(f"Turn deadline exceeded before {request.method} {request.url.path}")
+    timeout = request.extensions.get("timeout", {})
+    request.extensions["timeout"] = {
+        phase: left if seconds is None else min(seconds, left) for phase, seconds in timeout.items()
+    }
+
+
+async def _acap_timeout(request: httpx.Request) -> None:
+    _cap_timeout(request)
+
+
+def build_http_client() -> httpx.Client:
+    """
+    Creates an ``httpx.Client`` configured from the HTTP_* settings.
+
+    Returns:
+        A new client with keep-alive, pool limits and timeouts applied
+        (capped at the turn deadline, if any), sending through the priority
+        scheduler if one is configured.
+    """
+    transport: httpx.BaseTransport = httpx.HTTPTransport(**_transport_options())
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        transport = PriorityTransport(transport, scheduler)
+    return httpx.Client(transport=transport, timeout=_timeout(), event_hooks={"request": [_cap_timeout]})
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    """Async version of :func:`build_http_client`."""
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(**_transport_options())
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        transport = AsyncPriorityTransport(transport, scheduler)
+    return httpx.AsyncClient(
+        transport=transport, timeout=_timeout(), event_hooks={"request": [_acap_timeout]}
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the process-wide HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        with _client_lock:
+            if _http_client is None:
+                _http_client = build_http_client()
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide async HTTP client, creating it on first use.
+
+    Its connections belong to the event loop that opened them, which is
+    fine for ASGI servers (one loop per worker process).
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        with _client_lock:
+            if _async_http_client is None:
+                _async_http_client = build_async_http_client()
+    return _async_http_client
+
+
+def close_http_client() -> None:
+    """Closes the shared HTTP client (a new one is created on next use)."""
+    global _http_client
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def prewarm_connections(count: Optional[int] = None, base_url: str = DEFAULT_BASE_URL) -> int:
+    """
+    Opens ``count`` pooled connections to the API host ahead of time.
+
+    Each warm-up is a cheap authenticated ``GET /models``; the response is
+    discarded but the connection stays in the keep-alive pool. Failures are
+    reported and ignored, since a cold first request is still correct.
+
+    Args:
+        count: Number of connections to open. Defaults to ``config.HTTP_PREWARM_CONNECTIONS``.
+        base_url: API base URL to connect to.
+
+    Returns:
+        The number of connections successfully warmed.
+    """
+    count = config.HTTP_PREWARM_CONNECTIONS if count is None else count
+    if count <= 0:
+        return 0
+
+    client = get_http_client()
+    headers = {"Authorization": f"Bearer {config.OPENAI_API_KEY}"}
+
+    def _warm(_: int) -> bool:
+        try:
+            client.get(f"{base_url}/models", headers=headers).close()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Connection pre-warm failed: {e}")
+            return False
+
+    # Concurrent requests so each one checks out (and keeps) its own connection
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        warmed = sum(pool.map(_warm, range(count)))
+    logger.info(f"Pre-warmed {warmed}/{count} API connection(s).")
+    return warmed
+
+
+def prewarm_in_background(count: Optional[int] = None) -> threading.Thread:
+    """Runs :func:`prewarm_connections` on a daemon thread so startup isn't blocked."""
+    thread = threading.Thread(target=prewarm_connections, args=(count,), name="http-prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -1,14 +1,19 @@
 from src.api.openai_client import OpenAIClient
+import logging
 import os
 import time
 
+logger = logging.getLogger(__name__)
+
 class TTS:
     """
     Handles text-to-speech generation using the OpenAI TTS API.
     """
-    def __init__(self):
-        self.openai_client = OpenAIClient()
-        print("TTS API integration initialized.")
+    def __init__(self, openai_client: OpenAIClient = None):
+        # OpenAIClient instances share one HTTP transport, so creating one here is cheap;
+        # pass an existing client to share its settings as well.
+        self.openai_client = openai_client or OpenAIClient()
+        logger.info("TTS API integration initialized.")
 
     def synthesize(self, text: str, output_file_path: str) -> str:
         """
@@ -21,7 +26,7 @@ class TTS:
         Returns:
             str: The path to the generated audio file, or an empty string on failure.
         """
-        print(f"TTS: Synthesizing text to speech for: '{text[:50]}...'")
+        logger.debug("TTS: Synthesizing text to speech for: '%.50s...'", text)
         return self.openai_client.synthesize_speech(text, output_file_path)
 
 # Example usage (for testing purposes)
@@ -1,13 +1,18 @@
 from src.api.openai_client import OpenAIClient
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 class Whisper:
     """
     Handles speech-to-text processing using the OpenAI Whisper API.
     """
-    def __init__(self):
-        self.openai_client = OpenAIClient()
-        print("Whisper API integration initialized.")
+    def __init__(self, openai_client: OpenAIClient = None):
+        # OpenAIClient instances share one HTTP transport, so creating one here is cheap;
+        # pass an existing client to share its settings as well.
+        self.openai_client = openai_client or OpenAIClient()
+        logger.info("Whisper API integration initialized.")
 
     def transcribe(self, audio_file_path: str) -> str:
         """
@@ -19,7 +24,7 @@ class Whisper:
         Returns:
             str: The transcribed text.
         """
-        print(f"Whisper: Transcribing audio file: {audio_file_path}")
+        logger.debug("Whisper: Transcribing audio file: %s", audio_file_path)
         return self.openai_client.transcribe_audio(audio_file_path)
 
 # Example usage (for testing purposes)
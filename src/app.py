@@ -1,4 +1,5 @@
 import streamlit as st
+import logging
 import os
 import io
 import base64
@@ -6,7 +7,13 @@ import time # For unique file names
 
 # Local imports
 from src.voice_llm import VoiceLLM
+from src.api.openai_client import OpenAIClient
+from src.audio.janitor import start_janitor
+from src.audio.storage import AudioBytesCache
 from src.utils.config import config
+from src.utils.logger import is_logging_configured, setup_logging
+
+logger = logging.getLogger(__name__)
 
 # --- Streamlit Page Configuration ---
 st.set_page_config(
@@ -16,37 +23,62 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Keep data/audio within its disk quotas (one janitor per process, not per rerun)
+start_janitor()
+if not is_logging_configured():
+    setup_logging()
+
+
+@st.cache_resource
+def get_shared_openai_client():
+    """The OpenAI client (and its connection pool), created once per process and shared by all sessions."""
+    return OpenAIClient()
+
+
 # --- Session State Initialization ---
-# Initialize VoiceLLM only once per session
+# Initialize VoiceLLM only once per session. Its conversation memory is per
+# session; the API client and LLM clients are shared process-wide.
 if 'voice_llm_instance' not in st.session_state:
     try:
-        st.session_state.voice_llm_instance = VoiceLLM()
+        st.session_state.voice_llm_instance = VoiceLLM(headless=True, openai_client=get_shared_openai_client())
         st.session_state.conversation_history = []
+        # Response audio as bytes, so reruns don't reread files from disk
+        st.session_state.audio_cache = AudioBytesCache(config.STREAMLIT_AUDIO_CACHE_ITEMS)
+        # IDs of uploads already run through the pipeline (the uploader keeps
+        # returning the last file on every rerun)
+        st.session_state.processed_upload_ids = set()
+        # Pages of STREAMLIT_HISTORY_RECENT_MESSAGES messages shown in the history
+        st.session_state.history_pages = 1
         st.session_state.is_ready = True
-        print("VoiceLLM instance created for Streamlit session.")
+        logger.info("VoiceLLM instance created for Streamlit session.")
     except ValueError as ve:
         st.error(f"Configuration Error: {ve}. Please ensure your OPENAI_API_KEY is set in the .env file.")
         st.session_state.is_ready = False
-        print(f"VoiceLLM initialization failed: {ve}")
+        logger.error(f"VoiceLLM initialization failed: {ve}")
     except Exception as e:
         st.error(f"An unexpected error occurred during VoiceLLM initialization: {e}")
         st.session_state.is_ready = False
-        print(f"VoiceLLM initialization failed: {e}")
+        logger.error(f"VoiceLLM initialization failed: {e}")
 
 # Check if LLM is ready before proceeding
 if not st.session_state.is_ready:
     st.stop() # Stop execution if initialization failed
 
+# Fragments rerun only their own widgets; ``st.fragment`` was
+# ``st.experimental_fragment`` before Streamlit 1.37
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", lambda func: func)
+
 
 # --- Helper Functions ---
 def display_message(role, content, audio_file_path=None):
     """Displays a message in the chat interface."""
     with st.chat_message(role):
         st.write(content)
-        if audio_file_path and os.path.exists(audio_file_path):
-            st.audio(audio_file_path, format="audio/mp3", start_time=0)
-            # You might want to delete the audio file after playing, or periodically
-            # os.remove(audio_file_path)
+        if audio_file_path:
+            # Served from the session's cache; only a miss reads the file
+            audio_bytes = st.session_state.audio_cache.get(audio_file_path)
+            if audio_bytes:
+                st.audio(audio_bytes, format="audio/mp3", start_time=0)
 
 def handle_text_input(user_text):
     """Processes text input from the user."""
@@ -60,8 +92,12 @@ def handle_text_input(user_text):
             display_message("assistant", ai_response_text, audio_path)
 
 def handle_audio_upload(uploaded_file):
-    """Processes an uploaded audio file."""
+    """Processes an uploaded audio file (once, however many reruns still see it)."""
     if uploaded_file:
+        upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+        if upload_id in st.session_state.processed_upload_ids:
+            return
+
         # Save the uploaded file temporarily
         file_extension = uploaded_file.name.split('.')[-1]
         temp_audio_dir = "data/audio/input" # Use input directory for uploaded audio
@@ -74,22 +110,25 @@ def handle_audio_upload(uploaded_file):
         st.session_state.conversation_history.append({"role": "user", "content": f"🎙️ Audio input ({uploaded_file.name})"})
         display_message("user", f"Audio received from user: {uploaded_file.name}")
 
-        with st.spinner("Transcribing and Responding..."):
-            user_transcription, ai_response_text, audio_path = st.session_state.voice_llm_instance.process_audio_upload(temp_audio_path)
-            
-            # Update history with actual transcription
-            st.session_state.conversation_history[-1]["content"] = f"You (via audio): {user_transcription}"
-            
-            # Display transcribed user input
-            with st.chat_message("user"):
-                st.write(f"You (transcribed): {user_transcription}")
+        try:
+            with st.spinner("Transcribing and Responding..."):
+                user_transcription, ai_response_text, audio_path = st.session_state.voice_llm_instance.process_audio_upload(temp_audio_path)
 
+                # Update history with actual transcription
+                st.session_state.conversation_history[-1]["content"] = f"You (via audio): {user_transcription}"
+
+                # Display transcribed user input
+                with st.chat_message("user"):
+                    st.write(f"You (transcribed): {user_transcription}")
 
-            st.session_state.conversation_history.append({"role": "assistant", "content": ai_response_text, "audio": audio_path})
-            display_message("assistant", ai_response_text, audio_path)
-        
-        # Clean up the temporary uploaded file
-        os.remove(temp_audio_path)
+
+                st.session_state.conversation_history.append({"role": "assistant", "content": ai_response_text, "audio": audio_path})
+                display_message("assistant", ai_response_text, audio_path)
+            # Only a processed upload is skipped on later reruns; a failed one can be retried
+            st.session_state.processed_upload_ids.add(upload_id)
+        finally:
+            # Clean up the temporary uploaded file
+            os.remove(temp_audio_path)
 
 
 # --- Streamlit UI ---
@@ -100,9 +139,35 @@ st.markdown(
     """
 )
 
+
+def display_history():
+    """
+    Renders the most recent messages of the conversation. Older messages
+    are only rendered when the user asks for them, a page at a time, so
+    rerun cost doesn't grow with the length of the session.
+    """
+    history = st.session_state.conversation_history
+    page = config.STREAMLIT_HISTORY_RECENT_MESSAGES
+    shown = page * st.session_state.history_pages if page > 0 else len(history)
+    split = max(len(history) - shown, 0)
+    if split and st.button(f"Show earlier messages ({split} hidden)"):
+        st.session_state.history_pages += 1
+        st.rerun()
+    for message in history[split:]:
+        display_message(message["role"], message["content"], message.get("audio"))
+
+
+@fragment
+def audio_upload_section():
+    """The upload widget; an upload reruns only this fragment, not the whole page."""
+    st.subheader("Or upload an audio file:")
+    uploaded_audio = st.file_uploader("Upload an audio file (e.g., .mp3, .wav)", type=["mp3", "wav", "ogg"])
+    if uploaded_audio:
+        handle_audio_upload(uploaded_audio)
+
+
 # Display previous messages from history
-for message in st.session_state.conversation_history:
-    display_message(message["role"], message["content"], message.get("audio"))
+display_history()
 
 # Text Input Section
 st.markdown("---")
@@ -110,10 +175,7 @@ st.subheader("Type your message:")
 user_text_input = st.chat_input("Say something...", on_submit=lambda: handle_text_input(st.session_state.user_input_key), key="user_input_key")
 
 # Audio Upload Section (for simulating voice input in Streamlit)
-st.subheader("Or upload an audio file:")
-uploaded_audio = st.file_uploader("Upload an audio file (e.g., .mp3, .wav)", type=["mp3", "wav", "ogg"])
-if uploaded_audio:
-    handle_audio_upload(uploaded_audio)
+audio_upload_section()
 
 st.markdown("---")
 st.caption("Note: Real-time microphone recording and playback in Streamlit require advanced browser APIs or custom components. This app uses file upload for audio input and plays back generated audio.")
@@ -121,6 +183,8 @@ st.caption("Note: Real-time microphone recording and playback in Streamlit requi
 # Optional: Add a button to clear conversation history
 if st.sidebar.button("Clear Conversation"):
     st.session_state.conversation_history = []
+    st.session_state.history_pages = 1
+    st.session_state.audio_cache = AudioBytesCache(config.STREAMLIT_AUDIO_CACHE_ITEMS)
     st.session_state.voice_llm_instance.memory.clear() # Clear LangChain memory
     st.rerun()
 
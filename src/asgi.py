@@ -0,0 +1,625 @@
+"""
+ASGI Web Server for Voice-Controlled LLM App
+Serves the same frontend UI and REST API as ``src/web.py`` (same routes and
+JSON contract), but with async handlers over the async VoiceLLM pipeline.
+A request waiting on OpenAI holds no thread, so one worker process can keep
+hundreds of voice turns in flight.
+
+Run with ``python -m src.asgi`` or any ASGI server, e.g.
+``uvicorn src.asgi:app --workers 4``.
+
+Requires the optional ``asgi`` dependencies (starlette, uvicorn, python-multipart).
+"""
+
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from starlette.applications import Starlette
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from src.api.transport import prewarm_in_background
+from src.audio.janitor import get_janitor, start_janitor
+from src.jobs import get_job_manager, job_pipeline_factory, transcription_job
+from src.audio.storage import JOB_UPLOAD_DIR, audio_etag, cache_control, resolve_audio
+from src.api.breaker import breaker_metrics
+from src.api.hedging import hedging_stats
+from src.api.scheduler import scheduler_metrics
+from src.utils.admission import admission_metrics, get_admission_controller
+from src.utils.config import config
+from src.utils.deadline import DEADLINE_HEADER, deadline, parse_timeout
+from src.utils.exceptions import AdmissionRejectedError, CircuitOpenError, DeadlineExceededError
+from src.utils.logger import log_context, setup_logging
+from src.utils.metrics import CONTENT_TYPE, REGISTRY, record_cache
+from src.utils.tracing import current_span, parse_trace_headers, span
+from src.voice_llm import VoiceLLM
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+
+logger = logging.getLogger(__name__)
+
+
+def _static_url_for(endpoint: str, filename: str) -> str:
+    """Flask-compatible ``url_for('static', filename=...)`` for the shared template."""
+    return f'/static/{filename}'
+
+
+templates = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(['html']),
+)
+templates.globals['url_for'] = _static_url_for
+
+# ─── Global VoiceLLM Instance (one per worker process) ───
+voice_llm = None
+_voice_llm_lock = asyncio.Lock()
+
+
+async def get_voice_llm():
+    """Lazy initialization of VoiceLLM instance, off the event loop."""
+    global voice_llm
+    if voice_llm is None:
+        async with _voice_llm_lock:
+            if voice_llm is None:
+                voice_llm = await asyncio.to_thread(VoiceLLM, headless=True)
+    return voice_llm
+
+
+def _audio_url(audio_path):
+    """Maps a generated audio file path to its /api/audio URL (or None)."""
+    if audio_path and os.path.exists(audio_path):
+        return f'/api/audio/{os.path.basename(audio_path)}'
+    return None
+
+
+def _write_file(path: str, content: bytes) -> None:
+    """Writes an upload to disk (run via ``asyncio.to_thread``)."""
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def _remove_file(path: str) -> None:
+    """Deletes a temporary upload, ignoring files that are already gone."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def _save_upload(audio_file, prefix: str = 'upload', input_dir: str = os.path.join('data', 'audio', 'input')) -> str:
+    """Saves an uploaded audio file under ``input_dir`` (data/audio/input by default) and returns its path."""
+    os.makedirs(input_dir, exist_ok=True)
+
+    ext = audio_file.filename.rsplit('.', 1)[-1] if '.' in audio_file.filename else 'webm'
+    temp_path = os.path.join(input_dir, f'{prefix}_{time.time_ns()}.{ext}')
+    content = await audio_file.read()
+    await asyncio.to_thread(_write_file, temp_path, content)
+    return temp_path
+
+
+def _sse(event: str, data: dict) -> str:
+    """Formats one Server-Sent Event."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _sse_events(events, timeout=None):
+    """
+    Converts VoiceLLM stream events into Server-Sent Events.
+
+    Audio chunk paths become ``/api/audio`` URLs. An exception ends the
+    stream with an ``error`` event, since the status code is already sent.
+    The stream runs after the handler has returned, so the client's
+    ``timeout`` (seconds) is applied here rather than in the handler.
+    """
+    try:
+        with deadline(timeout):
+            async for event in events:
+                kind = event.pop('type')
+                if kind == 'audio':
+                    event = {'index': event['index'], 'audio_url': _audio_url(event['path'])}
+                yield _sse(kind, event)
+    except DeadlineExceededError:
+        yield _sse('error', {'error': 'Request timed out'})
+    except Exception as e:
+        logger.error(f"Streaming error: {e}")
+        yield _sse('error', {'error': 'Failed to process message'})
+
+
+class _SSEResponse(StreamingResponse):
+    """
+    A streaming response that calls its ``on_close`` callbacks once it is
+    done, however it ended: also if the client disconnected before the
+    stream started, when neither the body generator's ``finally`` nor a
+    background task runs.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.on_close: list = []
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            for callback in self.on_close:
+                callback()
+
+
+def _sse_response(stream, on_close=()) -> _SSEResponse:
+    """Wraps an SSE generator, disabling caching and proxy buffering."""
+    response = _SSEResponse(
+        stream,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    response.on_close.extend(on_close)
+    return response
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against an ETag (RFC 9110)."""
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def admission_controlled(group):
+    """
+    Runs the handler inside a slot of the ``group`` admission controller.
+    Saturated requests get a fast 429/503 JSON error with ``Retry-After``.
+    Streaming responses keep their slot until the stream ends.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request: Request):
+            controller = get_admission_controller(group)
+            try:
+                queued_s = await controller.aacquire()
+            except AdmissionRejectedError as e:
+                return _busy_response(e)
+
+            root = current_span()
+            if root is not None:
+                root.set_attribute('admission.queued_ms', round(queued_s * 1000, 3))
+            start = time.perf_counter()
+            released = False
+
+            def release():
+                nonlocal released
+                if not released:
+                    released = True
+                    controller.release(time.perf_counter() - start)
+
+            try:
+                response = await handler(request)
+            except BaseException:
+                release()
+                raise
+            return _release_with(response, release)
+        return wrapper
+    return decorator
+
+
+def _busy_response(error: AdmissionRejectedError) -> JSONResponse:
+    """The 429/503 response for a request the admission controller rejected."""
+    return JSONResponse(
+        {'error': 'Server busy, please retry later'},
+        status_code=error.status_code,
+        headers={'Retry-After': str(error.retry_after)},
+    )
+
+
+def _release_with(response, release):
+    """
+    Calls ``release`` now, or for a streaming response when its body is
+    exhausted (or once the response is done, if the client disconnected
+    before the stream started).
+    """
+    if isinstance(response, _SSEResponse):
+        response.body_iterator = _release_after(response.body_iterator, release)
+        response.on_close.append(release)
+    else:
+        release()
+    return response
+
+
+async def _release_after(iterator, release):
+    """Yields from ``iterator`` and calls ``release`` when it ends or is closed."""
+    try:
+        async for chunk in iterator:
+            yield chunk
+    finally:
+        release()
+
+
+class TracingMiddleware:
+    """
+    Wraps each HTTP request in a root trace span, continuing the caller's
+    trace if it sent ``traceparent``/``X-Trace-Id``, and returns the trace ID
+    in ``X-Trace-Id``. The span covers the whole response, streamed bodies
+    included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = parse_trace_headers(Headers(scope=scope))
+        attributes = {'http.method': scope['method'], 'http.path': scope['path']}
+        with span(f"{scope['method']} {scope['path']}", attributes,
+                  trace_id=trace_id, parent_id=parent_id) as root, \
+                log_context(method=scope['method'], path=scope['path']):
+            async def send_with_trace_id(message):
+                if message['type'] == 'http.response.start':
+                    root.set_attribute('http.status_code', message['status'])
+                    if message['status'] >= 500:
+                        root.status = 'error'
+                    MutableHeaders(scope=message).append('X-Trace-Id', root.trace_id)
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
+
+# ═══════════════════════════════════════════════════
+# Page Routes
+# ═══════════════════════════════════════════════════
+
+async def index(request: Request):
+    """Serve the main chat interface."""
+    html = templates.get_template('index.html').render(config={
+        'model_name': config.MODEL_NAME,
+        'temperature': config.TEMPERATURE,
+        'max_tokens': config.MAX_TOKENS,
+        'tts_voice': config.TTS_VOICE,
+    })
+    return HTMLResponse(html)
+
+
+# ═══════════════════════════════════════════════════
+# API Routes
+# ═══════════════════════════════════════════════════
+
+@admission_controlled('chat')
+async def api_chat(request: Request):
+    """
+    Process a text message and return an AI response with optional audio.
+
+    Request JSON:
+        { "text": "user message" }
+
+    Response JSON:
+        { "response": "AI response text", "audio_url": "/api/audio/<filename>" }
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data.get('text'):
+        return JSONResponse({'error': 'No text provided'}, status_code=400)
+
+    user_text = data['text'].strip()
+    if not user_text:
+        return JSONResponse({'error': 'Empty text'}, status_code=400)
+
+    try:
+        llm = await get_voice_llm()
+        with deadline(parse_timeout(request.headers.get(DEADLINE_HEADER))):
+            ai_response, audio_path = await llm.aprocess_text_input(user_text)
+        return JSONResponse({
+            'response': ai_response,
+            'audio_url': _audio_url(audio_path),
+        })
+
+    except DeadlineExceededError:
+        return JSONResponse({'error': 'Request timed out'}, status_code=504)
+
+    except Exception as e:
+        logger.error(f"Chat processing error: {e}")
+        return JSONResponse({'error': 'Failed to process message'}, status_code=500)
+
+
+@admission_controlled('transcribe')
+async def api_transcribe(request: Request):
+    """
+    Transcribe uploaded audio, generate AI response, and return everything.
+
+    Request: multipart/form-data with 'audio' file
+
+    Response JSON:
+        {
+            "transcription": "what the user said",
+            "response": "AI response text",
+            "audio_url": "/api/audio/<filename>"
+        }
+    """
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or isinstance(audio_file, str):
+        return JSONResponse({'error': 'No audio file provided'}, status_code=400)
+    if not audio_file.filename:
+        return JSONResponse({'error': 'Empty audio file'}, status_code=400)
+
+    temp_path = None
+    try:
+        # Save uploaded audio temporarily
+        temp_path = await _save_upload(audio_file)
+
+        # Process through the async VoiceLLM pipeline
+        llm = await get_voice_llm()
+        with deadline(parse_timeout(request.headers.get(DEADLINE_HEADER))):
+            transcription, ai_response, audio_path = await llm.aprocess_audio_upload(temp_path)
+
+        return JSONResponse({
+            'transcription': transcription,
+            'response': ai_response,
+            'audio_url': _audio_url(audio_path),
+        })
+
+    except DeadlineExceededError:
+        return JSONResponse({'error': 'Request timed out'}, status_code=504)
+
+    except CircuitOpenError as e:
+        return JSONResponse(
+            {'error': str(e)}, status_code=503, headers={'Retry-After': str(e.retry_after)},
+        )
+
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        return JSONResponse({'error': 'Failed to process audio'}, status_code=500)
+
+    finally:
+        # Clean up uploaded file
+        if temp_path:
+            _remove_file(temp_path)
+
+
+@admission_controlled('chat')
+async def api_chat_stream(request: Request):
+    """
+    Stream the response to a text message as Server-Sent Events.
+
+    Request JSON:
+        { "text": "user message" }
+
+    Response: ``text/event-stream`` with events
+        token  { "text": "..." }                              (one per LLM token)
+        audio  { "index": n, "audio_url": "/api/audio/..." }  (sequential chunks)
+        done   { "response": "full AI response text" }
+        error  { "error": "..." }
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data.get('text'):
+        return JSONResponse({'error': 'No text provided'}, status_code=400)
+
+    user_text = data['text'].strip()
+    if not user_text:
+        return JSONResponse({'error': 'Empty text'}, status_code=400)
+
+    llm = await get_voice_llm()
+    return _sse_response(_sse_events(
+        llm.astream_text_input(user_text),
+        timeout=parse_timeout(request.headers.get(DEADLINE_HEADER)),
+    ))
+
+
+@admission_controlled('transcribe')
+async def api_transcribe_stream(request: Request):
+    """
+    Stream the response to uploaded audio as Server-Sent Events.
+
+    Request: multipart/form-data with 'audio' file
+
+    Response: ``text/event-stream`` with a ``transcript`` event
+    (``{ "text": "what the user said" }``) followed by the same events as
+    ``/api/chat/stream``.
+    """
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or isinstance(audio_file, str):
+        return JSONResponse({'error': 'No audio file provided'}, status_code=400)
+    if not audio_file.filename:
+        return JSONResponse({'error': 'Empty audio file'}, status_code=400)
+
+    llm = await get_voice_llm()
+    temp_path = await _save_upload(audio_file)
+    return _sse_response(
+        _sse_events(
+            llm.astream_audio_upload(temp_path),
+            timeout=parse_timeout(request.headers.get(DEADLINE_HEADER)),
+        ),
+        on_close=[lambda: _remove_file(temp_path)],
+    )
+
+
+async def api_create_job(request: Request):
+    """
+    Queue uploaded audio for background transcription and response.
+
+    Request: multipart/form-data with 'audio' file
+
+    Response JSON (202 Accepted):
+        { "job_id": "<id>", "status": "queued", "status_url": "/api/jobs/<id>" }
+    """
+    form = await request.form()
+    audio_file = form.get('audio')
+    if audio_file is None or isinstance(audio_file, str):
+        return JSONResponse({'error': 'No audio file provided'}, status_code=400)
+    if not audio_file.filename:
+        return JSONResponse({'error': 'Empty audio file'}, status_code=400)
+
+    llm = await get_voice_llm()
+    temp_path = await _save_upload(audio_file, prefix='job', input_dir=JOB_UPLOAD_DIR)
+    try:
+        job = get_job_manager().submit(transcription_job(job_pipeline_factory(llm.openai_client), temp_path))
+    except AdmissionRejectedError as e:
+        _remove_file(temp_path)
+        return JSONResponse(
+            {'error': 'Too many pending jobs, please retry later'},
+            status_code=e.status_code,
+            headers={'Retry-After': str(e.retry_after)},
+        )
+
+    status_url = f'/api/jobs/{job.id}'
+    return JSONResponse(
+        {'job_id': job.id, 'status': job.status, 'status_url': status_url},
+        status_code=202,
+        headers={'Location': status_url},
+    )
+
+
+async def api_get_job(request: Request):
+    """Return a job's status, and its result once finished (see ``src/web.py``)."""
+    job = get_job_manager().get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'error': 'Job not found or expired'}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+async def api_audio(request: Request):
+    """
+    Serve a generated audio file.
+
+    Responses carry a strong ETag (the content hash) and, for content-addressed
+    files, an immutable Cache-Control header. ``If-None-Match`` is answered
+    with 304 and ``Range`` requests with 206 partial content.
+    """
+    file_path = resolve_audio(request.path_params['filename'])
+    if file_path is None:
+        return JSONResponse({'error': 'Audio file not found'}, status_code=404)
+
+    headers = {
+        'ETag': f'"{await asyncio.to_thread(audio_etag, file_path)}"',
+        'Cache-Control': cache_control(file_path),
+    }
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and _etag_matches(if_none_match, headers['ETag']):
+        record_cache('audio_http', True)
+        return Response(status_code=304, headers=headers)
+
+    record_cache('audio_http', False)
+    return FileResponse(file_path, media_type='audio/mpeg', headers=headers)
+
+
+async def api_settings(request: Request):
+    """Return the current application settings."""
+    return JSONResponse({
+        'model': config.MODEL_NAME,
+        'temperature': config.TEMPERATURE,
+        'max_tokens': config.MAX_TOKENS,
+        'voice': config.TTS_VOICE,
+    })
+
+
+async def api_metrics(request: Request):
+    """Return runtime metrics (routing, speculation, janitor, admission control, jobs, API lanes, hedging, circuit breakers)."""
+    llm = await get_voice_llm()
+    return JSONResponse({
+        'routing': llm.get_routing_metrics(),
+        'speculation': llm.get_speculation_metrics(),
+        'janitor': get_janitor().metrics(),
+        'admission': admission_metrics(),
+        'jobs': get_job_manager().metrics(),
+        'api_lanes': scheduler_metrics(),
+        'hedging': hedging_stats(),
+        'circuits': breaker_metrics(),
+    })
+
+
+async def metrics(request: Request):
+    """Expose stage latencies, API and queue metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+async def api_clear(request: Request):
+    """Clear the conversation memory."""
+    try:
+        llm = await get_voice_llm()
+        llm.memory.clear()
+        return JSONResponse({'status': 'ok'})
+    except Exception as e:
+        logger.error(f"Clear error: {e}")
+        return JSONResponse({'error': 'Failed to clear'}, status_code=500)
+
+
+routes = [
+    Route('/', index),
+    Route('/api/chat', api_chat, methods=['POST']),
+    Route('/api/transcribe', api_transcribe, methods=['POST']),
+    Route('/api/chat/stream', api_chat_stream, methods=['POST']),
+    Route('/api/transcribe/stream', api_transcribe_stream, methods=['POST']),
+    Route('/api/jobs', api_create_job, methods=['POST']),
+    Route('/api/jobs/{job_id}', api_get_job, methods=['GET']),
+    Route('/api/audio/{filename}', api_audio),
+    Route('/api/settings', api_settings, methods=['GET']),
+    Route('/api/metrics', api_metrics, methods=['GET']),
+    Route('/api/clear', api_clear, methods=['POST']),
+    Route('/metrics', metrics, methods=['GET']),
+    Mount('/static', app=StaticFiles(directory=STATIC_DIR), name='static'),
+]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Per-worker startup: start the log listener and open API connections before the first user turn."""
+    app.debug = config.DEBUG
+    setup_logging()
+    prewarm_in_background()
+    janitor = start_janitor()
+    yield
+    if janitor is not None:
+        janitor.stop()
+
+
+# ``debug`` is applied from config at startup (see ``lifespan``), so importing
+# this module doesn't load the configuration
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(TracingMiddleware)],
+    lifespan=lifespan,
+)
+
+
+# ═══════════════════════════════════════════════════
+# Entry Point
+# ═══════════════════════════════════════════════════
+
+def run_asgi():
+    """Run the ASGI app under uvicorn with ``config.WEB_WORKERS`` worker processes."""
+    import uvicorn
+
+    print("\n--- Starting Voice-Controlled LLM Web App (ASGI) ---")
+    print(f"  Model: {config.MODEL_NAME}")
+    print(f"  TTS Voice: {config.TTS_VOICE}")
+    print(f"  Workers: {config.WEB_WORKERS}")
+    print(f"  Open http://127.0.0.1:{config.WEB_PORT} in your browser")
+    print("----------------------------------------------------\n")
+
+    uvicorn.run(
+        'src.asgi:app',
+        host=config.WEB_HOST,
+        port=config.WEB_PORT,
+        workers=config.WEB_WORKERS,
+        log_level='debug' if config.DEBUG else 'info',
+    )
+
+
+if __name__ == '__main__':
+    run_asgi()
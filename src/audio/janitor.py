@@ -0,0 +1,211 @@
+"""
+Background janitor that keeps the audio directories within disk quotas.
+
+Synthesized responses (``data/audio/output``) and uploads/recordings
+(``data/audio/input``) are otherwise never deleted, so long-running servers
+slowly fill the disk. Uploads of queued jobs (``data/audio/jobs``) are
+deleted by their job, so that directory only has an age limit, well beyond
+any queueing delay, for files a crashed process left behind. The janitor periodically sweeps each directory and
+deletes files older than its max age, then evicts the oldest files until the
+directory is under its max total size.
+
+Each sweep costs one ``scandir`` pass and one ``stat`` per file; eviction
+order comes from the same stat results, so nothing is stat'ed twice.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.audio.storage import JOB_UPLOAD_DIR, OUTPUT_DIR
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+INPUT_DIR: str = os.path.join("data", "audio", "input")
+
+
+@dataclass(frozen=True)
+class DirectoryQuota:
+    """
+    Retention limits for one directory (searched recursively).
+
+    ``max_age_s`` / ``max_bytes`` of 0 disable that limit. Files younger than
+    ``min_age_s`` are never evicted for size, so audio that was just produced
+    (and may not have been fetched yet) survives a burst of traffic.
+    """
+
+    path: str
+    max_age_s: float = 0.0
+    max_bytes: int = 0
+    min_age_s: float = 60.0
+
+
+def _scan(path: str) -> list[tuple[float, int, str]]:
+    """Returns (mtime, size, path) for every file under ``path``."""
+    files = []
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                files.extend(_scan(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                st = entry.stat(follow_symlinks=False)
+                files.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            continue  # Removed while scanning
+    return files
+
+
+class AudioJanitor:
+    """
+    Periodically enforces :class:`DirectoryQuota` limits on a daemon thread.
+
+    Tracks files removed and bytes reclaimed per directory; see :meth:`metrics`.
+    """
+
+    def __init__(self, quotas: list[DirectoryQuota], interval_s: float = 300.0) -> None:
+        self.quotas = quotas
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._runs = 0
+        self._last_run_at: Optional[float] = None
+        self._last_run_duration_s = 0.0
+        self._stats: dict[str, dict[str, int]] = {
+            q.path: {"files_removed": 0, "bytes_reclaimed": 0, "bytes_used": 0} for q in quotas
+        }
+
+    @classmethod
+    def from_config(cls) -> "AudioJanitor":
+        """Builds a janitor for the input, output and job upload directories from config."""
+        return cls(
+            [
+                DirectoryQuota(OUTPUT_DIR, config.AUDIO_OUTPUT_MAX_AGE, config.AUDIO_OUTPUT_MAX_BYTES),
+                DirectoryQuota(INPUT_DIR, config.AUDIO_INPUT_MAX_AGE, config.AUDIO_INPUT_MAX_BYTES),
+                DirectoryQuota(JOB_UPLOAD_DIR, config.JOB_UPLOAD_MAX_AGE),
+            ],
+            interval_s=config.JANITOR_INTERVAL,
+        )
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def sweep_directory(self, quota: DirectoryQuota, now: Optional[float] = None) -> int:
+        """
+        Enforces one directory's quota.
+
+        Args:
+            quota: The directory and its limits.
+            now: Current time (for tests); defaults to ``time.time()``.
+
+        Returns:
+            Bytes reclaimed.
+        """
+        now = time.time() if now is None else now
+        files = sorted(_scan(quota.path))  # Oldest first
+        total = sum(size for _, size, _ in files)
+        removed = reclaimed = 0
+
+        for mtime, size, path in files:
+            expired = quota.max_age_s > 0 and now - mtime > quota.max_age_s
+            over_quota = (
+                quota.max_bytes > 0
+                and total - reclaimed > quota.max_bytes
+                and now - mtime > quota.min_age_s
+            )
+            if (expired or over_quota) and self._remove(path):
+                removed += 1
+                reclaimed += size
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                quota.path, {"files_removed": 0, "bytes_reclaimed": 0, "bytes_used": 0}
+            )
+            stats["files_removed"] += removed
+            stats["bytes_reclaimed"] += reclaimed
+            stats["bytes_used"] = total - reclaimed
+        if removed:
+            logger.info(f"Janitor: removed {removed} file(s), {reclaimed} bytes from {quota.path}")
+        return reclaimed
+
+    def sweep(self) -> int:
+        """Enforces every quota once. Returns the total bytes reclaimed."""
+        start = time.perf_counter()
+        reclaimed = sum(self.sweep_directory(quota) for quota in self.quotas)
+        with self._lock:
+            self._runs += 1
+            self._last_run_at = time.time()
+            self._last_run_duration_s = time.perf_counter() - start
+        return reclaimed
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Janitor sweep failed: {e}")
+            if self._stop.wait(self.interval_s):
+                break
+
+    def start(self) -> None:
+        """Starts sweeping on a daemon thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="audio-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the sweeping thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns sweep counts and per-directory removed/reclaimed/used bytes."""
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "last_run_at": self._last_run_at,
+                "last_run_duration_s": round(self._last_run_duration_s, 4),
+                "bytes_reclaimed_total": sum(s["bytes_reclaimed"] for s in self._stats.values()),
+                "directories": {path: dict(stats) for path, stats in self._stats.items()},
+            }
+
+
+_janitor: Optional[AudioJanitor] = None
+_janitor_lock = threading.Lock()
+
+
+def get_janitor() -> AudioJanitor:
+    """Returns the process-wide janitor, creating it on first use."""
+    global _janitor
+    if _janitor is None:
+        with _janitor_lock:
+            if _janitor is None:
+                _janitor = AudioJanitor.from_config()
+    return _janitor
+
+
+def start_janitor() -> Optional[AudioJanitor]:
+    """Starts the process-wide janitor unless ``JANITOR_ENABLED`` is false."""
+    if not config.JANITOR_ENABLED:
+        return None
+    janitor = get_janitor()
+    janitor.start()
+    return janitor
@@ -9,18 +9,21 @@ This class is primarily for CLI execution.
 
 from __future__ import annotations
 
+import logging
 import os
 
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
+logger = logging.getLogger(__name__)
+
 
 class AudioPlayer:
     """Plays audio files using sounddevice and soundfile."""
 
     def __init__(self) -> None:
-        print("AudioPlayer initialized using sounddevice and soundfile.")
+        logger.info("AudioPlayer initialized using sounddevice and soundfile.")
 
     def play_audio_file(self, file_path: str) -> None:
         """
@@ -30,34 +33,34 @@ class AudioPlayer:
             file_path: Path to the audio file.
         """
         if not os.path.exists(file_path):
-            print(f"Error: Audio file not found at {file_path}")
+            logger.error(f"Error: Audio file not found at {file_path}")
             return
 
         try:
-            print(f"Playing audio file: {file_path}...")
+            logger.debug("Playing audio file: %s...", file_path)
             data: np.ndarray
             samplerate: int
             data, samplerate = sf.read(file_path, dtype="float32")
             sd.play(data, samplerate)
             sd.wait()  # Wait until playback is finished
-            print("Audio playback finished.")
+            logger.debug("Audio playback finished.")
 
         except sf.LibsndfileError as e:
-            print(f"Soundfile Error reading audio: {e}")
-            print(f"Ensure the audio file '{file_path}' is a valid and supported format (e.g., WAV, MP3).")
+            logger.error(f"Soundfile Error reading audio: {e}")
+            logger.error(f"Ensure the audio file '{file_path}' is a valid and supported format (e.g., WAV, MP3).")
         except sd.PortAudioError as e:
-            print(f"PortAudio Error during playback: {e}")
-            print("Please ensure your audio output device is properly configured.")
-            print(
+            logger.error(f"PortAudio Error during playback: {e}")
+            logger.error("Please ensure your audio output device is properly configured.")
+            logger.error(
                 "You might need to install PortAudio (e.g., 'brew install portaudio' "
                 "on macOS, 'sudo apt-get install portaudio19-dev' on Ubuntu)."
             )
         except Exception as e:
-            print(f"Error during audio playback: {e}")
+            logger.error(f"Error during audio playback: {e}")
 
     def close(self) -> None:
         """Clean up resources."""
-        print("AudioPlayer closed.")
+        logger.info("AudioPlayer closed.")
 
 
 # Example usage
@@ -7,16 +7,19 @@ installed and accessible in your system's PATH.
 
 from __future__ import annotations
 
+import logging
 import os
 
 from pydub import AudioSegment
 
+logger = logging.getLogger(__name__)
+
 
 class AudioProcessor:
     """Utility class for audio file format conversion and processing."""
 
     def __init__(self) -> None:
-        print("AudioProcessor initialized. (Requires pydub and optionally ffmpeg/libav)")
+        logger.info("AudioProcessor initialized. (Requires pydub and optionally ffmpeg/libav)")
 
     def convert_to_wav(self, input_file_path: str, output_file_path: str) -> str:
         """
@@ -30,17 +33,45 @@ class AudioProcessor:
             Path to the converted WAV file, or an empty string on failure.
         """
         if not os.path.exists(input_file_path):
-            print(f"Error: Input audio file not found at {input_file_path}")
+            logger.error(f"Error: Input audio file not found at {input_file_path}")
             return ""
 
         try:
-            print(f"Converting '{input_file_path}' to WAV format...")
+            logger.debug("Converting '%s' to WAV format...", input_file_path)
             audio: AudioSegment = AudioSegment.from_file(input_file_path)
             audio.export(output_file_path, format="wav")
-            print(f"Successfully converted to WAV: {output_file_path}")
+            logger.debug("Successfully converted to WAV: %s", output_file_path)
+            return output_file_path
+        except Exception as e:
+            logger.error(f"Error converting audio to WAV: {e}")
+            return ""
+
+    def extract_prefix(self, input_file_path: str, output_file_path: str, fraction: float) -> str:
+        """
+        Writes the first ``fraction`` of an audio file to a new file.
+
+        Used to obtain a partial transcript early (speculative generation).
+
+        Args:
+            input_file_path: Path to the input audio file.
+            output_file_path: Desired path for the output audio file; its
+                extension selects the export format.
+            fraction: Portion of the audio to keep, between 0 and 1.
+
+        Returns:
+            Path to the prefix audio file, or an empty string on failure.
+        """
+        if not os.path.exists(input_file_path):
+            logger.error(f"Error: Input audio file not found at {input_file_path}")
+            return ""
+
+        try:
+            audio: AudioSegment = AudioSegment.from_file(input_file_path)
+            prefix: AudioSegment = audio[: int(len(audio) * max(0.0, min(1.0, fraction)))]
+            prefix.export(output_file_path, format=output_file_path.rsplit(".", 1)[-1])
             return output_file_path
         except Exception as e:
-            print(f"Error converting audio to WAV: {e}")
+            logger.error(f"Error extracting audio prefix: {e}")
             return ""
 
     def apply_noise_reduction(self, input_file_path: str, output_file_path: str) -> str:
@@ -58,17 +89,17 @@ class AudioProcessor:
             Path to the processed audio file, or an empty string on failure.
         """
         if not os.path.exists(input_file_path):
-            print(f"Error: Input audio file for noise reduction not found at {input_file_path}")
+            logger.error(f"Error: Input audio file for noise reduction not found at {input_file_path}")
             return ""
 
-        print(f"Applying (simulated) noise reduction to: {input_file_path}")
+        logger.debug("Applying (simulated) noise reduction to: %s", input_file_path)
         try:
             audio: AudioSegment = AudioSegment.from_file(input_file_path)
             audio.export(output_file_path, format=input_file_path.split(".")[-1])
-            print(f"Noise reduction (simulated) complete. Output: {output_file_path}")
+            logger.debug("Noise reduction (simulated) complete. Output: %s", output_file_path)
             return output_file_path
         except Exception as e:
-            print(f"Error during simulated noise reduction: {e}")
+            logger.error(f"Error during simulated noise reduction: {e}")
             return ""
 
 
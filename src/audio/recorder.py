@@ -9,6 +9,7 @@ to record and send audio.
 
 from __future__ import annotations
 
+import logging
 import os
 import time
 from typing import Optional
@@ -17,6 +18,8 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
+logger = logging.getLogger(__name__)
+
 
 class AudioRecorder:
     """Records audio from the microphone using sounddevice and soundfile."""
@@ -25,7 +28,7 @@ class AudioRecorder:
         self.sample_rate: int = sample_rate
         self.channels: int = channels
         self.is_recording: bool = False
-        print("AudioRecorder initialized using sounddevice and soundfile.")
+        logger.info("AudioRecorder initialized using sounddevice and soundfile.")
 
     def start_recording(self, duration: int = 5) -> Optional[str]:
         """
@@ -38,7 +41,7 @@ class AudioRecorder:
             Path to the saved audio file, or ``None`` if recording failed.
         """
         self.is_recording = True
-        print(f"Recording started for {duration} seconds (press Ctrl+C to stop early)...")
+        logger.info(f"Recording started for {duration} seconds (press Ctrl+C to stop early)...")
 
         try:
             recording: np.ndarray = sd.rec(
@@ -49,7 +52,7 @@ class AudioRecorder:
             )
             sd.wait()  # Wait until recording is finished
 
-            print("Recording stopped.")
+            logger.info("Recording stopped.")
 
             output_dir: str = "data/audio/input"
             os.makedirs(output_dir, exist_ok=True)
@@ -57,19 +60,19 @@ class AudioRecorder:
             file_path: str = os.path.join(output_dir, f"input_audio_{timestamp}.wav")
 
             sf.write(file_path, recording, self.sample_rate)
-            print(f"Audio saved to: {file_path}")
+            logger.debug("Audio saved to: %s", file_path)
             return file_path
 
         except sd.PortAudioError as e:
-            print(f"PortAudio Error during recording: {e}")
-            print("Please ensure your microphone is properly connected and drivers are installed.")
-            print(
+            logger.error(f"PortAudio Error during recording: {e}")
+            logger.error("Please ensure your microphone is properly connected and drivers are installed.")
+            logger.error(
                 "You might need to install PortAudio (e.g., 'brew install portaudio' "
                 "on macOS, 'sudo apt-get install portaudio19-dev' on Ubuntu)."
             )
             return None
         except Exception as e:
-            print(f"Error during recording: {e}")
+            logger.error(f"Error during recording: {e}")
             self.is_recording = False
             return None
 
@@ -77,11 +80,11 @@ class AudioRecorder:
         """Stops the current recording."""
         sd.stop()
         self.is_recording = False
-        print("Recording flagged to stop.")
+        logger.debug("Recording flagged to stop.")
 
     def close(self) -> None:
         """Clean up resources."""
-        print("AudioRecorder closed.")
+        logger.info("AudioRecorder closed.")
 
 
 # Example usage
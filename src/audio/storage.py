@@ -0,0 +1,173 @@
+"""
+Content-addressed storage for synthesized audio.
+
+Each response file is named after the SHA-256 of its bytes and kept in a
+shard subdirectory named after the first two hex digits, e.g.
+``data/audio/output/3f/3fa9...c1.mp3``. Concurrent turns can't overwrite
+each other's audio, shards keep directories small, and because a name
+always refers to the same bytes it can be cached by browsers and proxies
+until the janitor deletes it (see :func:`cache_control`).
+
+Files are first written to a unique temporary path (:func:`temp_audio_path`)
+and then moved into place with :func:`store_audio`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from src.utils.config import config
+
+OUTPUT_DIR: str = os.path.join("data", "audio", "output")
+TEMP_DIR: str = os.path.join(OUTPUT_DIR, "tmp")
+# Uploads waiting for a background job (see src.jobs)
+JOB_UPLOAD_DIR: str = os.path.join("data", "audio", "jobs")
+
+# Content-addressed files never change, so they may be cached for up to a
+# year, or until the janitor deletes them if that comes first
+IMMUTABLE_MAX_AGE: int = 31536000
+# Legacy (timestamp-named) files may be replaced, so caches must revalidate
+REVALIDATE_CACHE_CONTROL: str = "no-cache"
+
+_CONTENT_NAME = re.compile(r"^([0-9a-f]{64})\.mp3$")
+_CHUNK_SIZE = 64 * 1024
+
+
+def temp_audio_path(temp_dir: str = TEMP_DIR, ext: str = "mp3") -> str:
+    """Returns a unique path to write a new audio file to before storing it."""
+    return os.path.join(temp_dir, f"{uuid.uuid4().hex}.{ext}")
+
+
+def file_digest(path: str) -> str:
+    """Returns the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_audio(path: str, output_dir: str = OUTPUT_DIR) -> str:
+    """
+    Moves a finished audio file to its content-addressed location.
+
+    The move is an atomic rename, so readers never see a partial file. If
+    identical audio is already stored the rename simply replaces it with
+    the same bytes.
+
+    Args:
+        path: Path of the finished (temporary) audio file.
+        output_dir: Root of the content-addressed store.
+
+    Returns:
+        The final path, ``<output_dir>/<hash[:2]>/<hash>.mp3``.
+    """
+    digest = file_digest(path)
+    shard_dir = os.path.join(output_dir, digest[:2])
+    os.makedirs(shard_dir, exist_ok=True)
+    final_path = os.path.join(shard_dir, f"{digest}.mp3")
+    os.replace(path, final_path)
+    return final_path
+
+
+def is_content_addressed(filename: str) -> bool:
+    """Returns True if ``filename`` is a content-addressed name (``<sha256>.mp3``)."""
+    return _CONTENT_NAME.match(os.path.basename(filename)) is not None
+
+
+def resolve_audio(filename: str, output_dir: str = OUTPUT_DIR) -> Optional[str]:
+    """
+    Maps an ``/api/audio/<filename>`` name to the stored file.
+
+    Content-addressed names are looked up in their shard; other names are
+    looked up directly in ``output_dir`` (files from before sharding).
+
+    Args:
+        filename: Requested file name; any directory part is ignored.
+        output_dir: Root of the content-addressed store.
+
+    Returns:
+        The file path, or None if no such file exists.
+    """
+    name = os.path.basename(filename)
+    if is_content_addressed(name):
+        path = os.path.join(output_dir, name[:2], name)
+    else:
+        path = os.path.join(output_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def audio_etag(path: str) -> str:
+    """
+    Returns a strong ETag (unquoted) for a stored audio file: the content
+    hash, read from the name when possible instead of hashing the file.
+    """
+    match = _CONTENT_NAME.match(os.path.basename(path))
+    return match.group(1) if match else file_digest(path)
+
+
+def cache_control(path: str) -> str:
+    """
+    Returns the ``Cache-Control`` header value for a stored audio file.
+    Content-addressed files are immutable, but the janitor deletes them
+    after ``AUDIO_OUTPUT_MAX_AGE``, so caching is limited to the time they
+    have left.
+    """
+    if not is_content_addressed(path):
+        return REVALIDATE_CACHE_CONTROL
+    max_age = IMMUTABLE_MAX_AGE
+    if config.JANITOR_ENABLED and config.AUDIO_OUTPUT_MAX_AGE > 0:
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except OSError:
+            age = 0.0
+        max_age = min(max_age, max(0, int(config.AUDIO_OUTPUT_MAX_AGE - age)))
+    return f"public, max-age={max_age}, immutable"
+
+
+class AudioBytesCache:
+    """
+    A bounded LRU cache of audio file contents, keyed by path.
+
+    Stored files are content-addressed and never change, so their bytes can
+    be kept in memory and served again (e.g. on every Streamlit rerun)
+    without touching the disk. The least recently used entry is dropped
+    once ``max_items`` files are held.
+    """
+
+    def __init__(self, max_items: int = 20) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, path: str, data: bytes) -> None:
+        """Caches ``data`` as the contents of ``path``."""
+        self._items[path] = data
+        self._items.move_to_end(path)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def get(self, path: str) -> Optional[bytes]:
+        """
+        Returns the contents of ``path``, reading (and caching) the file on
+        a miss. Returns None if it isn't cached and no longer exists.
+        """
+        data = self._items.get(path)
+        if data is not None:
+            self._items.move_to_end(path)
+            return data
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.put(path, data)
+        return data
@@ -0,0 +1,484 @@
+"""
+Concurrent, resumable batch processing of text and audio inputs.
+
+Reads items from a JSONL file (one ``{"id": ..., "text": ...}`` or
+``{"id": ..., "audio": "path"}`` object per line) or a directory (audio
+files, plus ``.txt`` files as text inputs) and runs each one through a
+headless VoiceLLM pipeline:
+
+- Items run concurrently on ``concurrency`` worker threads, and new items
+  start at no more than ``rate`` per second so a batch stays under the API
+  rate limits.
+- Every result is appended to the output JSONL file as soon as it is done.
+  The output file is also the checkpoint: rerunning the same command skips
+  items already recorded as ``ok``, so a crashed or interrupted run resumes
+  where it stopped (failed items are retried).
+- Identical inputs (same text, or same audio bytes) are processed once and
+  the result is recorded for each of their IDs.
+
+Each item gets a fresh conversation, so results don't depend on the order
+items are processed in. Run with::
+
+    python -m src.batch inputs.jsonl --output results.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Iterable, Optional
+
+from src.api.scheduler import BATCH, priority
+from src.audio.storage import file_digest
+from src.utils.config import config
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+TEXT = "text"
+AUDIO = "audio"
+OK = "ok"
+ERROR = "error"
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg", ".m4a", ".flac", ".webm")
+
+# Fields of a result record describing the item rather than its result
+_ITEM_FIELDS = ("id", "kind", "input", "key", "duplicate_of")
+
+# Seconds between progress log lines
+_PROGRESS_INTERVAL_S = 10.0
+
+
+@dataclass
+class BatchItem:
+    """One input of a batch: a text prompt or the path of an audio file."""
+
+    id: str
+    kind: str
+    value: str
+    key: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.key:
+            self.key = item_key(self.kind, self.value)
+
+
+def item_key(kind: str, value: str) -> str:
+    """
+    Returns the de-duplication key of an input: a hash of the text, or of
+    the audio file's bytes (so copies of one recording are processed once).
+    """
+    if kind == AUDIO:
+        try:
+            return f"audio:{file_digest(value)}"
+        except OSError:
+            # Unreadable: key on the path and let processing report the error
+            return f"audio-path:{value}"
+    return "text:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def load_items(source: str) -> list[BatchItem]:
+    """
+    Reads batch items from a JSONL file or a directory.
+
+    In a JSONL file each line is an object with ``text`` or ``audio`` (a path,
+    relative to the file's directory) and an optional ``id`` (default: the
+    line number). In a directory, audio files and ``.txt`` files are items,
+    identified by their path relative to the directory.
+
+    Args:
+        source: Path of the JSONL file or directory.
+
+    Returns:
+        The items in input order.
+
+    Raises:
+        ValueError: If a JSONL line is invalid or IDs repeat.
+    """
+    items = _read_directory(source) if os.path.isdir(source) else _read_jsonl(source)
+    seen: set[str] = set()
+    for item in items:
+        if item.id in seen:
+            raise ValueError(f"Duplicate item ID '{item.id}' in {source}")
+        seen.add(item.id)
+    return items
+
+
+def _read_directory(source: str) -> list[BatchItem]:
+    """Reads the audio and ``.txt`` files under ``source`` as items, sorted by ID."""
+    items: list[BatchItem] = []
+    for root, _dirs, files in os.walk(source):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            item_id = os.path.relpath(path, source)
+            ext = os.path.splitext(name)[1].lower()
+            if ext in AUDIO_EXTENSIONS:
+                items.append(BatchItem(item_id, AUDIO, path))
+            elif ext == ".txt":
+                with open(path, encoding="utf-8") as f:
+                    items.append(BatchItem(item_id, TEXT, f.read().strip()))
+    items.sort(key=lambda item: item.id)
+    return items
+
+
+def _read_jsonl(source: str) -> list[BatchItem]:
+    """Reads one item per non-blank line of the JSONL file ``source``."""
+    items: list[BatchItem] = []
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{source}:{line_number}: invalid JSON ({e})") from e
+            item_id = str(entry.get("id", line_number))
+            if isinstance(entry.get("text"), str):
+                items.append(BatchItem(item_id, TEXT, entry["text"]))
+            elif isinstance(entry.get("audio"), str):
+                items.append(BatchItem(item_id, AUDIO, os.path.join(base_dir, entry["audio"])))
+            else:
+                raise ValueError(f"{source}:{line_number}: expected a 'text' or 'audio' field")
+    return items
+
+
+def load_checkpoint(output_path: str) -> dict[str, dict]:
+    """
+    Returns the latest recorded result per item ID from an output file.
+    Lines that can't be parsed (e.g. cut short by a crash) are ignored.
+    """
+    records: dict[str, dict] = {}
+    if not os.path.exists(output_path):
+        return records
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                records[str(record["id"])] = record
+    return records
+
+
+class RateLimiter:
+    """
+    A token bucket allowing ``rate`` acquisitions per second on average,
+    with bursts of up to ``burst``. A rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a token is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+def process_item(voice_llm, item: BatchItem) -> dict[str, Any]:
+    """
+    Runs one item through the pipeline in a fresh conversation.
+
+    Returns:
+        The result fields: ``transcription`` (audio items), ``response`` and
+        ``audio_path``.
+    """
+    voice_llm.memory.clear()
+    if item.kind == AUDIO:
+        transcription, response, audio_path = voice_llm.process_audio_upload(item.value)
+        return {"transcription": transcription, "response": response, "audio_path": audio_path}
+    response, audio_path = voice_llm.process_text_input(item.value)
+    return {"response": response, "audio_path": audio_path}
+
+
+def _default_pipeline_factory() -> Callable[[], Any]:
+    """Returns a factory of headless VoiceLLMs sharing one OpenAI client."""
+    from src.api.openai_client import OpenAIClient
+    from src.voice_llm import VoiceLLM
+
+    client = OpenAIClient()
+    return lambda: VoiceLLM(headless=True, openai_client=client)
+
+
+def result_record(item: BatchItem, result: dict[str, Any], processed_id: str) -> dict[str, Any]:
+    """
+    Returns the output line for ``item``: its fields and the result, plus
+    ``duplicate_of`` if the result was produced for another item
+    (``processed_id``) with the same input.
+    """
+    record = {"id": item.id, "kind": item.kind, "input": item.value, "key": item.key, **result}
+    if item.id != processed_id:
+        record["duplicate_of"] = processed_id
+    return record
+
+
+class ThreadPipelines:
+    """
+    One pipeline per worker thread (a VoiceLLM's conversation memory isn't
+    thread-safe), created on first use from ``factory``.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Args:
+            factory: Returns a VoiceLLM-like pipeline. Defaults to headless
+                VoiceLLMs sharing one OpenAI client.
+        """
+        self._factory = factory
+        self._local = threading.local()
+        self._pipelines: list = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns this thread's pipeline, creating it on first use."""
+        pipeline = getattr(self._local, "pipeline", None)
+        if pipeline is None:
+            with self._lock:
+                if self._factory is None:
+                    self._factory = _default_pipeline_factory()
+            pipeline = self._local.pipeline = self._factory()
+            with self._lock:
+                self._pipelines.append(pipeline)
+        return pipeline
+
+    def close(self) -> None:
+        """Closes every pipeline created so far."""
+        with self._lock:
+            pipelines, self._pipelines = self._pipelines, []
+        for pipeline in pipelines:
+            try:
+                pipeline.close()
+            except Exception as e:
+                logger.debug("Error closing batch pipeline: %s", e)
+
+
+def run_item(pipeline, item: BatchItem) -> dict[str, Any]:
+    """
+    Processes one item, capturing a failure as an ``error`` result.
+
+    Returns:
+        The result record fields: ``status``, the :func:`process_item`
+        fields or ``error``, and ``duration_s``.
+    """
+    start = time.perf_counter()
+    # Batch API requests wait behind interactive and background ones
+    with span("batch.item", {"item_id": item.id, "kind": item.kind}), priority(BATCH):
+        try:
+            result = {"status": OK, **process_item(pipeline, item)}
+        except Exception as e:
+            logger.warning("Batch item %s failed: %s", item.id, e)
+            result = {"status": ERROR, "error": str(e)}
+    result["duration_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+@dataclass
+class BatchSummary:
+    """Counts and throughput of a batch run."""
+
+    total: int = 0
+    already_done: int = 0
+    duplicates: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    processed: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def items_per_s(self) -> float:
+        """Results written per second of this run."""
+        return self.processed / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the summary as a JSON-serialisable dict."""
+        return {
+            "total": self.total,
+            "already_done": self.already_done,
+            "duplicates": self.duplicates,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "processed": self.processed,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "items_per_s": round(self.items_per_s, 3),
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"Processed {self.processed} of {self.total} items in {self.elapsed_s:.1f}s "
+            f"({self.items_per_s:.2f} items/s): {self.succeeded} ok, {self.failed} failed, "
+            f"{self.duplicates} duplicates, {self.already_done} already done"
+        )
+
+
+def _record(
+    out: IO[str], summary: BatchSummary, group: list[BatchItem], result: dict[str, Any], processed_id: str
+) -> None:
+    """Writes ``result`` for every item of ``group`` (processed as ``processed_id``)."""
+    for item in group:
+        if item.id != processed_id:
+            summary.duplicates += 1
+        out.write(json.dumps(result_record(item, result, processed_id), ensure_ascii=False) + "\n")
+        if result["status"] == OK:
+            summary.succeeded += 1
+        else:
+            summary.failed += 1
+        summary.processed += 1
+    out.flush()
+
+
+class BatchRunner:
+    """
+    Runs batch items concurrently under a rate limit, appending each result
+    to ``output_path`` as soon as it is available.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        concurrency: int = 4,
+        rate: float = 0.0,
+        pipeline_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Args:
+            output_path: Results JSONL file, also used as the checkpoint.
+            concurrency: Items processed at the same time.
+            rate: Maximum items started per second (0 for no limit).
+            pipeline_factory: Returns a VoiceLLM-like pipeline; one is made
+                per worker thread. Defaults to headless VoiceLLMs sharing
+                one OpenAI client.
+        """
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rate)
+        self.pipelines = ThreadPipelines(pipeline_factory)
+
+    def _work(self, item: BatchItem) -> dict[str, Any]:
+        self.limiter.acquire()
+        return run_item(self.pipelines.get(), item)
+
+    def _open_output(self) -> IO[str]:
+        """Opens the results file for appending, starting on a fresh line."""
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        out = open(self.output_path, "a+", encoding="utf-8")
+        # A crash may have cut the last line short
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        return out
+
+    def _process(
+        self, pending: list[list[BatchItem]], out: IO[str], summary: BatchSummary, start: float
+    ) -> None:
+        """Runs the first item of each group, recording results as they finish."""
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch")
+        try:
+            futures = {executor.submit(self._work, group[0]): group for group in pending}
+            last_progress = time.perf_counter()
+            not_done = set(futures)
+            while not_done:
+                finished, not_done = wait(not_done, timeout=_PROGRESS_INTERVAL_S, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    group = futures[future]
+                    _record(out, summary, group, future.result(), group[0].id)
+                if time.perf_counter() - last_progress >= _PROGRESS_INTERVAL_S:
+                    last_progress = time.perf_counter()
+                    summary.elapsed_s = last_progress - start
+                    logger.info("Batch progress: %s", summary)
+        finally:
+            # On an interrupt, drop queued items; finished results are already on disk
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.pipelines.close()
+
+    def run(self, items: Iterable[BatchItem]) -> BatchSummary:
+        """
+        Processes every item not already recorded as ``ok`` in the output file.
+
+        Returns:
+            A :class:`BatchSummary` of this run.
+        """
+        items = list(items)
+        summary = BatchSummary(total=len(items))
+        start = time.perf_counter()
+
+        checkpoint = load_checkpoint(self.output_path)
+        done_ids = {item_id for item_id, record in checkpoint.items() if record.get("status") == OK}
+        done_by_key = {
+            record["key"]: record for record in checkpoint.values()
+            if record.get("status") == OK and "key" in record
+        }
+
+        # Identical inputs are processed once, for all of their IDs
+        groups: dict[str, list[BatchItem]] = {}
+        for item in items:
+            if item.id in done_ids:
+                summary.already_done += 1
+            else:
+                groups.setdefault(item.key, []).append(item)
+
+        with self._open_output() as out:
+            # Inputs already processed under another ID reuse that result
+            pending: list[list[BatchItem]] = []
+            for key, group in groups.items():
+                previous = done_by_key.get(key)
+                if previous is not None:
+                    result = {k: v for k, v in previous.items() if k not in _ITEM_FIELDS}
+                    _record(out, summary, group, result, previous.get("duplicate_of", previous["id"]))
+                else:
+                    pending.append(group)
+            self._process(pending, out, summary, start)
+
+        summary.elapsed_s = time.perf_counter() - start
+        logger.info("Batch finished: %s", summary)
+        return summary
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Runs a batch from the command line and prints its summary."""
+    parser = argparse.ArgumentParser(description="Process a batch of text/audio inputs through the VoiceLLM pipeline.")
+    parser.add_argument("input", help="JSONL file of {\"id\", \"text\"|\"audio\"} objects, or a directory of audio/.txt files.")
+    parser.add_argument("--output", help="Results JSONL file, also the resume checkpoint (default: data/batch/<input>.results.jsonl).")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY, help="Items processed at once (default: BATCH_CONCURRENCY).")
+    parser.add_argument("--rate", type=float, default=config.BATCH_RATE_LIMIT, help="Max items started per second, 0 for no limit (default: BATCH_RATE_LIMIT).")
+    args = parser.parse_args(argv)
+
+    from src.utils.logger import setup_logging
+    setup_logging(log_file="batch.log")
+
+    output = args.output or os.path.join(
+        "data", "batch", os.path.splitext(os.path.basename(os.path.normpath(args.input)))[0] + ".results.jsonl"
+    )
+    items = load_items(args.input)
+    print(f"Loaded {len(items)} items from {args.input}; writing results to {output}")
+    summary = BatchRunner(output, concurrency=args.concurrency, rate=args.rate).run(items)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Background jobs for slow, batch-like work (e.g. long audio transcriptions).
+
+``POST /api/jobs`` hands the work to a :class:`JobManager` and returns a job
+ID straight away; a small worker pool runs the job outside the HTTP request
+and ``GET /api/jobs/<id>`` reports its status and result. Long uploads no
+longer hold a server thread or run into proxy timeouts, and they can't
+crowd out interactive traffic beyond the pool size.
+
+Finished jobs are kept for ``retention_s`` seconds and then forgotten.
+Uploads waiting for a job live in :data:`src.audio.storage.JOB_UPLOAD_DIR`,
+outside the size-capped input directory, so the janitor can't evict them
+while the job is queued; each job deletes its upload once processed.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from src.api.scheduler import BACKGROUND, priority
+from src.utils.config import config
+from src.utils.exceptions import AdmissionRejectedError
+from src.utils.logger import log_context
+from src.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """State of one background job."""
+
+    id: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the JSON representation served by ``GET /api/jobs/<id>``."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded worker pool and keeps their results for a while.
+
+    Jobs are zero-argument callables returning a JSON-serialisable dict.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 100, retention_s: float = 3600.0) -> None:
+        self.max_pending = max_pending
+        self.retention_s = retention_s
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._pending = 0
+        self._submitted = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._expired = 0
+
+    @classmethod
+    def from_config(cls) -> "JobManager":
+        """Builds a manager from the JOB_* settings."""
+        return cls(
+            max_workers=config.JOB_WORKERS,
+            max_pending=config.JOB_MAX_PENDING,
+            retention_s=config.JOB_RETENTION,
+        )
+
+    def submit(self, work: Callable[[], dict]) -> Job:
+        """
+        Queues a job.
+
+        Args:
+            work: Callable doing the job; its return value becomes the result.
+
+        Returns:
+            The queued :class:`Job`.
+
+        Raises:
+            AdmissionRejectedError: If ``max_pending`` jobs are already queued
+                or running (HTTP 429).
+        """
+        with self._lock:
+            self._purge_expired()
+            if self._pending >= self.max_pending:
+                raise AdmissionRejectedError("Too many pending jobs", status_code=429, retry_after=30)
+            job = Job(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self._submitted += 1
+        # The job runs in a copy of the submitter's context, so its spans
+        # belong to the trace of the request that created it
+        self._executor.submit(contextvars.copy_context().run, self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[], dict]) -> None:
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            # Jobs yield API capacity to interactive turns
+            with log_context(job_id=job.id), priority(BACKGROUND):
+                job.result = work()
+            job.status = SUCCEEDED
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.id, e)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                if job.status == SUCCEEDED:
+                    self._succeeded += 1
+                else:
+                    self._failed += 1
+
+    def _purge_expired(self) -> None:
+        """Forgets finished jobs older than the retention period. Caller holds the lock."""
+        cutoff = time.time() - self.retention_s
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._expired += len(expired)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Returns a job by ID, or None if unknown or expired."""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns job counts by outcome and the number pending."""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "retained": len(self._jobs),
+                "submitted": self._submitted,
+                "succeeded": self._succeeded,
+                "failed": self._failed,
+                "expired": self._expired,
+            }
+
+    def shutdown(self) -> None:
+        """Stops the worker pool; queued jobs are cancelled."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def job_pipeline_factory(openai_client) -> Callable[[], Any]:
+    """
+    Returns a factory of headless VoiceLLMs sharing ``openai_client``.
+
+    Each job gets its own pipeline, so job turns never land in the live
+    chat's conversation memory (or another job's), and concurrent jobs
+    don't mutate one memory, which isn't thread-safe.
+    """
+    def factory():
+        from src.voice_llm import VoiceLLM
+        return VoiceLLM(headless=True, openai_client=openai_client)
+    return factory
+
+
+def transcription_job(new_pipeline: Callable[[], Any], audio_file_path: str) -> Callable[[], dict]:
+    """
+    Returns a job running an uploaded audio file through a fresh VoiceLLM
+    pipeline from ``new_pipeline`` (see :func:`job_pipeline_factory`).
+
+    The result has the same fields as the ``/api/transcribe`` response. The
+    upload is deleted once processed.
+    """
+    def work() -> dict:
+        voice_llm = None
+        try:
+            voice_llm = new_pipeline()
+            transcription, response, audio_path = voice_llm.process_audio_upload(audio_file_path)
+        finally:
+            if voice_llm is not None:
+                voice_llm.close()
+            try:
+                os.remove(audio_file_path)
+            except OSError:
+                pass
+        return {
+            "transcription": transcription,
+            "response": response,
+            "audio_url": f"/api/audio/{os.path.basename(audio_path)}" if audio_path else None,
+        }
+    return work
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide job manager, creating it on first use."""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager.from_config()
+    return _job_manager
+
+
+REGISTRY.gauge_callback(
+    "voice_llm_jobs_pending",
+    "Background jobs queued or running.",
+    [],
+    lambda: [({}, _job_manager.metrics()["pending"])] if _job_manager is not None else [],
+)
@@ -1,9 +1,29 @@
 # src/llm/__init__.py
 # This file marks the llm directory as a Python package.
 
-# You can import commonly used components here for easier access
-# For example:
-from .chains import get_conversation_chain
-from .memory import get_conversation_memory
-from .prompts import get_default_prompt, get_creative_prompt, get_technical_prompt
+# Commonly used components, re-exported for easier access. They are imported
+# on first use (PEP 562), so ``import src.llm.models`` doesn't load LangChain.
+import importlib
 
+_EXPORTS = {
+    "get_conversation_chain": ".chains",
+    "get_chain_pool": ".chains",
+    "ChainPool": ".chains",
+    "get_conversation_memory": ".memory",
+    "get_default_prompt": ".prompts",
+    "get_creative_prompt": ".prompts",
+    "get_technical_prompt": ".prompts",
+    "get_prompt": ".prompts",
+    "get_prompt_registry": ".prompts",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,18 +1,74 @@
+import logging
 import os 
+import threading
+from typing import Optional
+
 from langchain.chains import ConversationChain
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.memory import ConversationBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
 
 # Import specific components from sibling modules
-from src.llm.prompts import get_default_prompt
+from src.api.transport import get_async_http_client, get_http_client
+from src.llm.prompts import get_prompt
 from src.llm.memory import get_conversation_memory
+from src.llm.models import DEFAULT_PROFILE_KEY, ModelProfile, load_model_profiles
 from src.utils.config import config # Assuming config is accessible here
+from src.utils.metrics import TOKENS
+from src.utils.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    Counts prompt/completion tokens reported by the OpenAI API into
+    ``llm_tokens_total`` and onto the current trace span.
+    """
+
+    def on_llm_end(self, response: LLMResult, **kwargs) -> None:
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        model = llm_output.get("model_name", "unknown")
+        if usage:
+            TOKENS.inc(usage.get("prompt_tokens", 0), model=model, direction="in")
+            TOKENS.inc(usage.get("completion_tokens", 0), model=model, direction="out")
+            active = current_span()
+            if active is not None:
+                active.set_attribute("model", model)
+                active.set_attribute("tokens_in", usage.get("prompt_tokens", 0))
+                active.set_attribute("tokens_out", usage.get("completion_tokens", 0))
+
+
+token_usage_callback = TokenUsageCallback()
+
+def get_llm_for_profile(profile: ModelProfile) -> ChatOpenAI:
+    """
+    Creates a ChatOpenAI instance configured from a model profile.
+
+    Args:
+        profile (ModelProfile): The profile (model name, temperature, max tokens) to use.
+
+    Returns:
+        ChatOpenAI: A language model instance for the profile.
+    """
+    return ChatOpenAI(
+        model=profile.name,
+        temperature=profile.temperature,
+        max_tokens=profile.max_tokens,
+        openai_api_key=config.OPENAI_API_KEY,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        callbacks=[token_usage_callback],
+    )
 
 def get_conversation_chain(llm: ChatOpenAI = None,
                            memory: ConversationBufferMemory = None,
                            prompt_template: ChatPromptTemplate = None,
-                           verbose: bool = False) -> ConversationChain:
+                           verbose: bool = False,
+                           prompt_name: str = "default") -> ConversationChain:
     """
     Configures and returns a LangChain ConversationChain.
 
@@ -24,11 +80,13 @@ def get_conversation_chain(llm: ChatOpenAI = None,
         prompt_template (ChatPromptTemplate, optional): The prompt template to use.
                                                         If None, a default is used.
         verbose (bool): If True, enables verbose logging for the chain.
+        prompt_name (str): Name of the registry prompt (``config/prompts/<name>.txt``)
+                           used when ``prompt_template`` is None.
 
     Returns:
         ConversationChain: A configured LangChain ConversationChain.
     """
-    print("Configuring LangChain ConversationChain.")
+    logger.debug("Configuring LangChain ConversationChain.")
 
     # Use provided instances or create defaults based on configuration
     if llm is None:
@@ -36,17 +94,20 @@ def get_conversation_chain(llm: ChatOpenAI = None,
             model=config.MODEL_NAME,
             temperature=config.TEMPERATURE,
             max_tokens=config.MAX_TOKENS,
-            openai_api_key=config.OPENAI_API_KEY
+            openai_api_key=config.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+            callbacks=[token_usage_callback],
         )
-        print(f"Default ChatOpenAI LLM created: {config.MODEL_NAME}")
+        logger.debug("Default ChatOpenAI LLM created: %s", config.MODEL_NAME)
 
     if memory is None:
         memory = get_conversation_memory()
-        print("Default conversation memory initialized.")
+        logger.debug("Default conversation memory initialized.")
 
     if prompt_template is None:
-        prompt_template = get_default_prompt()
-        print("Default prompt template loaded.")
+        prompt_template = get_prompt(prompt_name)
+        logger.debug("Prompt template '%s' loaded.", prompt_name)
 
     chain = ConversationChain(
         llm=llm,
@@ -54,9 +115,80 @@ def get_conversation_chain(llm: ChatOpenAI = None,
         prompt=prompt_template,
         verbose=verbose
     )
-    print("ConversationChain successfully created.")
+    logger.debug("ConversationChain successfully created.")
     return chain
 
+class ChainPool:
+    """
+    Caches one LLM client per model profile and assembles chains on top of them.
+
+    ``ChatOpenAI`` instances own their HTTP client and connection pool, so
+    building one per persona switch opens new connections every time. The
+    pool creates each profile's client once; ``get_chain()`` then only wires
+    the shared client, a cached prompt from the registry and the caller's
+    memory together, which is cheap enough to do on every persona switch.
+    """
+
+    def __init__(self, profiles: Optional[dict[str, ModelProfile]] = None) -> None:
+        self.profiles: dict[str, ModelProfile] = profiles if profiles is not None else load_model_profiles()
+        self._llms: dict[str, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+
+    def get_llm(self, profile_key: str = DEFAULT_PROFILE_KEY) -> ChatOpenAI:
+        """
+        Returns the shared LLM client for a model profile, creating it on first use.
+
+        Raises:
+            KeyError: If the profile is not defined.
+        """
+        llm = self._llms.get(profile_key)
+        if llm is None:
+            with self._lock:
+                llm = self._llms.get(profile_key)
+                if llm is None:
+                    llm = get_llm_for_profile(self.profiles[profile_key])
+                    self._llms[profile_key] = llm
+                    logger.info(f"Shared ChatOpenAI client created for profile '{profile_key}'.")
+        return llm
+
+    def get_chain(self,
+                  memory: ConversationBufferMemory,
+                  persona: str = "default",
+                  profile_key: str = DEFAULT_PROFILE_KEY,
+                  verbose: bool = False) -> ConversationChain:
+        """
+        Assembles a ConversationChain for a (persona, model profile) pair.
+
+        Args:
+            memory (ConversationBufferMemory): The caller's conversation memory.
+            persona (str): Prompt registry name (e.g. "default", "creative").
+            profile_key (str): Model profile key from models.yaml.
+            verbose (bool): If True, enables verbose logging for the chain.
+
+        Returns:
+            ConversationChain: A chain sharing the pooled LLM client.
+        """
+        return ConversationChain(
+            llm=self.get_llm(profile_key),
+            memory=memory,
+            prompt=get_prompt(persona),
+            verbose=verbose
+        )
+
+
+_chain_pool: Optional[ChainPool] = None
+_chain_pool_lock = threading.Lock()
+
+
+def get_chain_pool() -> ChainPool:
+    """Returns the process-wide chain pool, creating it on first use."""
+    global _chain_pool
+    if _chain_pool is None:
+        with _chain_pool_lock:
+            if _chain_pool is None:
+                _chain_pool = ChainPool()
+    return _chain_pool
+
 # Example usage
 if __name__ == "__main__":
     print("--- Running Chains Example ---")
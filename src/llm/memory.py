@@ -8,6 +8,7 @@ utilities for persisting / loading conversation history to JSON files.
 from __future__ import annotations
 
 import json
+import logging
 import os
 from datetime import datetime, timezone
 from typing import Any, Optional
@@ -15,6 +16,8 @@ from typing import Any, Optional
 from langchain.memory import ConversationBufferMemory
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
+logger = logging.getLogger(__name__)
+
 # Default directory for saved conversations
 CONVERSATIONS_DIR: str = "data/conversations"
 
@@ -26,7 +29,7 @@ def get_conversation_memory() -> ConversationBufferMemory:
     Returns:
         A fresh LangChain conversation memory.
     """
-    print("Initializing conversation memory (ConversationBufferMemory).")
+    logger.debug("Initializing conversation memory (ConversationBufferMemory).")
     return ConversationBufferMemory(memory_key="chat_history", return_messages=True)
 
 
@@ -63,7 +66,7 @@ def save_conversation(memory: ConversationBufferMemory, filepath: Optional[str]
             ensure_ascii=False,
         )
 
-    print(f"Conversation saved to {filepath} ({len(serialized)} messages).")
+    logger.info(f"Conversation saved to {filepath} ({len(serialized)} messages).")
     return filepath
 
 
@@ -104,7 +107,7 @@ def load_conversation(filepath: str, memory: Optional[ConversationBufferMemory]
         else:
             i += 1
 
-    print(f"Loaded conversation from {filepath} ({len(messages)} messages).")
+    logger.info(f"Loaded conversation from {filepath} ({len(messages)} messages).")
     return memory
 
 
@@ -0,0 +1,124 @@
+"""
+Model profile loading from ``config/models.yaml``.
+
+Each top-level entry in the YAML file (other than the reserved ``routing``
+section) describes one model profile: the OpenAI model name plus the
+generation settings to use with it. The ``routing`` section holds the
+tuning knobs for :class:`src.llm.router.ModelRouter`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import yaml
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Reserved top-level key in models.yaml that is not a model profile
+ROUTING_SECTION: str = "routing"
+
+# Key of the profile used when nothing else is selected
+DEFAULT_PROFILE_KEY: str = "default_model"
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Generation settings for a single chat model."""
+
+    key: str
+    name: str
+    max_tokens: int
+    temperature: float
+    tts_voice: Optional[str] = None
+    whisper_model: Optional[str] = None
+
+
+def _read_models_yaml(path: str) -> dict[str, Any]:
+    """Reads the raw models.yaml mapping, returning an empty dict if absent."""
+    if not os.path.exists(path):
+        logger.warning(f"Model config not found at {path}; using environment defaults.")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Model config {path} must contain a mapping at the top level.")
+    return data
+
+
+def _default_profile() -> ModelProfile:
+    """Builds the default profile from the flat environment configuration."""
+    return ModelProfile(
+        key=DEFAULT_PROFILE_KEY,
+        name=config.MODEL_NAME,
+        max_tokens=config.MAX_TOKENS,
+        temperature=config.TEMPERATURE,
+        tts_voice=config.TTS_VOICE,
+        whisper_model=config.WHISPER_MODEL,
+    )
+
+
+def load_model_profiles(path: Optional[str] = None) -> dict[str, ModelProfile]:
+    """
+    Loads all model profiles defined in the models config file.
+
+    Missing fields fall back to the flat environment configuration, so a
+    profile only needs to specify what differs from the defaults. The
+    ``default_model`` profile always mirrors the environment configuration
+    (``MODEL_NAME``, ``MAX_TOKENS``, ...) so that routed and unrouted
+    setups agree on what the default model is.
+
+    Args:
+        path: Path to the YAML file. Defaults to ``config.MODELS_CONFIG_PATH``.
+
+    Returns:
+        Mapping of profile key to :class:`ModelProfile`.
+    """
+    data = _read_models_yaml(path or config.MODELS_CONFIG_PATH)
+    base = _default_profile()
+
+    profiles: dict[str, ModelProfile] = {DEFAULT_PROFILE_KEY: base}
+    for key, entry in data.items():
+        if key in (ROUTING_SECTION, DEFAULT_PROFILE_KEY) or not isinstance(entry, dict):
+            continue
+        profiles[key] = ModelProfile(
+            key=key,
+            name=str(entry.get("name", key)),
+            max_tokens=int(entry.get("max_tokens", base.max_tokens)),
+            temperature=float(entry.get("temperature", base.temperature)),
+            tts_voice=entry.get("tts_voice", base.tts_voice),
+            whisper_model=entry.get("whisper_model", base.whisper_model),
+        )
+    return profiles
+
+
+def load_routing_settings(path: Optional[str] = None) -> dict[str, Any]:
+    """
+    Returns the ``routing`` section of the models config file.
+
+    Args:
+        path: Path to the YAML file. Defaults to ``config.MODELS_CONFIG_PATH``.
+
+    Returns:
+        The routing settings mapping (empty if the section is absent).
+    """
+    data = _read_models_yaml(path or config.MODELS_CONFIG_PATH)
+    settings = data.get(ROUTING_SECTION) or {}
+    if not isinstance(settings, dict):
+        raise ValueError(f"'{ROUTING_SECTION}' section in models config must be a mapping.")
+    return settings
+
+
+# Example usage
+if __name__ == "__main__":
+    print("--- Running Model Profiles Example ---")
+    for profile in load_model_profiles().values():
+        print(f"- {profile.key}: {profile.name} (max_tokens={profile.max_tokens}, "
+              f"temperature={profile.temperature})")
+    print(f"Routing settings: {load_routing_settings()}")
+    print("\n--- Model Profiles Example Finished ---")
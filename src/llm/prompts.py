@@ -1,51 +1,186 @@
+"""
+Prompt templates for the conversation chains.
+
+System prompts live in ``config/prompts/<name>.txt``. The
+:class:`PromptRegistry` reads each file once, compiles it into a
+``ChatPromptTemplate`` and caches the result. Lookups re-check the file's
+modification time at most every ``reload_interval`` seconds, so edited
+prompts are picked up by running workers without a restart. If an edited
+file can't be read or compiled, the last good template keeps being served.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
 from langchain.prompts import HumanMessagePromptTemplate, ChatPromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate
 
-def get_default_prompt() -> ChatPromptTemplate:
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Built-in system prompts used when a prompt file is missing or empty
+DEFAULT_SYSTEM_PROMPTS: dict[str, str] = {
+    "default": "You are a helpful and friendly AI assistant. Keep your responses concise and relevant.",
+    "creative": (
+        "You are a highly creative and imaginative AI assistant. "
+        "Feel free to invent scenarios, tell stories, or offer unique perspectives. "
+        "Be whimsical and engaging."
+    ),
+    "technical": (
+        "You are a precise and knowledgeable technical AI assistant. "
+        "Focus on providing accurate, detailed, and factual information. "
+        "Avoid speculation and clearly state when information is beyond your current knowledge."
+    ),
+}
+
+
+def build_chat_prompt(system_prompt: str) -> ChatPromptTemplate:
     """
-    Returns a default conversation prompt template, including chat history.
+    Compiles a system prompt into the conversation template used by the chains
+    (system message, chat history placeholder, human input). The system
+    prompt is literal text: braces in it are not template variables.
     """
-    print("Loading default prompt template.")
+    escaped = system_prompt.replace("{", "{{").replace("}", "}}")
     return ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(
-            "You are a helpful and friendly AI assistant. Keep your responses concise and relevant."
-        ),
+        SystemMessagePromptTemplate.from_template(escaped),
         MessagesPlaceholder(variable_name="chat_history"),
         HumanMessagePromptTemplate.from_template("{input}")
     ])
 
+
+class PromptRegistry:
+    """
+    Loads, compiles and caches prompt templates from a prompts directory.
+
+    Each entry remembers the source file's mtime; a lookup older than
+    ``reload_interval`` seconds re-stats the file and recompiles it if it
+    changed, so the steady-state cost of ``get()`` is a dict lookup.
+    """
+
+    def __init__(self, prompts_dir: Optional[str] = None, reload_interval: Optional[float] = None) -> None:
+        self.prompts_dir: str = prompts_dir or config.PROMPTS_DIR
+        self.reload_interval: float = (
+            config.PROMPT_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        )
+        self._lock = threading.Lock()
+        # name -> (source mtime or None for built-in, last checked at, template)
+        self._cache: dict[str, tuple[Optional[float], float, ChatPromptTemplate]] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.prompts_dir, f"{name}.txt")
+
+    def _mtime(self, name: str) -> Optional[float]:
+        try:
+            return os.stat(self._path(name)).st_mtime
+        except OSError:
+            return None
+
+    def _compile(self, name: str, mtime: Optional[float]) -> ChatPromptTemplate:
+        text = ""
+        if mtime is not None:
+            with open(self._path(name), "r", encoding="utf-8") as f:
+                text = f.read().strip()
+        if not text:
+            if name not in DEFAULT_SYSTEM_PROMPTS:
+                raise KeyError(f"Unknown prompt '{name}' (no file at {self._path(name)}).")
+            text = DEFAULT_SYSTEM_PROMPTS[name]
+        logger.debug("Loading %s prompt template.", name)
+        return build_chat_prompt(text)
+
+    def get(self, name: str) -> ChatPromptTemplate:
+        """
+        Returns the compiled prompt template for ``name``.
+
+        Args:
+            name: Prompt name, i.e. the file name without ``.txt``.
+
+        Returns:
+            The cached (or freshly recompiled) ``ChatPromptTemplate``.
+
+        Raises:
+            KeyError: If there is neither a prompt file nor a built-in prompt.
+        """
+        now = time.monotonic()
+        entry = self._cache.get(name)
+        if entry is not None and now - entry[1] < self.reload_interval:
+            return entry[2]
+
+        with self._lock:
+            entry = self._cache.get(name)
+            mtime = self._mtime(name)
+            if entry is not None and entry[0] == mtime:
+                template = entry[2]
+            elif entry is None:
+                template = self._compile(name, mtime)
+            else:
+                try:
+                    template = self._compile(name, mtime)
+                except Exception as e:
+                    # Retried once the file changes again
+                    logger.error("Reloading the %s prompt failed, keeping the previous one: %s", name, e)
+                    template = entry[2]
+            self._cache[name] = (mtime, now, template)
+            return template
+
+    def names(self) -> list[str]:
+        """Returns all available prompt names (files plus built-ins), sorted."""
+        names = set(DEFAULT_SYSTEM_PROMPTS)
+        if os.path.isdir(self.prompts_dir):
+            names.update(f[:-4] for f in os.listdir(self.prompts_dir) if f.endswith(".txt"))
+        return sorted(names)
+
+    def clear(self) -> None:
+        """Drops all cached templates so the next lookups reload from disk."""
+        with self._lock:
+            self._cache.clear()
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Returns the process-wide prompt registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
+
+
+def get_prompt(name: str) -> ChatPromptTemplate:
+    """Looks up a compiled prompt template by name in the shared registry."""
+    return get_prompt_registry().get(name)
+
+
+def get_default_prompt() -> ChatPromptTemplate:
+    """
+    Returns a default conversation prompt template, including chat history.
+    """
+    return get_prompt("default")
+
 def get_creative_prompt() -> ChatPromptTemplate:
     """
     Returns a prompt template designed for more creative and imaginative responses.
     """
-    print("Loading creative prompt template.")
-    return ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(
-            "You are a highly creative and imaginative AI assistant. "
-            "Feel free to invent scenarios, tell stories, or offer unique perspectives. "
-            "Be whimsical and engaging."
-        ),
-        MessagesPlaceholder(variable_name="chat_history"),
-        HumanMessagePromptTemplate.from_template("{input}")
-    ])
+    return get_prompt("creative")
 
 def get_technical_prompt() -> ChatPromptTemplate:
     """
     Returns a prompt template optimized for technical discussions and factual accuracy.
     """
-    print("Loading technical prompt template.")
-    return ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(
-            "You are a precise and knowledgeable technical AI assistant. "
-            "Focus on providing accurate, detailed, and factual information. "
-            "Avoid speculation and clearly state when information is beyond your current knowledge."
-        ),
-        MessagesPlaceholder(variable_name="chat_history"),
-        HumanMessagePromptTemplate.from_template("{input}")
-    ])
+    return get_prompt("technical")
 
 # Example usage
 if __name__ == "__main__":
     print("--- Running Prompt Examples ---")
+    print(f"Available prompts: {get_prompt_registry().names()}")
     default_prompt = get_default_prompt()
     creative_prompt = get_creative_prompt()
     technical_prompt = get_technical_prompt()
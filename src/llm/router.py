@@ -0,0 +1,224 @@
+"""
+Latency-aware model routing.
+
+Picks a model profile per conversation turn: short voice chit-chat goes to
+the fast profile, long or analytical questions go to the heavy profile, and
+everything in between uses the default. Observed per-profile latency is
+tracked over a rolling window so that a profile which is currently slower
+than its budget is skipped in favour of the next faster tier. Samples expire
+after ``latency_max_age_s``, so a skipped profile (which gets no new samples)
+is tried again once its slow samples have aged out.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from statistics import median
+from typing import Any, Optional
+
+from src.llm.models import (
+    DEFAULT_PROFILE_KEY,
+    ModelProfile,
+    load_model_profiles,
+    load_routing_settings,
+)
+from src.utils.metrics import REGISTRY
+
+ROUTE_DECISIONS = REGISTRY.counter(
+    "llm_route_decisions_total", "Model routing decisions by profile and reason.", ["profile", "reason"]
+)
+
+# Words/phrases that usually indicate a question worth the heavier model
+COMPLEXITY_KEYWORDS: tuple[str, ...] = (
+    "explain", "why", "how does", "how do", "compare", "difference",
+    "analyze", "analyse", "step by step", "prove", "derive", "calculate",
+    "summarize", "summarise", "design", "implement", "code", "algorithm",
+)
+
+_CODE_LIKE = re.compile(r"[{}\[\]=<>]|\(\)|\bdef\b|\bclass\b|\bselect\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """The outcome of routing a single turn."""
+
+    profile: ModelProfile
+    score: int
+    reason: str
+
+
+class ModelRouter:
+    """
+    Chooses a :class:`ModelProfile` per turn from input heuristics and
+    observed rolling latency.
+
+    Tiers are ordered fast -> default -> heavy. The complexity score picks
+    the initial tier; if that tier's rolling median latency exceeds
+    ``latency_budget_s`` the router steps down to the next faster tier
+    that is within budget (or has no recent samples).
+    """
+
+    def __init__(
+        self,
+        profiles: dict[str, ModelProfile],
+        fast_profile: Optional[str] = None,
+        heavy_profile: Optional[str] = None,
+        short_input_words: int = 8,
+        long_input_words: int = 40,
+        heavy_score: int = 2,
+        latency_budget_s: float = 6.0,
+        latency_window: int = 20,
+        latency_max_age_s: float = 300.0,
+    ) -> None:
+        if DEFAULT_PROFILE_KEY not in profiles:
+            raise ValueError(f"Model profiles must include '{DEFAULT_PROFILE_KEY}'.")
+        for name in (fast_profile, heavy_profile):
+            if name is not None and name not in profiles:
+                raise ValueError(f"Unknown model profile for routing: '{name}'.")
+
+        self.profiles = profiles
+        self.tiers: list[str] = [
+            fast_profile or DEFAULT_PROFILE_KEY,
+            DEFAULT_PROFILE_KEY,
+            heavy_profile or DEFAULT_PROFILE_KEY,
+        ]
+        self.short_input_words = short_input_words
+        self.long_input_words = long_input_words
+        self.heavy_score = heavy_score
+        self.latency_budget_s = latency_budget_s
+        self.latency_max_age_s = latency_max_age_s
+
+        self._lock = threading.Lock()
+        # (monotonic time, seconds) per profile
+        self._latencies: dict[str, deque[tuple[float, float]]] = {
+            key: deque(maxlen=latency_window) for key in profiles
+        }
+        self._decisions: dict[str, int] = {key: 0 for key in profiles}
+        self._reasons: dict[str, int] = {}
+        self._last_decision: Optional[RouteDecision] = None
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "ModelRouter":
+        """Builds a router from the profiles and ``routing`` section of models.yaml."""
+        settings = load_routing_settings(path)
+        return cls(
+            load_model_profiles(path),
+            fast_profile=settings.get("fast_profile"),
+            heavy_profile=settings.get("heavy_profile"),
+            short_input_words=int(settings.get("short_input_words", 8)),
+            long_input_words=int(settings.get("long_input_words", 40)),
+            heavy_score=int(settings.get("heavy_score", 2)),
+            latency_budget_s=float(settings.get("latency_budget_s", 6.0)),
+            latency_window=int(settings.get("latency_window", 20)),
+            latency_max_age_s=float(settings.get("latency_max_age_s", 300.0)),
+        )
+
+    # ── Heuristics ────────────────────────────────────────────
+
+    def complexity_score(self, user_input: str) -> int:
+        """
+        Scores how demanding a turn looks. Negative means trivial chit-chat,
+        ``>= heavy_score`` means the heavy profile is warranted.
+        """
+        text = user_input.strip().lower()
+        words = len(text.split())
+
+        score = 0
+        if words <= self.short_input_words:
+            score -= 1
+        if words >= self.long_input_words:
+            score += 2
+        score += min(2, sum(1 for kw in COMPLEXITY_KEYWORDS if kw in text))
+        if text.count("?") > 1:
+            score += 1
+        if _CODE_LIKE.search(text):
+            score += 1
+        return score
+
+    def _rolling_median(self, key: str) -> Optional[float]:
+        samples = self._latencies.get(key)
+        if not samples:
+            return None
+        cutoff = time.monotonic() - self.latency_max_age_s
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return median(seconds for _, seconds in samples) if samples else None
+
+    # ── Routing ───────────────────────────────────────────────
+
+    def route(self, user_input: str) -> RouteDecision:
+        """
+        Picks the profile for this turn and records the decision.
+
+        Args:
+            user_input: The user's text for the turn.
+
+        Returns:
+            The :class:`RouteDecision` taken.
+        """
+        score = self.complexity_score(user_input)
+        if score <= 0:
+            tier, reason = 0, "simple"
+        elif score >= self.heavy_score:
+            tier, reason = 2, "complex"
+        else:
+            tier, reason = 1, "moderate"
+
+        with self._lock:
+            # Step down while the chosen tier is currently over its latency budget
+            while tier > 0:
+                observed = self._rolling_median(self.tiers[tier])
+                if observed is None or observed <= self.latency_budget_s:
+                    break
+                tier -= 1
+                reason = "latency_fallback"
+
+            decision = RouteDecision(self.profiles[self.tiers[tier]], score, reason)
+            self._decisions[decision.profile.key] += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+            self._last_decision = decision
+        ROUTE_DECISIONS.inc(profile=decision.profile.key, reason=reason)
+        return decision
+
+    def record_latency(self, profile_key: str, seconds: float) -> None:
+        """Adds an observed generation latency for a profile to its rolling window."""
+        with self._lock:
+            if profile_key in self._latencies:
+                self._latencies[profile_key].append((time.monotonic(), seconds))
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns a snapshot of routing decisions and rolling latencies."""
+        with self._lock:
+            last = self._last_decision
+            return {
+                "tiers": {"fast": self.tiers[0], "default": self.tiers[1], "heavy": self.tiers[2]},
+                "decisions": dict(self._decisions),
+                "reasons": dict(self._reasons),
+                "rolling_median_latency_s": {
+                    key: self._rolling_median(key) for key in self._latencies
+                },
+                "last_decision": None if last is None else {
+                    "profile": last.profile.key,
+                    "score": last.score,
+                    "reason": last.reason,
+                },
+            }
+
+
+# Example usage
+if __name__ == "__main__":
+    print("--- Running Model Router Example ---")
+    router = ModelRouter.from_config()
+    for sample in (
+        "Hi there!",
+        "What's a good name for a cat?",
+        "Explain step by step how TCP congestion control works and compare it with QUIC.",
+    ):
+        decision = router.route(sample)
+        print(f"'{sample[:40]}' -> {decision.profile.name} ({decision.reason}, score={decision.score})")
+    print(router.metrics())
+    print("\n--- Model Router Example Finished ---")
@@ -0,0 +1,172 @@
+"""
+Speculative LLM generation on partial transcripts.
+
+Normally the LLM request only starts once the full transcript is known.
+With speculation, a partial transcript (from a prefix of the audio, or from
+chunked/streaming transcription) starts a provisional generation right
+away. When the final transcript arrives, the provisional answer is kept
+only if the final transcript adds nothing to the partial one (ignoring case
+and punctuation); otherwise it is discarded and the caller generates from
+the final transcript as usual, so an answer never misses the end of the
+question.
+
+The provisional generation must not have side effects (e.g. writing to
+conversation memory); the caller commits the turn only once it is kept.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[\w']+")
+
+
+def transcript_words(text: str) -> list[str]:
+    """
+    Returns the words of a transcript, lowercased and without punctuation
+    (Whisper often differs only in those between passes).
+    """
+    return _WORD.findall(text.lower())
+
+
+def same_transcript(partial: str, final: str) -> bool:
+    """
+    True if ``final`` says nothing that ``partial`` didn't, ignoring case
+    and punctuation: an answer to ``partial`` then answers ``final`` too.
+    """
+    return transcript_words(partial) == transcript_words(final)
+
+
+@dataclass
+class Speculation:
+    """A provisional generation started from a partial transcript."""
+
+    partial_text: str
+    future: Future
+    started_at: float
+    # Routing decision the provisional generation used, reused for the final one
+    decision: Any = None
+
+
+class SpeculativeGenerator:
+    """
+    Runs provisional generations on a small thread pool and decides whether
+    to keep them once the final transcript is known.
+
+    Tracks attempts, hits, misses and the total latency saved by hits
+    (the overlap between the provisional generation and transcription).
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, Any], str],
+        max_workers: int = 4,
+    ) -> None:
+        """
+        Args:
+            generate: ``generate(text, decision)`` produces a response
+                without side effects; ``decision`` is what :meth:`start` got.
+            max_workers: Threads running provisional generations.
+        """
+        self.generate = generate
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._attempts = 0
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._latency_saved_s = 0.0
+
+    def _run(self, text: str, decision: Any) -> tuple[str, float]:
+        return self.generate(text, decision), time.perf_counter()
+
+    def start(self, partial_text: str, decision: Any = None) -> Optional[Speculation]:
+        """
+        Starts a provisional generation for a partial transcript.
+
+        Args:
+            partial_text: The partial transcript.
+            decision: Passed on to ``generate`` and kept on the speculation
+                (e.g. the model routing decision for the turn).
+
+        Returns:
+            The running :class:`Speculation`, or None if the text is blank.
+        """
+        if not partial_text or not partial_text.strip():
+            return None
+        with self._lock:
+            self._attempts += 1
+        return Speculation(
+            partial_text=partial_text,
+            future=self._executor.submit(contextvars.copy_context().run, self._run, partial_text, decision),
+            started_at=time.perf_counter(),
+            decision=decision,
+        )
+
+    def resolve(self, speculation: Optional[Speculation], final_text: str) -> Optional[str]:
+        """
+        Keeps or discards a provisional generation given the final transcript.
+
+        Args:
+            speculation: The speculation returned by :meth:`start` (may be None).
+            final_text: The final transcript.
+
+        Returns:
+            The provisional response if the final transcript adds nothing to
+            the partial one and the generation succeeded, otherwise None (the
+            caller should generate from ``final_text``).
+        """
+        if speculation is None:
+            return None
+        final_at = time.perf_counter()
+
+        if not same_transcript(speculation.partial_text, final_text):
+            # Best effort: a generation that hasn't started yet is dropped,
+            # one already in flight finishes in the background and is ignored.
+            speculation.future.cancel()
+            with self._lock:
+                self._misses += 1
+            return None
+
+        try:
+            response, done_at = speculation.future.result()
+        except Exception as e:
+            logger.warning(f"Speculative generation failed: {e}")
+            with self._lock:
+                self._errors += 1
+            return None
+
+        # Serial would finish at final_at + (done_at - started_at); speculation
+        # finishes at max(final_at, done_at). The difference is the overlap.
+        saved = max(0.0, min(final_at, done_at) - speculation.started_at)
+        with self._lock:
+            self._hits += 1
+            self._latency_saved_s += saved
+        return response
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns hit-rate and latency-saved counters."""
+        with self._lock:
+            resolved = self._hits + self._misses + self._errors
+            return {
+                "attempts": self._attempts,
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_rate": self._hits / resolved if resolved else 0.0,
+                "latency_saved_s_total": round(self._latency_saved_s, 3),
+                "latency_saved_s_avg": round(self._latency_saved_s / self._hits, 3) if self._hits else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stops the worker threads (pending generations are cancelled)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
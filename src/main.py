@@ -1,6 +1,9 @@
 import argparse
+from src.api.transport import prewarm_in_background
+from src.audio.janitor import start_janitor
 from src.voice_llm import VoiceLLM
 from src.utils.config import config # Import config to check debug mode
+from src.utils.logger import setup_logging
 
 def main():
     """
@@ -29,6 +32,10 @@ def main():
         print("\n--- Starting Voice-Controlled LLM App (CLI Mode) ---")
         llm_app = None
         try:
+            setup_logging()
+            # Warm API connections while the audio devices initialise
+            prewarm_in_background()
+            start_janitor()
             llm_app = VoiceLLM()
             llm_app.start_conversation(duration=args.record_duration)
         except KeyboardInterrupt:
@@ -0,0 +1,252 @@
+"""
+Admission control for the web servers.
+
+Each endpoint group gets an :class:`AdmissionController`: a bounded pool of
+``max_concurrency`` slots plus a FIFO wait queue of at most ``max_queue``
+requests. A request that finds the queue full is rejected immediately
+(HTTP 429); one that waits longer than ``max_queue_wait_s`` for a slot is
+rejected too (HTTP 503). Both carry a ``Retry-After`` estimate. Shedding
+load at the door keeps latency predictable for the requests that are
+admitted, instead of letting every request pile onto the pipeline until
+timeouts cascade.
+
+Flask handlers (one thread per request) use :meth:`AdmissionController.acquire`;
+ASGI handlers use :meth:`AdmissionController.aacquire`, which waits without
+blocking the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Optional, Union
+
+from src.utils.config import config
+from src.utils.exceptions import AdmissionRejectedError
+from src.utils.metrics import REGISTRY
+
+# Smoothing factor for the service-time moving average used by Retry-After
+_EWMA_ALPHA = 0.2
+
+
+class AdmissionController:
+    """
+    A bounded worker pool with a bounded, time-limited FIFO wait queue.
+
+    A released slot is handed directly to the oldest waiter, so queued
+    requests are served in arrival order and can't be overtaken by new ones.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_queue_wait_s: float,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait_s = max_queue_wait_s
+        self._lock = threading.Lock()
+        self._active = 0
+        # Each waiter is a threading.Event or an (event loop, asyncio.Future) pair
+        self._waiters: deque = deque()
+        self._service_time_s = 1.0
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._queue_wait_total_s = 0.0
+        self._queue_wait_max_s = 0.0
+
+    # ── Admission ─────────────────────────────────────────────
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue depth and service time."""
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self._service_time_s * backlog / self.max_concurrency))
+
+    def _try_enter(self, waiter: Any) -> bool:
+        """Takes a free slot (True) or queues ``waiter``. Caller holds the lock."""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self._rejected_queue_full += 1
+            raise AdmissionRejectedError(
+                f"'{self.name}' queue is full", status_code=429, retry_after=self._retry_after(),
+            )
+        self._waiters.append(waiter)
+        return False
+
+    def _withdraw(self, waiter: Any) -> bool:
+        """
+        Removes a waiter that stopped waiting. Returns False if a slot was
+        already handed to it. Caller holds the lock.
+        """
+        try:
+            self._waiters.remove(waiter)
+            return True
+        except ValueError:
+            return False
+
+    def _admit(self, queued_s: float) -> float:
+        with self._lock:
+            self._admitted += 1
+            self._queue_wait_total_s += queued_s
+            self._queue_wait_max_s = max(self._queue_wait_max_s, queued_s)
+        return queued_s
+
+    def _timeout_error(self) -> AdmissionRejectedError:
+        """Counts a queue-wait timeout and returns the error to raise. Caller holds the lock."""
+        self._rejected_timeout += 1
+        return AdmissionRejectedError(
+            f"'{self.name}' queue wait exceeded {self.max_queue_wait_s}s",
+            status_code=503,
+            retry_after=self._retry_after(),
+        )
+
+    def acquire(self) -> float:
+        """
+        Waits (blocking this thread) for a slot.
+
+        Returns:
+            Seconds spent queued.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full (429) or the wait
+                exceeded ``max_queue_wait_s`` (503).
+        """
+        start = time.perf_counter()
+        waiter = threading.Event()
+        with self._lock:
+            entered = self._try_enter(waiter)
+        if entered:
+            return self._admit(0.0)
+        if not waiter.wait(self.max_queue_wait_s):
+            with self._lock:
+                if self._withdraw(waiter):
+                    raise self._timeout_error()
+            # A slot was handed over just as the wait expired: admitted after all
+        return self._admit(time.perf_counter() - start)
+
+    async def aacquire(self) -> float:
+        """Async version of :meth:`acquire`; waits without blocking the event loop."""
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            entered = self._try_enter(waiter)
+        if entered:
+            return self._admit(0.0)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_queue_wait_s)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if self._withdraw(waiter):
+                    raise self._timeout_error()
+        except asyncio.CancelledError:
+            # Client went away while queued: give up the place (or the slot)
+            with self._lock:
+                withdrawn = self._withdraw(waiter)
+            if not withdrawn:
+                self.release()
+            raise
+        return self._admit(time.perf_counter() - start)
+
+    def release(self, service_time_s: Optional[float] = None) -> None:
+        """
+        Frees a slot, handing it to the oldest waiter if there is one.
+
+        Args:
+            service_time_s: How long the request held its slot; feeds the
+                ``Retry-After`` estimate.
+        """
+        with self._lock:
+            if service_time_s is not None:
+                self._service_time_s += _EWMA_ALPHA * (service_time_s - self._service_time_s)
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter: Union[threading.Event, tuple] = self._waiters.popleft()
+        # The slot passes to the waiter (``_active`` is unchanged)
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    # ── Metrics ───────────────────────────────────────────────
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns pool occupancy, queue depth, admissions, rejections and queue waits."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_queue_full,
+                "rejected_timeout": self._rejected_timeout,
+                "queue_wait_s_avg": round(self._queue_wait_total_s / self._admitted, 4) if self._admitted else 0.0,
+                "queue_wait_s_max": round(self._queue_wait_max_s, 4),
+                "service_time_s_ewma": round(self._service_time_s, 4),
+            }
+
+
+_controllers: dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission_controller(name: str) -> AdmissionController:
+    """
+    Returns the process-wide controller for an endpoint group, creating it
+    from config on first use (``transcribe`` uses its own concurrency limit,
+    every other group uses ``ADMISSION_CHAT_CONCURRENCY``).
+    """
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            concurrency = (
+                config.ADMISSION_TRANSCRIBE_CONCURRENCY if name == "transcribe"
+                else config.ADMISSION_CHAT_CONCURRENCY
+            )
+            controller = AdmissionController(
+                name,
+                max_concurrency=concurrency,
+                max_queue=config.ADMISSION_MAX_QUEUE,
+                max_queue_wait_s=config.ADMISSION_MAX_QUEUE_WAIT,
+            )
+            _controllers[name] = controller
+        return controller
+
+
+def admission_metrics() -> dict[str, dict[str, Any]]:
+    """Returns the metrics of every endpoint group's controller."""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {controller.name: controller.metrics() for controller in controllers}
+
+
+def _gauge(field: str):
+    """Callback reading one field of every controller's metrics for a scrape."""
+    return lambda: [({"group": name}, m[field]) for name, m in admission_metrics().items()]
+
+
+REGISTRY.gauge_callback(
+    "voice_llm_admission_queue_depth", "Requests waiting for an admission slot.", ["group"], _gauge("queued"),
+)
+REGISTRY.gauge_callback(
+    "voice_llm_admission_active", "Requests holding an admission slot.", ["group"], _gauge("active"),
+)
+REGISTRY.gauge_callback(
+    "voice_llm_admission_rejected", "Requests shed since start (queue full or wait exceeded).", ["group"],
+    lambda: [
+        ({"group": name}, m["rejected_queue_full"] + m["rejected_timeout"])
+        for name, m in admission_metrics().items()
+    ],
+)
@@ -1,9 +1,7 @@
 import os
+import threading
 from dotenv import dotenv_values, load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
 class Config:
     """
     Manages application configuration, loaded from environment variables.
@@ -20,6 +18,66 @@ class Config:
         self.MAX_TOKENS = int(os.getenv("MAX_TOKENS", env_vars.get("MAX_TOKENS", "150")))
         self.TEMPERATURE = float(os.getenv("TEMPERATURE", env_vars.get("TEMPERATURE", "0.7")))
         self.DEBUG = os.getenv("DEBUG", env_vars.get("DEBUG", "False")).lower() == 'true'
+        self.WEB_SERVER = os.getenv("WEB_SERVER", env_vars.get("WEB_SERVER", "asgi")).lower()
+        self.WEB_HOST = os.getenv("WEB_HOST", env_vars.get("WEB_HOST", "0.0.0.0"))
+        self.WEB_PORT = int(os.getenv("WEB_PORT", env_vars.get("WEB_PORT", "5000")))
+        self.WEB_WORKERS = int(os.getenv("WEB_WORKERS", env_vars.get("WEB_WORKERS", "1")))
+        self.HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", env_vars.get("HTTP_TIMEOUT", "60")))
+        self.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", env_vars.get("HTTP_CONNECT_TIMEOUT", "5")))
+        self.HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", env_vars.get("HTTP_MAX_CONNECTIONS", "100")))
+        self.HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", env_vars.get("HTTP_MAX_KEEPALIVE", "20")))
+        self.HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", env_vars.get("HTTP_KEEPALIVE_EXPIRY", "60")))
+        self.HTTP2 = os.getenv("HTTP2", env_vars.get("HTTP2", "True")).lower() == 'true'
+        self.HTTP_PREWARM_CONNECTIONS = int(os.getenv("HTTP_PREWARM_CONNECTIONS", env_vars.get("HTTP_PREWARM_CONNECTIONS", "2")))
+        self.MODELS_CONFIG_PATH = os.getenv("MODELS_CONFIG_PATH", env_vars.get("MODELS_CONFIG_PATH", "config/models.yaml"))
+        self.PROMPTS_DIR = os.getenv("PROMPTS_DIR", env_vars.get("PROMPTS_DIR", "config/prompts"))
+        self.PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", env_vars.get("PROMPT_RELOAD_INTERVAL", "2.0")))
+        self.SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", env_vars.get("SPECULATIVE_GENERATION", "False")).lower() == 'true'
+        self.SPECULATIVE_PREFIX_RATIO = float(os.getenv("SPECULATIVE_PREFIX_RATIO", env_vars.get("SPECULATIVE_PREFIX_RATIO", "0.8")))
+        self.MODEL_ROUTING = os.getenv("MODEL_ROUTING", env_vars.get("MODEL_ROUTING", "False")).lower() == 'true'
+        self.STREAM_TTS_MIN_CHARS = int(os.getenv("STREAM_TTS_MIN_CHARS", env_vars.get("STREAM_TTS_MIN_CHARS", "40")))
+        self.ADMISSION_CHAT_CONCURRENCY = int(os.getenv("ADMISSION_CHAT_CONCURRENCY", env_vars.get("ADMISSION_CHAT_CONCURRENCY", "8")))
+        self.ADMISSION_TRANSCRIBE_CONCURRENCY = int(os.getenv("ADMISSION_TRANSCRIBE_CONCURRENCY", env_vars.get("ADMISSION_TRANSCRIBE_CONCURRENCY", "4")))
+        self.ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", env_vars.get("ADMISSION_MAX_QUEUE", "16")))
+        self.ADMISSION_MAX_QUEUE_WAIT = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", env_vars.get("ADMISSION_MAX_QUEUE_WAIT", "10")))
+        self.JOB_WORKERS = int(os.getenv("JOB_WORKERS", env_vars.get("JOB_WORKERS", "2")))
+        self.JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", env_vars.get("JOB_MAX_PENDING", "100")))
+        self.JOB_RETENTION = float(os.getenv("JOB_RETENTION", env_vars.get("JOB_RETENTION", "3600")))
+        self.JOB_UPLOAD_MAX_AGE = float(os.getenv("JOB_UPLOAD_MAX_AGE", env_vars.get("JOB_UPLOAD_MAX_AGE", "86400")))
+        self.JANITOR_ENABLED = os.getenv("JANITOR_ENABLED", env_vars.get("JANITOR_ENABLED", "True")).lower() == 'true'
+        self.JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", env_vars.get("JANITOR_INTERVAL", "300")))
+        self.AUDIO_OUTPUT_MAX_AGE = float(os.getenv("AUDIO_OUTPUT_MAX_AGE", env_vars.get("AUDIO_OUTPUT_MAX_AGE", "86400")))
+        self.AUDIO_OUTPUT_MAX_BYTES = int(os.getenv("AUDIO_OUTPUT_MAX_BYTES", env_vars.get("AUDIO_OUTPUT_MAX_BYTES", "524288000")))
+        self.AUDIO_INPUT_MAX_AGE = float(os.getenv("AUDIO_INPUT_MAX_AGE", env_vars.get("AUDIO_INPUT_MAX_AGE", "3600")))
+        self.AUDIO_INPUT_MAX_BYTES = int(os.getenv("AUDIO_INPUT_MAX_BYTES", env_vars.get("AUDIO_INPUT_MAX_BYTES", "104857600")))
+        self.TRACING_ENABLED = os.getenv("TRACING_ENABLED", env_vars.get("TRACING_ENABLED", "False")).lower() == 'true'
+        self.TRACE_FILE = os.getenv("TRACE_FILE", env_vars.get("TRACE_FILE", "data/traces/spans.jsonl"))
+        self.TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", env_vars.get("TRACE_MAX_BYTES", "10485760")))
+        self.TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", env_vars.get("TRACE_BACKUP_COUNT", "3")))
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", env_vars.get("LOG_FORMAT", "text")).lower()
+        self.LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", env_vars.get("LOG_DEBUG_SAMPLE_RATE", "0.1")))
+        self.REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", env_vars.get("REQUEST_COALESCING", "True")).lower() == 'true'
+        self.API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", env_vars.get("API_MAX_CONCURRENCY", "16")))
+        self.API_INTERACTIVE_RESERVED = int(os.getenv("API_INTERACTIVE_RESERVED", env_vars.get("API_INTERACTIVE_RESERVED", "4")))
+        self.REQUEST_HEDGING = os.getenv("REQUEST_HEDGING", env_vars.get("REQUEST_HEDGING", "False")).lower() == 'true'
+        self.HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", env_vars.get("HEDGE_PERCENTILE", "0.95")))
+        self.HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", env_vars.get("HEDGE_MIN_DELAY", "0.5")))
+        self.HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", env_vars.get("HEDGE_BUDGET", "0.1")))
+        self.HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", env_vars.get("HEDGE_MIN_SAMPLES", "20")))
+        self.CIRCUIT_BREAKER = os.getenv("CIRCUIT_BREAKER", env_vars.get("CIRCUIT_BREAKER", "True")).lower() == 'true'
+        self.BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", env_vars.get("BREAKER_FAILURE_THRESHOLD", "5")))
+        self.BREAKER_LATENCY_THRESHOLD = float(os.getenv("BREAKER_LATENCY_THRESHOLD", env_vars.get("BREAKER_LATENCY_THRESHOLD", "0")))
+        self.BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", env_vars.get("BREAKER_RESET_TIMEOUT", "30.0")))
+        self.TURN_DEADLINE = float(os.getenv("TURN_DEADLINE", env_vars.get("TURN_DEADLINE", "0")))
+        self.TURN_TTS_MIN_BUDGET = float(os.getenv("TURN_TTS_MIN_BUDGET", env_vars.get("TURN_TTS_MIN_BUDGET", "2.0")))
+        self.BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", env_vars.get("BATCH_CONCURRENCY", "4")))
+        self.BATCH_RATE_LIMIT = float(os.getenv("BATCH_RATE_LIMIT", env_vars.get("BATCH_RATE_LIMIT", "2.0")))
+        self.QUEUE_DIR = os.getenv("QUEUE_DIR", env_vars.get("QUEUE_DIR", "data/queue"))
+        self.QUEUE_LEASE_TTL = float(os.getenv("QUEUE_LEASE_TTL", env_vars.get("QUEUE_LEASE_TTL", "60")))
+        self.QUEUE_POLL_INTERVAL = float(os.getenv("QUEUE_POLL_INTERVAL", env_vars.get("QUEUE_POLL_INTERVAL", "5")))
+        self.STREAMLIT_AUDIO_CACHE_ITEMS = int(os.getenv("STREAMLIT_AUDIO_CACHE_ITEMS", env_vars.get("STREAMLIT_AUDIO_CACHE_ITEMS", "20")))
+        self.STREAMLIT_HISTORY_RECENT_MESSAGES = int(os.getenv("STREAMLIT_HISTORY_RECENT_MESSAGES", env_vars.get("STREAMLIT_HISTORY_RECENT_MESSAGES", "20")))
+        self.TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", env_vars.get("TRACE_OTLP_ENDPOINT", ""))
 
         self._validate_config()
 
@@ -29,8 +87,46 @@ class Config:
             raise ValueError("OPENAI_API_KEY is not set in environment variables or .env file.")
         # Add other critical validations as needed
 
-# Instantiate config globally for easy access
-config = Config()
+class _LazyConfig:
+    """
+    The global configuration, loaded on first attribute access.
+
+    Importing a module that does ``from src.utils.config import config``
+    doesn't read ``.env`` or validate settings; the first ``config.X`` does,
+    so tools and workers that never touch a setting start faster and don't
+    need ``OPENAI_API_KEY`` just to import.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_config", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self) -> Config:
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    # Load environment variables from .env file
+                    load_dotenv()
+                    object.__setattr__(self, "_config", Config())
+        return self._config
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        return f"<lazy Config ({'loaded' if self._config is not None else 'not loaded'})>"
+
+
+def get_config() -> Config:
+    """Returns the global :class:`Config`, loading it if needed."""
+    return config._load()
+
+
+# Global config for easy access (loaded on first use)
+config = _LazyConfig()
 
 if __name__ == "__main__":
     # Example usage:
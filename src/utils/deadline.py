@@ -0,0 +1,88 @@
+"""
+Per-turn deadlines.
+
+A turn (one chat message or audio upload) can be given an overall time
+budget: ``TURN_DEADLINE`` seconds, or less if the client sends an
+``X-Request-Timeout`` header (seconds). The deadline is held in a context
+variable, so every stage of the turn sees it, including work handed to
+threads with ``asyncio.to_thread`` or ``contextvars.copy_context``:
+
+- ``OpenAIClient`` gives each API call the remaining time as its timeout,
+  and skips a retry when the next attempt couldn't finish in time.
+- Requests on the shared HTTP clients (LangChain's included) have their
+  timeouts capped at the remaining time.
+- ``VoiceLLM`` skips speech synthesis (an optional stage) when less than
+  ``TURN_TTS_MIN_BUDGET`` seconds are left. It fails the turn with
+  ``DeadlineExceededError`` when a required stage runs out of time.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Optional
+
+from src.utils.exceptions import DeadlineExceededError
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# Monotonic time by which the current turn must finish
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("turn_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Runs the block with a deadline ``seconds`` from now. A nested deadline
+    can only shorten the current one; None or a non-positive value keeps it.
+    """
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            pass  # Closed from another context
+
+
+def remaining() -> Optional[float]:
+    """Returns the seconds left in the current turn, or None without a deadline."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    """Returns True if the current turn's deadline has passed."""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def has_time_for(seconds: float) -> bool:
+    """Returns True unless the current turn has less than ``seconds`` left."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def check(stage: str) -> None:
+    """
+    Raises:
+        DeadlineExceededError: If the deadline has passed before ``stage``.
+    """
+    if expired():
+        raise DeadlineExceededError(f"Turn deadline exceeded before {stage}")
+
+
+def parse_timeout(value: Optional[str]) -> Optional[float]:
+    """Parses an ``X-Request-Timeout`` header value; returns None if missing or invalid."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds > 0 else None
@@ -34,3 +34,45 @@ class AudioProcessingError(VoiceLLMError):
 class AudioFileNotFoundError(AudioProcessingError):
     """Raised when an expected audio file is not found on disk."""
     pass
+
+
+class AdmissionRejectedError(VoiceLLMError):
+    """Raised when the server is saturated and a request is shed instead of queued."""
+
+    def __init__(self, message: str, status_code: int = 429, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(VoiceLLMError):
+    """
+    Raised immediately, without calling the API, while an endpoint's circuit
+    breaker is open. ``retry_after`` is the number of seconds until it will
+    let a probe request through.
+    """
+
+    def __init__(self, message: str, endpoint: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class TranscriptionUnavailableError(CircuitOpenError, TranscriptionError):
+    """Raised instead of calling Whisper while its circuit breaker is open."""
+    pass
+
+
+class SynthesisUnavailableError(CircuitOpenError, SynthesisError):
+    """Raised instead of calling TTS while its circuit breaker is open."""
+    pass
+
+
+class ChatUnavailableError(CircuitOpenError, ChatCompletionError):
+    """Raised instead of calling the chat API while its circuit breaker is open."""
+    pass
+
+
+class DeadlineExceededError(VoiceLLMError):
+    """Raised when a turn runs out of its time budget (see ``src.utils.deadline``)."""
+    pass
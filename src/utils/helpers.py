@@ -1,6 +1,9 @@
+import logging
 import os
 import datetime
 
+logger = logging.getLogger(__name__)
+
 def generate_timestamped_filename(prefix: str = "file", extension: str = "tmp") -> str:
     """
     Generates a unique filename using a timestamp.
@@ -26,7 +29,7 @@ def ensure_directory_exists(path: str):
         os.makedirs(path, exist_ok=True)
         # print(f"Ensured directory exists: {path}") # Uncomment for verbose
     except OSError as e:
-        print(f"Error creating directory {path}: {e}")
+        logger.error(f"Error creating directory {path}: {e}")
 
 # Example usage
 if __name__ == "__main__":
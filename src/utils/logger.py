@@ -1,15 +1,155 @@
+"""
+Asynchronous, structured application logging.
+
+``setup_logging`` installs a single ``QueueHandler`` on the root logger; a
+``QueueListener`` thread drains the queue into the console and file
+handlers. A log call on a request path therefore only formats the message
+and appends it to an in-memory queue: console writes and disk flushes happen
+off the request thread.
+
+Each record carries context fields: the current trace and span IDs (see
+``src.utils.tracing``) and anything bound with :func:`log_context` (e.g. the
+HTTP method and path, or a job ID). The file log is JSON lines; the console
+is human-readable text unless ``LOG_FORMAT=json``.
+
+Debug records are sampled (``LOG_DEBUG_SAMPLE_RATE``) per trace, so a
+sampled turn keeps all of its debug lines while total debug volume stays
+bounded. Records at INFO and above are never sampled.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import time
+import zlib
+from typing import Any, Iterator, Optional
+
 from src.utils.config import config # Import config to use DEBUG setting
+from src.utils.tracing import current_span
+
+_log_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextlib.contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Adds ``fields`` to every log record emitted inside the block (including
+    from tasks and ``asyncio.to_thread`` calls started inside it).
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        try:
+            _log_context.reset(token)
+        except ValueError:
+            pass  # Closed from another context
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attaches the caller's context fields to each record. Runs on the calling
+    thread, before the record is queued, since the listener thread can't see
+    the caller's context variables.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        active = current_span()
+        if active is not None:
+            record.trace_id = active.trace_id
+            record.span_id = active.span_id
+        for key, value in _log_context.get().items():
+            setattr(record, key, value)
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps a fraction of DEBUG records. Within a trace the decision is made
+    from the trace ID, so a turn's debug lines are kept or dropped together.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        if self.rate <= 0.0:
+            return False
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            return zlib.crc32(trace_id.encode()) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+def _fields(record: logging.LogRecord) -> dict[str, Any]:
+    """Returns the record's context and ``extra`` fields."""
+    return {k: v for k, v in vars(record).items() if k not in _RESERVED_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, context fields included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": (
+                time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                + f".{int(record.msecs):03d}"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, followed by any context fields as ``key=value``."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _fields(record)
+        if fields:
+            text += " [" + " ".join(f"{k}={v}" for k, v in fields.items()) + "]"
+        return text
+
 
 def setup_logging(log_file="app.log", log_dir="data/logs"):
     """
     Configures the global logging for the application.
 
+    Log calls enqueue records; a background listener writes them to the
+    console and to ``log_dir/log_file``. Safe to call more than once: the
+    previous listener is stopped and flushed first.
+
     Args:
         log_file (str): The name of the log file.
         log_dir (str): The directory where the log file will be saved.
     """
+    global _listener
+
     # Ensure log directory exists
     os.makedirs(log_dir, exist_ok=True)
     log_path = os.path.join(log_dir, log_file)
@@ -19,34 +159,55 @@ def setup_logging(log_file="app.log", log_dir="data/logs"):
     logger.setLevel(logging.DEBUG if config.DEBUG else logging.INFO) # Set level based on debug config
 
     # Clear existing handlers to prevent duplicate messages if called multiple times
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
     if logger.hasHandlers():
         logger.handlers.clear()
 
     # Create a console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO) # Console generally shows INFO and above
-    
+    console_handler.setFormatter(
+        JsonFormatter() if str(config.LOG_FORMAT).lower() == "json" else TextFormatter()
+    )
+
     # Create a file handler
     file_handler = logging.FileHandler(log_path, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG) # File captures all DEBUG messages and above
+    file_handler.setFormatter(JsonFormatter())
 
-    # Define a formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    # Set formatter for both handlers
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
+    # The only handler on the logging path just enqueues the record
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(DebugSampler(float(config.LOG_DEBUG_SAMPLE_RATE)))
+    logger.addHandler(queue_handler)
 
-    # Add handlers to the logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
 
     logging.info(f"Logging configured. Logs will be saved to: {log_path}")
     logging.debug(f"Debug mode is {'ON' if config.DEBUG else 'OFF'}.")
 
+
+def is_logging_configured():
+    """Returns True once :func:`setup_logging` has started the listener."""
+    return _listener is not None
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
 # Example usage (for testing purposes)
 if __name__ == "__main__":
     # Temporarily set debug for testing purposes if not already set by .env
@@ -54,9 +215,9 @@ if __name__ == "__main__":
     # Reload config if you modify env vars directly in the same session
     # from importlib import reload
     # reload(config_module) # assuming config is imported as config_module elsewhere
-    
+
     setup_logging(log_file="test_app.log", log_dir="data/logs")
-    
+
     logging.debug("This is a debug message.")
     logging.info("This is an info message.")
     logging.warning("This is a warning message.")
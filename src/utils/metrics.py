@@ -0,0 +1,293 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, histograms and callback gauges are kept in memory and rendered in
+the Prometheus text format (version 0.0.4) by the ``/metrics`` endpoint of
+the web servers. Recording a value is a dict lookup and a few additions
+under a per-metric lock, cheap enough for every API call and pipeline stage.
+
+The application's standard metrics are defined at the bottom of this module
+and instrumented at the ``OpenAIClient`` and ``VoiceLLM`` method boundaries.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, covering sub-10ms cache hits to minute-long uploads
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        """Returns the exposition lines for this metric (HELP, TYPE and samples)."""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Adds ``amount`` (must be >= 0) to the counter for ``labels``."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Returns the current count for ``labels``."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Records one observation for ``labels``."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Context manager observing the wall-clock duration of its body."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> tuple[int, float]:
+        """Returns (count, sum) for ``labels``."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return (entry[2], entry[1]) if entry else (0, 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """
+    A gauge whose values are read from a callback at scrape time, for state
+    that is already tracked elsewhere (e.g. queue depths).
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        callback: Callable[[], Iterable[tuple[dict, float]]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> list[str]:
+        try:
+            values = list(self.callback())
+        except Exception as e:
+            logger.error(f"Metrics callback for {self.name} failed: {e}")
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, self._key(labels))} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class MetricsRegistry:
+    """Holds metrics by name and renders them all for a scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Returns the counter ``name``, creating it on first use."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Returns the histogram ``name``, creating it on first use."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        callback: Callable[[], Iterable[tuple[dict, float]]],
+    ) -> CallbackGauge:
+        """Registers a gauge read from ``callback`` at scrape time."""
+        return self._register(CallbackGauge(name, documentation, labelnames, callback))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Returns a registered metric by name."""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ── Application metrics ──────────────────────────────────────
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "voice_llm_stage_duration_seconds",
+    "Duration of each pipeline stage (record, transcribe, generate, synthesize, play).",
+    ["stage"],
+)
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "openai_request_duration_seconds",
+    "Duration of OpenAI API calls including retries.",
+    ["endpoint"],
+)
+API_RETRIES = REGISTRY.counter(
+    "openai_retries_total", "OpenAI API call attempts that failed and were retried.", ["endpoint"]
+)
+API_COALESCED = REGISTRY.counter(
+    "openai_coalesced_requests_total",
+    "OpenAI calls served by an identical call already in flight instead of a new request.",
+    ["endpoint"],
+)
+API_ERRORS = REGISTRY.counter(
+    "openai_errors_total", "OpenAI API calls that failed after all retries.", ["endpoint"]
+)
+BYTES_SENT = REGISTRY.counter(
+    "openai_bytes_sent_total", "Payload bytes uploaded to the OpenAI API.", ["endpoint"]
+)
+BYTES_RECEIVED = REGISTRY.counter(
+    "openai_bytes_received_total", "Payload bytes downloaded from the OpenAI API.", ["endpoint"]
+)
+TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens consumed, by direction (in = prompt, out = completion).",
+    ["model", "direction"],
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "voice_llm_cache_requests_total", "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Counts one cache lookup."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
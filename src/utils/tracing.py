@@ -0,0 +1,547 @@
+"""
+Lightweight per-turn tracing.
+
+Every HTTP request (or CLI turn) gets a trace ID; the pipeline stages, OpenAI
+calls and their retry attempts inside it are recorded as nested spans. The
+current span lives in a ``contextvars.ContextVar``, so nesting follows the
+call stack across ``await`` and ``asyncio.to_thread`` without passing span
+objects around.
+
+A trace ID arriving in a W3C ``traceparent`` (or ``X-Trace-Id``) request
+header is reused, so a turn can be followed from the browser or a proxy.
+
+When ``TRACING_ENABLED`` is set, finished spans are appended to a rotating
+JSONL file per process (``TRACE_FILE`` with the process ID added, e.g.
+``spans.1234.jsonl``) and, if ``TRACE_OTLP_ENDPOINT`` is set, also sent to
+an OpenTelemetry collector over OTLP/HTTP. Both exporters write from a
+background thread. Render a trace with::
+
+    python -m src.utils.tracing <trace_id>
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import contextlib
+import contextvars
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def new_trace_id() -> str:
+    """Returns a random 128-bit trace ID (32 hex digits)."""
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    """Returns a random 64-bit span ID (16 hex digits)."""
+    return secrets.token_hex(8)
+
+
+def parse_trace_headers(headers) -> tuple[Optional[str], Optional[str]]:
+    """
+    Extracts the incoming trace context from request headers.
+
+    Args:
+        headers: A case-insensitive mapping of request headers.
+
+    Returns:
+        ``(trace_id, parent_span_id)`` from ``traceparent``, or
+        ``(trace_id, None)`` from ``X-Trace-Id``, or ``(None, None)``.
+    """
+    match = _TRACEPARENT.match((headers.get("traceparent") or "").strip().lower())
+    if match:
+        return match.group(1), match.group(2)
+    trace_id = (headers.get("x-trace-id") or "").strip().lower()
+    if _TRACE_ID.match(trace_id):
+        return trace_id, None
+    return None, None
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=new_span_id)
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    events: list[dict[str, Any]] = field(default_factory=list)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        """Records a point-in-time event (e.g. a retry) on the span."""
+        self.events.append({"name": name, "time": time.time(), "attributes": attributes})
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Finishes the span (once) and hands it to the exporters."""
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+        _export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time if self.end_time is not None else time.time()
+        return (end - self.start_time) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+def current_span() -> Optional[Span]:
+    """Returns the active span, or None outside any trace."""
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    attributes: Optional[dict[str, Any]] = None,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+) -> Span:
+    """
+    Starts a span without making it current; call :meth:`Span.end` when done.
+
+    Useful where a context manager can't be held, e.g. across ``yield`` in an
+    async generator. By default the span is a child of the current span, or
+    the root of a new trace.
+    """
+    parent = _current_span.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent is not None else new_trace_id()
+        parent_id = parent.span_id if parent is not None else None
+    return Span(name=name, trace_id=trace_id, parent_id=parent_id, attributes=dict(attributes or {}))
+
+
+@contextlib.contextmanager
+def span(
+    name: str,
+    attributes: Optional[dict[str, Any]] = None,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+) -> Iterator[Span]:
+    """
+    Context manager recording its body as a span and making it current.
+
+    Exceptions mark the span as failed and propagate unchanged.
+    """
+    current = start_span(name, attributes, trace_id, parent_id)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Finished from another context (e.g. an async generator closed late)
+            pass
+        current.end()
+
+
+def add_event(name: str, **attributes: Any) -> None:
+    """Adds an event to the current span, if there is one."""
+    current = _current_span.get()
+    if current is not None:
+        current.add_event(name, **attributes)
+
+
+# ── Exporters ─────────────────────────────────────────────────
+
+
+def _process_path(path: str) -> str:
+    """Adds the process ID to a file name: ``spans.jsonl`` -> ``spans.1234.jsonl``."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans, one JSON object per line, to a file that is
+    rotated (``spans.jsonl`` -> ``spans.jsonl.1`` ...) once it reaches
+    ``max_bytes``.
+
+    Spans are serialized and written on a background thread so exporting
+    never blocks a request (or the event loop) on disk I/O; if the disk
+    falls behind, new spans are dropped. The exporter must be the only
+    writer of its file: rotation is not coordinated across processes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 3,
+        max_batch: int = 256,
+        max_queue: int = 4096,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, name="jsonl-span-exporter", daemon=True)
+        self._thread.start()
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, spans: list[Span]) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        chunk: list[str] = []
+        try:
+            for s in spans:
+                line = json.dumps(s.to_dict(), default=str) + "\n"
+                if self.max_bytes > 0 and size > 0 and size + len(line) > self.max_bytes:
+                    self._append(chunk)
+                    self._rotate()
+                    chunk, size = [], 0
+                chunk.append(line)
+                size += len(line)
+            self._append(chunk)
+        except Exception as e:
+            logger.warning(f"Writing {len(spans)} span(s) to {self.path} failed: {e}")
+
+    def _append(self, lines: list[str]) -> None:
+        if lines:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def _drain(self, batch: list[Span]) -> list[Span]:
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            self._write(self._drain([first]))
+
+    def shutdown(self) -> None:
+        """Stops the writer thread once the spans still queued are written."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OtlpSpanExporter:
+    """
+    Sends spans to an OpenTelemetry collector using OTLP/HTTP with JSON
+    encoding (e.g. ``http://localhost:4318/v1/traces``).
+
+    Spans are batched on a background thread so exporting never blocks a
+    request; if the collector falls behind, new spans are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "voice-llm",
+        max_batch: int = 256,
+        flush_interval_s: float = 2.0,
+        max_queue: int = 4096,
+    ) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "src.utils.tracing"},
+                    "spans": [
+                        {
+                            "traceId": s.trace_id,
+                            "spanId": s.span_id,
+                            "parentSpanId": s.parent_id or "",
+                            "name": s.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(int(s.start_time * 1e9)),
+                            "endTimeUnixNano": str(int((s.end_time or s.start_time) * 1e9)),
+                            "attributes": _otlp_attributes(s.attributes),
+                            "events": [
+                                {
+                                    "name": e["name"],
+                                    "timeUnixNano": str(int(e["time"] * 1e9)),
+                                    "attributes": _otlp_attributes(e["attributes"]),
+                                }
+                                for e in s.events
+                            ],
+                            "status": {"code": 2 if s.status == "error" else 1},
+                        }
+                        for s in spans
+                    ],
+                }],
+            }]
+        }
+
+    def _send(self, spans: list[Span]) -> None:
+        import httpx
+
+        try:
+            httpx.post(self.endpoint, json=self._payload(spans), timeout=5.0)
+        except Exception as e:
+            logger.warning(f"OTLP export of {len(spans)} span(s) failed: {e}")
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            batch: list[Span] = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                self._send(batch)
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval_s + 1)
+        remaining = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        if remaining:
+            self._send(remaining)
+
+
+_exporters: Optional[list] = None
+_exporters_lock = threading.Lock()
+
+
+def _get_exporters() -> list:
+    global _exporters
+    if _exporters is None:
+        with _exporters_lock:
+            if _exporters is None:
+                exporters: list = []
+                if config.TRACING_ENABLED:
+                    # One file per process, so web workers don't rotate each other's files
+                    exporters.append(JsonlSpanExporter(
+                        _process_path(config.TRACE_FILE), config.TRACE_MAX_BYTES, config.TRACE_BACKUP_COUNT
+                    ))
+                    if config.TRACE_OTLP_ENDPOINT:
+                        exporters.append(OtlpSpanExporter(config.TRACE_OTLP_ENDPOINT))
+                _exporters = exporters
+    return _exporters
+
+
+def set_exporters(exporters: Optional[list]) -> None:
+    """Replaces the span exporters; ``None`` re-reads them from config on next use."""
+    global _exporters
+    with _exporters_lock:
+        previous, _exporters = _exporters, exporters
+    for exporter in previous or []:
+        if exporter not in (exporters or []):
+            exporter.shutdown()
+
+
+# Write out spans still queued in the exporters' background threads
+atexit.register(set_exporters, [])
+
+
+def _export(span: Span) -> None:
+    for exporter in _get_exporters():
+        try:
+            exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Span export failed: {e}")
+
+
+# ── Waterfall CLI ─────────────────────────────────────────────
+
+
+def load_spans(path: str) -> list[dict[str, Any]]:
+    """
+    Reads spans from a JSONL trace file, the per-process files written for
+    it (see :func:`_process_path`) and their rotated backups.
+    """
+    root, ext = os.path.splitext(path)
+    file_paths = set(glob.glob(f"{glob.escape(path)}*"))
+    file_paths.update(glob.glob(f"{glob.escape(root)}.[0-9]*{glob.escape(ext)}*"))
+    spans = []
+    for file_path in sorted(file_paths):
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Partially written line
+    return spans
+
+
+def render_waterfall(spans: list[dict[str, Any]], width: int = 40) -> str:
+    """
+    Renders one trace's spans as an indented waterfall, e.g.::
+
+        POST /api/transcribe     |████████████████████| 2310.4 ms
+          voice_llm.transcribe   |██████              |  701.2 ms
+
+    Args:
+        spans: Span dicts (as written by :class:`JsonlSpanExporter`) of one trace.
+        width: Width of the timeline bar in characters.
+    """
+    if not spans:
+        return "No spans found."
+    start = min(s["start_time"] for s in spans)
+    end = max(s["end_time"] or s["start_time"] for s in spans)
+    total = max(end - start, 1e-9)
+    ids = {s["span_id"] for s in spans}
+    children: dict[Optional[str], list] = {}
+    for s in sorted(spans, key=lambda s: s["start_time"]):
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    rows: list[tuple[str, dict]] = []
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for s in children.get(parent, []):
+            rows.append(("  " * depth + s["name"], s))
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    label_width = max(len(label) for label, _ in rows)
+    lines = [f"trace {spans[0]['trace_id']}  ({total * 1000:.1f} ms, {len(spans)} spans)"]
+    for label, s in rows:
+        offset = int((s["start_time"] - start) / total * width)
+        length = max(1, round(((s["end_time"] or s["start_time"]) - s["start_time"]) / total * width))
+        bar = (" " * offset + "█" * length)[:width].ljust(width)
+        flag = "  !" if s["status"] == "error" else ""
+        retries = sum(1 for e in s.get("events", []) if e["name"] == "retry")
+        note = f"  ({retries} retr{'y' if retries == 1 else 'ies'})" if retries else ""
+        lines.append(f"{label.ljust(label_width)}  |{bar}| {s['duration_ms']:9.1f} ms{flag}{note}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Prints a trace's waterfall, or lists recent traces when no ID is given."""
+    parser = argparse.ArgumentParser(description="Render a trace from the JSONL span file as a waterfall.")
+    parser.add_argument("trace_id", nargs="?", help="Trace ID (or a unique prefix). Omit to list recent traces.")
+    parser.add_argument("--file", default=config.TRACE_FILE, help="Span file (default: TRACE_FILE).")
+    parser.add_argument("--limit", type=int, default=20, help="Number of recent traces to list.")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.file)
+    if args.trace_id:
+        matching = [s for s in spans if s["trace_id"].startswith(args.trace_id.lower())]
+        trace_ids = {s["trace_id"] for s in matching}
+        if len(trace_ids) > 1:
+            print(f"Trace ID prefix '{args.trace_id}' is ambiguous ({len(trace_ids)} traces).")
+            return
+        print(render_waterfall(matching))
+        return
+
+    roots: dict[str, dict] = {}
+    for s in spans:
+        if s["trace_id"] not in roots or s["start_time"] < roots[s["trace_id"]]["start_time"]:
+            roots[s["trace_id"]] = s
+    for s in sorted(roots.values(), key=lambda s: s["start_time"])[-args.limit:]:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s["start_time"]))
+        print(f"{s['trace_id']}  {started}  {s['duration_ms']:9.1f} ms  {s['status']:5}  {s['name']}")
+
+
+if __name__ == "__main__":
+    main()
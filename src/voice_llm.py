@@ -7,16 +7,220 @@ Maintains conversation state and handles configuration.
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import contextvars
+import importlib
+import logging
 import os
+import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable
 
+from src.api.breaker import guarded
 from src.utils.config import config
-from src.utils.exceptions import TranscriptionError, SynthesisError, ChatCompletionError
-from src.api.openai_client import OpenAIClient
-from src.llm.chains import get_conversation_chain
-from src.llm.memory import save_conversation
-from src.audio.recorder import AudioRecorder
-from src.audio.player import AudioPlayer
+from src.utils.deadline import check as check_deadline, deadline, expired as deadline_expired, has_time_for
+from src.utils.exceptions import (
+    TranscriptionError, SynthesisError, ChatCompletionError, VoiceLLMError,
+    ChatUnavailableError, SynthesisUnavailableError, DeadlineExceededError,
+)
+from src.llm.models import DEFAULT_PROFILE_KEY
+from src.llm.router import ModelRouter
+from src.llm.speculative import Speculation, SpeculativeGenerator
+from src.audio.storage import OUTPUT_DIR, TEMP_DIR, store_audio, temp_audio_path
+from src.utils.metrics import STAGE_SECONDS, record_cache
+from src.utils.tracing import span, start_span
+
+logger = logging.getLogger(__name__)
+
+# Heavy dependencies (the OpenAI SDK, LangChain, sounddevice/PortAudio, pydub)
+# are imported on first use, so importing this module (e.g. from the web
+# servers) stays cheap and a headless worker never loads audio devices. They
+# are still attributes of this module, so ``unittest.mock.patch`` works.
+_LAZY_IMPORTS: dict[str, str] = {
+    "OpenAIClient": "src.api.openai_client",
+    "get_chain_pool": "src.llm.chains",
+    "get_conversation_chain": "src.llm.chains",
+    "get_conversation_memory": "src.llm.memory",
+    "get_prompt": "src.llm.prompts",
+    "save_conversation": "src.llm.memory",
+    "AudioRecorder": "src.audio.recorder",
+    "AudioPlayer": "src.audio.player",
+    "AudioProcessor": "src.audio.processor",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def _lazy(name: str):
+    """Returns a lazily imported dependency (or whatever was patched over it)."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) and whitespace
+_SENTENCE_END = re.compile(r"[.!?…][\"')\]]*\s+")
+
+
+def split_speakable(buffer: str, min_chars: int) -> tuple[str, str]:
+    """
+    Splits streamed text into a prefix of complete sentences ready for speech
+    synthesis and the remainder still being generated.
+
+    Args:
+        buffer: Text generated so far that hasn't been synthesized yet.
+        min_chars: Minimum length of the ready prefix; shorter runs of
+            sentences are held back so each audio chunk is worth a request.
+
+    Returns:
+        A tuple of (ready text, remainder). Ready text is empty if no
+        complete sentences of at least ``min_chars`` are available.
+    """
+    end = 0
+    for match in _SENTENCE_END.finditer(buffer):
+        end = match.end()
+    if end == 0 or len(buffer[:end].strip()) < min_chars:
+        return "", buffer
+    return buffer[:end].strip(), buffer[end:]
+
+
+class _SentenceSpeaker:
+    """
+    Per-sentence speech synthesis for a streamed turn. Streamed text is
+    buffered until a run of complete sentences is ready (see
+    ``split_speakable``); each run is synthesized concurrently, and the
+    audio events are handed back in order.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], Awaitable[str | None]],
+        min_chars: int,
+        min_budget: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            synthesize: Coroutine function turning text into an audio file path.
+            min_chars: Minimum length of a synthesized run of sentences.
+            min_budget: Seconds the turn must have left for a run to be
+                synthesized; later runs are text only.
+        """
+        self._synthesize = synthesize
+        self._min_chars = min_chars
+        self._min_budget = min_budget
+        self._pending = ""
+        self._tasks: list[asyncio.Task] = []
+        self._next = 0
+
+    def feed(self, text: str) -> None:
+        """Buffers streamed text, starting synthesis of any complete sentences."""
+        ready, self._pending = split_speakable(self._pending + text, self._min_chars)
+        if ready:
+            self._start(ready)
+
+    def flush(self) -> None:
+        """Starts synthesis of whatever text is left once the stream ends."""
+        if self._pending.strip():
+            self._start(self._pending.strip())
+        self._pending = ""
+
+    def has_ready(self) -> bool:
+        """Returns True if the next audio chunk has finished synthesizing."""
+        return self.has_pending() and self._tasks[self._next].done()
+
+    def has_pending(self) -> bool:
+        """Returns True if some audio chunk hasn't been handed back yet."""
+        return self._next < len(self._tasks)
+
+    async def next_event(self) -> dict:
+        """Waits for the next audio chunk; ``"path"`` is None if it failed to synthesize."""
+        index = self._next
+        try:
+            path = await self._tasks[index]
+        except SynthesisError:
+            logger.warning("Speech synthesis failed for chunk %d; continuing without it.", index)
+            path = None
+        self._next += 1
+        return {"type": "audio", "index": index, "path": path}
+
+    def cancel(self) -> None:
+        """Cancels synthesis of the chunks not handed back yet."""
+        for task in self._tasks[self._next:]:
+            task.cancel()
+
+    def _start(self, text: str) -> None:
+        if not has_time_for(self._min_budget):
+            logger.warning("Turn deadline too close; streaming the rest as text only.")
+            return
+        self._tasks.append(asyncio.create_task(self._synthesize(text)))
+
+
+# Set once the audio directories exist, so per-session instances skip the syscalls
+_directories_ready = False
+
+
+def _ensure_directories() -> None:
+    """Creates the audio input/output directories once per process."""
+    global _directories_ready
+    if _directories_ready:
+        return
+    os.makedirs("data/audio/input", exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    _directories_ready = True
+
+
+# Shares the chat circuit breaker with OpenAIClient (src.api.openai_client.CHAT)
+_CHAT_ENDPOINT = "chat"
+# Answer given without calling the LLM while the chat circuit is open
+UNAVAILABLE_RESPONSE = "I can't reach the language model right now. Please try again in a moment."
+
+# Recently synthesized audio by text, replayed while the TTS circuit is open
+_RECENT_SPEECH_ITEMS = 256
+_recent_speech: OrderedDict[str, str] = OrderedDict()
+_recent_speech_lock = threading.Lock()
+
+
+def _remember_speech(text: str, path: str) -> None:
+    with _recent_speech_lock:
+        _recent_speech[text] = path
+        _recent_speech.move_to_end(text)
+        while len(_recent_speech) > _RECENT_SPEECH_ITEMS:
+            _recent_speech.popitem(last=False)
+
+
+def _recent_speech_for(text: str) -> str | None:
+    """Returns earlier audio of ``text`` if it is still on disk, else None."""
+    with _recent_speech_lock:
+        path = _recent_speech.get(text)
+    return path if path and os.path.exists(path) else None
+
+
+@contextlib.contextmanager
+def _deadline_errors(stage: str):
+    """Reports a stage that failed because the turn ran out of time as ``DeadlineExceededError``."""
+    try:
+        yield
+    except VoiceLLMError as e:
+        if isinstance(e, DeadlineExceededError) or not deadline_expired():
+            raise
+        raise DeadlineExceededError(f"Turn deadline exceeded during {stage}") from e
+
+
+@contextlib.contextmanager
+def _stage(stage: str, **attributes):
+    """Times a pipeline stage into the stage histogram and records it as a trace span."""
+    with span(f"voice_llm.{stage}", attributes), STAGE_SECONDS.time(stage=stage):
+        yield
 
 
 class VoiceLLM:
@@ -25,25 +229,104 @@ class VoiceLLM:
 
     Uses ``get_conversation_chain()`` from ``src.llm.chains`` to avoid
     duplicating LLM / memory / prompt initialisation logic.
+
+    A headless instance (``VoiceLLM(headless=True)``) has only the API and
+    LLM stages: it never records or plays audio, so it doesn't need
+    sounddevice/PortAudio and is cheap enough to create per session. The
+    web servers and the Streamlit app use headless instances.
     """
 
-    def __init__(self) -> None:
-        print("Initializing VoiceLLM...")
+    def __init__(self, headless: bool = False, openai_client=None) -> None:
+        """
+        Args:
+            headless: If True, the microphone and speaker components are
+                unavailable (no audio libraries are loaded).
+            openai_client: An ``OpenAIClient`` to use instead of creating
+                one, e.g. a client shared by every session of a server.
+        """
+        self.headless = headless
+        # Headless instances are created per session, so keep them quiet
+        log_level = logging.DEBUG if headless else logging.INFO
+        logger.log(log_level, "Initializing VoiceLLM%s...", " (headless)" if headless else "")
         self.config = config
-        self.openai_client = OpenAIClient()
+        self.openai_client = openai_client if openai_client is not None else _lazy("OpenAIClient")()
+
+        # Use the shared factory instead of re-creating LLM/memory/prompt here.
+        # The LLM client comes from the process-wide chain pool and the memory
+        # is owned here, so persona/model chains share one client and history.
+        self.chain_pool = _lazy("get_chain_pool")()
+        self.memory = _lazy("get_conversation_memory")()
+        self.persona: str = "default"
+        self.conversation_chain = _lazy("get_conversation_chain")(
+            llm=self.chain_pool.get_llm(DEFAULT_PROFILE_KEY),
+            memory=self.memory,
+            verbose=self.config.DEBUG,
+        )
+        # (persona, profile key) -> (prompt template, chain), so switching back
+        # and forth is a dict lookup. A hot-reloaded prompt is a new template
+        # object, which rebuilds the chain on its next use.
+        self._chains: dict = {
+            (self.persona, DEFAULT_PROFILE_KEY): (_lazy("get_prompt")(self.persona), self.conversation_chain),
+        }
+
+        # Optional per-turn model routing (fast vs heavy profiles)
+        self.router: ModelRouter | None = (
+            ModelRouter.from_config() if self.config.MODEL_ROUTING else None
+        )
 
-        # Use the shared factory instead of re-creating LLM/memory/prompt here
-        self.conversation_chain = get_conversation_chain(verbose=self.config.DEBUG)
+        # Optional speculative generation on partial transcripts
+        self.speculator: SpeculativeGenerator | None = None
+        if self.config.SPECULATIVE_GENERATION:
+            self.speculator = SpeculativeGenerator(self._generate_provisional)
+            self._audio_processor = _lazy("AudioProcessor")()
+            self._stt_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stt")
 
-        # Audio components (for CLI usage primarily)
-        self.audio_recorder = AudioRecorder()
-        self.audio_player = AudioPlayer()
+        # Audio components (for CLI usage primarily), created on first use
+        self._audio_recorder = None
+        self._audio_player = None
 
         # Setup directories for audio files
-        os.makedirs("data/audio/input", exist_ok=True)
-        os.makedirs("data/audio/output", exist_ok=True)
+        _ensure_directories()
 
-        print("VoiceLLM initialization complete.")
+        logger.log(log_level, "VoiceLLM initialization complete.")
+
+    def _require_audio_devices(self) -> None:
+        if self.headless:
+            raise VoiceLLMError("Audio devices are not available in a headless VoiceLLM.")
+
+    @property
+    def audio_recorder(self):
+        """
+        Microphone recorder, created on first use so servers never open audio devices.
+
+        Raises:
+            VoiceLLMError: If the instance is headless.
+        """
+        if self._audio_recorder is None:
+            self._require_audio_devices()
+            self._audio_recorder = _lazy("AudioRecorder")()
+        return self._audio_recorder
+
+    @audio_recorder.setter
+    def audio_recorder(self, recorder) -> None:
+        self._audio_recorder = recorder
+
+    @property
+    def audio_player(self):
+        """
+        Speaker output, created on first use so servers never open audio devices.
+
+        Raises:
+            VoiceLLMError: If the instance is headless.
+        """
+        if self._audio_player is None:
+            self._require_audio_devices()
+            self._audio_player = _lazy("AudioPlayer")()
+        return self._audio_player
+
+    @audio_player.setter
+    def audio_player(self, player) -> None:
+        self._audio_player = player
 
     # ── Internal pipeline steps ───────────────────────────────
 
@@ -59,28 +342,105 @@ class VoiceLLM:
 
         Raises:
             TranscriptionError: If transcription fails.
+            DeadlineExceededError: If the turn runs out of time.
         """
-        print(f"--> Transcribing speech from: {audio_file_path}")
-        return self.openai_client.transcribe_audio(audio_file_path)
+        logger.debug("Transcribing speech from: %s", audio_file_path)
+        with _stage("transcribe"), _deadline_errors("transcription"):
+            return self.openai_client.transcribe_audio(audio_file_path)
 
-    def _generate_response(self, user_input: str) -> str:
+    def _generate_response(self, user_input: str, decision=None) -> str:
         """
         Generates an LLM response using LangChain.
 
         Args:
             user_input: The transcribed text from the user.
+            decision: A routing decision already made for this turn, if any.
 
         Returns:
             The generated text response from the LLM.
+
+        Raises:
+            DeadlineExceededError: If the turn is out of time.
         """
-        print(f"--> Generating LLM response for input: '{user_input[:50]}...'")
+        logger.debug("Generating LLM response for input: '%.50s...'", user_input)
+        check_deadline("generate")
+        chain, decision = self._select_chain(user_input, decision)
         try:
-            response: str = self.conversation_chain.predict(input=user_input)
+            start = time.perf_counter()
+            with guarded(_CHAT_ENDPOINT, ChatUnavailableError), _stage("generate"):
+                response: str = chain.predict(input=user_input)
+            if decision is not None:
+                self.router.record_latency(decision.profile.key, time.perf_counter() - start)
             return response
+        except ChatUnavailableError:
+            logger.warning("Chat circuit open; answering without the LLM.")
+            return UNAVAILABLE_RESPONSE
         except Exception as e:
-            print(f"Error generating LLM response: {e}")
+            if deadline_expired():
+                raise DeadlineExceededError("Turn deadline exceeded during generation") from e
+            logger.error("Error generating LLM response: %s", e)
             return "I apologize, but I encountered an error trying to generate a response."
 
+    def _route(self, user_input: str):
+        """Returns the routing decision for a turn, or None if routing is off."""
+        if self.router is None:
+            return None
+        decision = self.router.route(user_input)
+        logger.debug("Routed to %s (%s)", decision.profile.name, decision.reason)
+        return decision
+
+    def _select_chain(self, user_input: str, decision=None):
+        """
+        Returns the chain for this turn and the routing decision (None if
+        unrouted). A ``decision`` already made for the turn is reused.
+        """
+        if self.router is None:
+            self.conversation_chain = self._get_chain(self.persona, DEFAULT_PROFILE_KEY)
+            return self.conversation_chain, None
+        if decision is None:
+            decision = self._route(user_input)
+        return self._get_chain(self.persona, decision.profile.key), decision
+
+    def _generate_provisional(self, user_input: str, decision=None) -> str:
+        """
+        Generates a response like ``_generate_response`` but without saving the
+        turn to memory, so a discarded speculation leaves no trace.
+
+        Raises:
+            ChatUnavailableError: While the chat circuit is open (the caller
+                then generates normally, which degrades the answer).
+        """
+        chain, decision = self._select_chain(user_input, decision)
+        history = self.memory.load_memory_variables({})["chat_history"]
+        messages = chain.prompt.format_messages(input=user_input, chat_history=history)
+        start = time.perf_counter()
+        with guarded(_CHAT_ENDPOINT, ChatUnavailableError), _stage("generate", provisional=True):
+            result = chain.llm.invoke(messages)
+        if decision is not None:
+            self.router.record_latency(decision.profile.key, time.perf_counter() - start)
+        return getattr(result, "content", result)
+
+    def _get_chain(self, persona: str, profile_key: str):
+        """
+        Returns the chain for a (persona, model profile) pair, assembling it
+        from the shared chain pool on first use and again whenever the
+        persona's prompt file has been reloaded. All chains share
+        ``self.memory``, so switching persona or model keeps the history.
+        """
+        key = (persona, profile_key)
+        prompt = _lazy("get_prompt")(persona)
+        entry = self._chains.get(key)
+        hit = entry is not None and entry[0] is prompt
+        record_cache("chain", hit)
+        if hit:
+            return entry[1]
+        chain = self.chain_pool.get_chain(
+            self.memory, persona=persona, profile_key=profile_key,
+            verbose=self.config.DEBUG,
+        )
+        self._chains[key] = (prompt, chain)
+        return chain
+
     def _synthesize_speech(self, text: str) -> str:
         """
         Converts text to speech and saves it to a file.
@@ -89,21 +449,70 @@ class VoiceLLM:
             text: The text to synthesize.
 
         Returns:
-            Path to the generated audio file.
+            Path to the generated audio file (content-addressed, see
+            ``src.audio.storage``). While the TTS circuit breaker is open,
+            earlier audio of the same text or None. None if the turn
+            deadline leaves too little time.
         """
-        output_file_path: str = os.path.join(
-            "data/audio/output", f"response_{int(time.time())}.mp3"
-        )
-        print(f"--> Synthesizing speech for: '{text[:50]}...' to {output_file_path}")
-        return self.openai_client.synthesize_speech(text, output_file_path)
+        if not has_time_for(self.config.TURN_TTS_MIN_BUDGET):
+            return self._skip_speech()
+        output_file_path = temp_audio_path()
+        logger.debug("Synthesizing speech for: '%.50s...' to %s", text, output_file_path)
+        try:
+            with _stage("synthesize", chars=len(text)):
+                path = store_audio(self.openai_client.synthesize_speech(text, output_file_path))
+        except SynthesisUnavailableError:
+            return self._degraded_speech(text)
+        except (SynthesisError, DeadlineExceededError):
+            if not deadline_expired():
+                raise
+            return self._skip_speech()
+        _remember_speech(text, path)
+        return path
+
+    async def _asynthesize_speech(self, text: str) -> str:
+        """Async version of ``_synthesize_speech``."""
+        if not has_time_for(self.config.TURN_TTS_MIN_BUDGET):
+            return self._skip_speech()
+        try:
+            with _stage("synthesize", chars=len(text)):
+                output_file_path = await self.openai_client.asynthesize_speech(text, temp_audio_path())
+                path = await asyncio.to_thread(store_audio, output_file_path)
+        except SynthesisUnavailableError:
+            return self._degraded_speech(text)
+        except (SynthesisError, DeadlineExceededError):
+            if not deadline_expired():
+                raise
+            return self._skip_speech()
+        _remember_speech(text, path)
+        return path
+
+    @staticmethod
+    def _skip_speech() -> None:
+        """Speech synthesis is optional: a turn short of time answers with text only."""
+        logger.warning("Turn deadline too close; answering with text only.")
+        return None
+
+    @staticmethod
+    def _degraded_speech(text: str) -> str | None:
+        """Audio for ``text`` while the TTS circuit is open: earlier audio of the same text, or None (text only)."""
+        path = _recent_speech_for(text)
+        logger.warning("TTS circuit open; %s.", "reusing earlier audio" if path else "answering with text only")
+        return path
+
+    async def _atranscribe_speech(self, audio_file_path: str) -> str:
+        """Async version of ``_transcribe_speech``."""
+        with _stage("transcribe"), _deadline_errors("transcription"):
+            return await self.openai_client.atranscribe_audio(audio_file_path)
 
     def _play_audio_response(self, audio_file_path: str) -> None:
         """Plays the synthesized audio response."""
         if audio_file_path and os.path.exists(audio_file_path):
-            print(f"--> Playing audio response from: {audio_file_path}")
-            self.audio_player.play_audio_file(audio_file_path)
+            logger.debug("Playing audio response from: %s", audio_file_path)
+            with _stage("play"):
+                self.audio_player.play_audio_file(audio_file_path)
         else:
-            print("--> No audio file to play or file not found.")
+            logger.warning("No audio file to play or file not found.")
 
     # ── Public interface ──────────────────────────────────────
 
@@ -113,41 +522,48 @@ class VoiceLLM:
 
         Args:
             duration: Duration in seconds for each audio recording.
+
+        Raises:
+            VoiceLLMError: If the instance is headless.
         """
+        self._require_audio_devices()
         print("\n--- Starting Voice Conversation (CLI Mode) ---")
         print("Press Ctrl+C to exit.")
         while True:
             try:
-                recorded_file_path = self.audio_recorder.start_recording(duration=duration)
-                if not recorded_file_path:
-                    print("Recording failed or interrupted. Retrying...")
-                    continue
-
-                # Speech-to-Text
-                try:
-                    user_input = self._transcribe_speech(recorded_file_path)
-                except TranscriptionError:
-                    print("Transcription failed. Please try again.")
-                    continue
-
-                print(f"You: {user_input}")
-
-                # LLM Response
-                ai_response_text = self._generate_response(user_input)
-                print(f"AI: {ai_response_text}")
-
-                # Text-to-Speech
-                try:
-                    response_audio_file_path = self._synthesize_speech(ai_response_text)
-                    self._play_audio_response(response_audio_file_path)
-                except SynthesisError:
-                    print("Speech synthesis failed; response is text-only.")
+                # Each CLI turn is its own trace
+                with span("cli.turn"):
+                    with _stage("record"):
+                        recorded_file_path = self.audio_recorder.start_recording(duration=duration)
+                    if not recorded_file_path:
+                        print("Recording failed or interrupted. Retrying...")
+                        continue
+
+                    # Speech-to-Text
+                    try:
+                        user_input = self._transcribe_speech(recorded_file_path)
+                    except TranscriptionError:
+                        print("Transcription failed. Please try again.")
+                        continue
+
+                    print(f"You: {user_input}")
+
+                    # LLM Response
+                    ai_response_text = self._generate_response(user_input)
+                    print(f"AI: {ai_response_text}")
+
+                    # Text-to-Speech
+                    try:
+                        response_audio_file_path = self._synthesize_speech(ai_response_text)
+                        self._play_audio_response(response_audio_file_path)
+                    except SynthesisError:
+                        print("Speech synthesis failed; response is text-only.")
 
             except KeyboardInterrupt:
                 print("\nExiting conversation.")
                 break
             except Exception as e:
-                print(f"An unexpected error occurred in the conversation loop: {e}")
+                logger.exception("An unexpected error occurred in the conversation loop: %s", e)
                 time.sleep(1)
 
     def process_text_input(self, text_input: str) -> tuple[str, str]:
@@ -158,11 +574,17 @@ class VoiceLLM:
             text_input: The user's text input.
 
         Returns:
-            A tuple of (AI response text, path to generated audio file).
+            A tuple of (AI response text, path to generated audio file, or
+            None if speech synthesis is unavailable).
+
+        Raises:
+            DeadlineExceededError: If the turn runs out of time before the
+                response is generated.
         """
-        print(f"Processing text input: '{text_input[:50]}...'")
-        ai_response_text = self._generate_response(text_input)
-        response_audio_file_path = self._synthesize_speech(ai_response_text)
+        logger.debug("Processing text input: '%.50s...'", text_input)
+        with deadline(self.config.TURN_DEADLINE):
+            ai_response_text = self._generate_response(text_input)
+            response_audio_file_path = self._synthesize_speech(ai_response_text)
         return ai_response_text, response_audio_file_path
 
     def process_audio_upload(self, audio_file_path: str) -> tuple[str, str, str]:
@@ -174,27 +596,326 @@ class VoiceLLM:
 
         Returns:
             A tuple of (transcribed user input, AI response text,
-            path to generated audio file).
+            path to generated audio file or None).
+
+        Raises:
+            TranscriptionError: If transcription fails
+                (``TranscriptionUnavailableError`` while its circuit is open).
+            DeadlineExceededError: If the turn runs out of time before the
+                response is generated (see ``src.utils.deadline``).
+        """
+        logger.debug("Processing uploaded audio: %s", audio_file_path)
+        with deadline(self.config.TURN_DEADLINE):
+            if self.speculator is not None:
+                user_input, ai_response_text = self._transcribe_and_generate_speculatively(audio_file_path)
+            else:
+                user_input = self._transcribe_speech(audio_file_path)
+                if not user_input:
+                    user_input = "Could not transcribe uploaded audio."
+                ai_response_text = self._generate_response(user_input)
+
+            response_audio_file_path = self._synthesize_speech(ai_response_text)
+        return user_input, ai_response_text, response_audio_file_path
+
+    def set_persona(self, persona: str) -> None:
+        """
+        Switches the conversation persona (a prompt name from ``config/prompts``).
+
+        The conversation history is kept; call ``self.memory.clear()`` for a
+        fresh start.
+
+        Args:
+            persona: Prompt registry name, e.g. ``"creative"`` or ``"technical"``.
+
+        Raises:
+            KeyError: If no such prompt exists.
+        """
+        self.conversation_chain = self._get_chain(persona, DEFAULT_PROFILE_KEY)
+        self.persona = persona
+        logger.info("Persona switched to '%s'.", persona)
+
+    # ── Async pipeline (ASGI server) ──────────────────────────
+
+    async def _agenerate_response(self, user_input: str) -> str:
+        """Async version of ``_generate_response``."""
+        check_deadline("generate")
+        chain, decision = self._select_chain(user_input)
+        try:
+            start = time.perf_counter()
+            with guarded(_CHAT_ENDPOINT, ChatUnavailableError), _stage("generate"):
+                response: str = await chain.apredict(input=user_input)
+            if decision is not None:
+                self.router.record_latency(decision.profile.key, time.perf_counter() - start)
+            return response
+        except ChatUnavailableError:
+            logger.warning("Chat circuit open; answering without the LLM.")
+            return UNAVAILABLE_RESPONSE
+        except Exception as e:
+            if deadline_expired():
+                raise DeadlineExceededError("Turn deadline exceeded during generation") from e
+            logger.error("Error generating LLM response: %s", e)
+            return "I apologize, but I encountered an error trying to generate a response."
+
+    async def aprocess_text_input(self, text_input: str) -> tuple[str, str]:
+        """
+        Async version of :meth:`process_text_input`; awaits the API calls
+        instead of blocking a thread for the whole turn.
+        """
+        with deadline(self.config.TURN_DEADLINE):
+            ai_response_text = await self._agenerate_response(text_input)
+            response_audio_file_path = await self._asynthesize_speech(ai_response_text)
+        return ai_response_text, response_audio_file_path
+
+    async def aprocess_audio_upload(self, audio_file_path: str) -> tuple[str, str, str]:
+        """
+        Async version of :meth:`process_audio_upload`.
+
+        Speculative generation relies on worker threads, so with speculation
+        enabled the synchronous pipeline runs on a thread instead.
+        """
+        if self.speculator is not None:
+            return await asyncio.to_thread(self.process_audio_upload, audio_file_path)
+
+        with deadline(self.config.TURN_DEADLINE):
+            user_input = await self._atranscribe_speech(audio_file_path)
+            if not user_input:
+                user_input = "Could not transcribe uploaded audio."
+
+            ai_response_text = await self._agenerate_response(user_input)
+            response_audio_file_path = await self._asynthesize_speech(ai_response_text)
+        return user_input, ai_response_text, response_audio_file_path
+
+    async def astream_text_input(self, text_input: str) -> AsyncIterator[dict]:
+        """
+        Streams a turn as it is produced instead of returning it at the end.
+
+        LLM tokens are yielded as they arrive. Each time a run of complete
+        sentences is available it is sent to TTS right away, and the audio
+        chunks are yielded in order as they finish, so playback can start
+        while the rest of the answer is still being generated.
+
+        Args:
+            text_input: The user's text input.
+
+        Yields:
+            Event dicts, in order:
+            ``{"type": "token", "text": ...}`` for each LLM token,
+            ``{"type": "audio", "index": n, "path": ...}`` for each audio chunk
+            (``"path"`` is None if that chunk failed to synthesize), and a final
+            ``{"type": "done", "response": ...}`` with the full response text.
+            Once less than ``TURN_TTS_MIN_BUDGET`` of the turn is left, the
+            rest of the response gets no audio chunks.
+
+        Raises:
+            DeadlineExceededError: If the turn runs out of time before or
+                during generation.
+        """
+        with deadline(self.config.TURN_DEADLINE):
+            check_deadline("generate")
+            chain, decision = self._select_chain(text_input)
+            history = self.memory.load_memory_variables({})["chat_history"]
+            messages = chain.prompt.format_messages(input=text_input, chat_history=history)
+
+            speaker = _SentenceSpeaker(self._asynthesize_speech, self.config.STREAM_TTS_MIN_CHARS,
+                                       self.config.TURN_TTS_MIN_BUDGET)
+            parts: list[str] = []
+            completed: list[bool] = []
+            try:
+                async with contextlib.aclosing(
+                    self._astream_response(chain, messages, decision, completed)
+                ) as tokens:
+                    async for token in tokens:
+                        parts.append(token)
+                        yield {"type": "token", "text": token}
+                        speaker.feed(token)
+                        while speaker.has_ready():
+                            yield await speaker.next_event()
+                speaker.flush()
+                response = "".join(parts)
+                if completed:
+                    # Like the other paths, a fallback answer stays out of the history
+                    self._save_streamed_turn(text_input, response)
+
+                while speaker.has_pending():
+                    yield await speaker.next_event()
+                yield {"type": "done", "response": response}
+            finally:
+                # Client went away mid-turn: don't keep synthesizing audio nobody plays
+                speaker.cancel()
+
+    async def _astream_response(self, chain, messages, decision, completed: list[bool]) -> AsyncIterator[str]:
+        """
+        Yields the LLM's response tokens for a streamed turn, appending True
+        to ``completed`` if the LLM produced the whole response. While the
+        chat circuit is open, ``UNAVAILABLE_RESPONSE`` is the response; if
+        generation fails before the first token, the usual apology is.
+
+        Raises:
+            DeadlineExceededError: If the turn runs out of time.
+        """
+        # Not made current: the span stays open across yields to the caller
+        generate_span = start_span("voice_llm.generate", {"stream": True})
+        error = None
+        produced = False
+        start = time.perf_counter()
+        try:
+            async with contextlib.aclosing(self._astream_tokens(chain, messages)) as tokens:
+                async for token in tokens:
+                    produced = True
+                    yield token
+            latency = time.perf_counter() - start
+            STAGE_SECONDS.observe(latency, stage="generate")
+            if decision is not None:
+                self.router.record_latency(decision.profile.key, latency)
+            completed.append(True)
+        except ChatUnavailableError as e:
+            error = e
+            logger.warning("Chat circuit open; answering without the LLM.")
+            yield UNAVAILABLE_RESPONSE
+        except DeadlineExceededError as e:
+            error = e
+            raise
+        except Exception as e:
+            error = e
+            if deadline_expired():
+                raise DeadlineExceededError("Turn deadline exceeded during generation") from e
+            logger.error("Error generating LLM response: %s", e)
+            if not produced:
+                yield "I apologize, but I encountered an error trying to generate a response."
+        finally:
+            generate_span.end(error=error)
+
+    @staticmethod
+    async def _astream_tokens(chain, messages) -> AsyncIterator[str]:
+        """Yields the LLM's non-empty tokens under the chat circuit breaker and the turn deadline."""
+        with guarded(_CHAT_ENDPOINT, ChatUnavailableError):
+            async for chunk in chain.llm.astream(messages):
+                # Request timeouts bound each read, not the whole stream
+                if deadline_expired():
+                    raise DeadlineExceededError("Turn deadline exceeded during generation")
+                token = getattr(chunk, "content", chunk)
+                if token:
+                    yield token
+
+    def _save_streamed_turn(self, text_input: str, response: str) -> None:
+        """Saves a streamed turn to memory (``chain.predict`` does this for the other paths)."""
+        self.memory.save_context({"input": text_input}, {"output": response})
+
+    async def astream_audio_upload(self, audio_file_path: str) -> AsyncIterator[dict]:
+        """
+        Streaming version of :meth:`aprocess_audio_upload`.
+
+        Yields a ``{"type": "transcript", "text": ...}`` event once the audio
+        is transcribed, then the events of :meth:`astream_text_input`.
+        """
+        with deadline(self.config.TURN_DEADLINE):
+            user_input = await self._atranscribe_speech(audio_file_path)
+            if not user_input:
+                user_input = "Could not transcribe uploaded audio."
+            yield {"type": "transcript", "text": user_input}
+            async with contextlib.aclosing(self.astream_text_input(user_input)) as events:
+                async for event in events:
+                    yield event
+
+    # ── Speculative generation ────────────────────────────────
+
+    def speculate(self, partial_transcript: str) -> Speculation | None:
+        """
+        Starts a provisional response for a partial transcript (e.g. from
+        chunked or streaming transcription). Pass the result to
+        :meth:`finish_turn` once the final transcript is known.
+
+        Returns None when speculative generation is disabled.
         """
-        print(f"Processing uploaded audio: {audio_file_path}")
-        user_input = self._transcribe_speech(audio_file_path)
+        if self.speculator is None or not partial_transcript or not partial_transcript.strip():
+            return None
+        return self.speculator.start(partial_transcript, self._route(partial_transcript))
+
+    def finish_turn(self, final_transcript: str, speculation: Speculation | None = None) -> str:
+        """
+        Completes a turn from its final transcript, keeping the speculative
+        response only if the final transcript adds nothing to the partial
+        one (ignoring case and punctuation), and generating from the final
+        transcript otherwise.
+
+        Args:
+            final_transcript: The final transcript of the user's speech.
+            speculation: The speculation from :meth:`speculate`, if any.
+
+        Returns:
+            The AI response text.
+        """
+        response = self.speculator.resolve(speculation, final_transcript) if self.speculator else None
+        if speculation is not None:
+            record_cache("speculation", response is not None)
+        if response is None:
+            # Route once per turn: a discarded speculation's decision still applies
+            decision = speculation.decision if speculation is not None else None
+            return self._generate_response(final_transcript, decision)
+        logger.debug("Speculative response kept.")
+        self.memory.save_context({"input": final_transcript}, {"output": response})
+        return response
+
+    def _transcribe_and_generate_speculatively(self, audio_file_path: str) -> tuple[str, str]:
+        """
+        Transcribes the full audio in the background while a prefix of it is
+        transcribed and used to start a provisional generation.
+
+        Each turn is therefore transcribed twice (the prefix and the whole
+        audio), and the provisional answer is only kept when the prefix
+        already holds the whole question (e.g. trailing silence); which is
+        why ``SPECULATIVE_GENERATION`` is off by default.
+        """
+        # Run in a copy of this context so the worker's spans join the current trace
+        full_future = self._stt_executor.submit(
+            contextvars.copy_context().run, self._transcribe_speech, audio_file_path
+        )
+
+        speculation = None
+        prefix_path = self._audio_processor.extract_prefix(
+            audio_file_path,
+            f"{os.path.splitext(audio_file_path)[0]}_prefix.wav",
+            self.config.SPECULATIVE_PREFIX_RATIO,
+        )
+        if prefix_path:
+            try:
+                speculation = self.speculate(self._transcribe_speech(prefix_path))
+            except TranscriptionError:
+                logger.warning("Partial transcription failed; continuing without speculation.")
+            finally:
+                try:
+                    os.remove(prefix_path)
+                except OSError:
+                    pass
+
+        user_input = full_future.result()
         if not user_input:
             user_input = "Could not transcribe uploaded audio."
+        return user_input, self.finish_turn(user_input, speculation)
 
-        ai_response_text = self._generate_response(user_input)
-        response_audio_file_path = self._synthesize_speech(ai_response_text)
-        return user_input, ai_response_text, response_audio_file_path
+    def get_speculation_metrics(self) -> dict:
+        """Returns speculation hit-rate and latency-saved metrics, or ``{}`` if disabled."""
+        return self.speculator.metrics() if self.speculator is not None else {}
 
     def save_current_conversation(self) -> str:
         """Persists the current conversation to a JSON file."""
-        return save_conversation(self.conversation_chain.memory)
+        return _lazy("save_conversation")(self.memory)
+
+    def get_routing_metrics(self) -> dict:
+        """Returns model routing decisions and latencies, or ``{}`` if routing is off."""
+        return self.router.metrics() if self.router is not None else {}
 
     def close(self) -> None:
         """Clean up resources before exiting."""
-        print("Closing VoiceLLM resources...")
-        self.audio_recorder.close()
-        self.audio_player.close()
-        print("VoiceLLM resources closed.")
+        logger.info("Closing VoiceLLM resources...")
+        if self.speculator is not None:
+            self.speculator.shutdown()
+            self._stt_executor.shutdown(wait=False)
+        if self._audio_recorder is not None:
+            self._audio_recorder.close()
+        if self._audio_player is not None:
+            self._audio_player.close()
+        logger.info("VoiceLLM resources closed.")
 
 
 if __name__ == "__main__":
@@ -4,12 +4,27 @@ Serves the frontend UI and provides REST API endpoints
 for text chat, audio transcription, and speech synthesis.
 """
 
+import contextlib
+import functools
 import os
 import time
 import logging
-from flask import Flask, render_template, request, jsonify, send_file
-
+from flask import Flask, Response, g, render_template, request, jsonify, send_file
+
+from src.api.transport import prewarm_in_background
+from src.audio.janitor import get_janitor, start_janitor
+from src.jobs import get_job_manager, job_pipeline_factory, transcription_job
+from src.audio.storage import JOB_UPLOAD_DIR, audio_etag, cache_control, resolve_audio
+from src.api.breaker import breaker_metrics
+from src.api.hedging import hedging_stats
+from src.api.scheduler import scheduler_metrics
+from src.utils.admission import admission_metrics, get_admission_controller
 from src.utils.config import config
+from src.utils.deadline import DEADLINE_HEADER, deadline, parse_timeout
+from src.utils.exceptions import AdmissionRejectedError, CircuitOpenError, DeadlineExceededError
+from src.utils.logger import log_context, setup_logging
+from src.utils.metrics import CONTENT_TYPE, REGISTRY, record_cache
+from src.utils.tracing import current_span, parse_trace_headers, span
 from src.voice_llm import VoiceLLM
 
 # ─── Flask App Setup ───
@@ -29,10 +44,81 @@ def get_voice_llm():
     """Lazy initialization of VoiceLLM instance."""
     global voice_llm
     if voice_llm is None:
-        voice_llm = VoiceLLM()
+        voice_llm = VoiceLLM(headless=True)
     return voice_llm
 
 
+def admission_controlled(group):
+    """
+    Runs the view inside a slot of the ``group`` admission controller.
+    Saturated requests get a fast 429/503 JSON error with ``Retry-After``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = get_admission_controller(group)
+            try:
+                queued_s = controller.acquire()
+            except AdmissionRejectedError as e:
+                response = jsonify({'error': 'Server busy, please retry later'})
+                response.status_code = e.status_code
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+
+            root = current_span()
+            if root is not None:
+                root.set_attribute("admission.queued_ms", round(queued_s * 1000, 3))
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ═══════════════════════════════════════════════════
+# Request Tracing
+# ═══════════════════════════════════════════════════
+
+@app.before_request
+def start_request_span():
+    """Opens the request's root span, continuing the caller's trace if it sent one."""
+    trace_id, parent_id = parse_trace_headers(request.headers)
+    route = request.url_rule.rule if request.url_rule else request.path
+    g.trace_stack = contextlib.ExitStack()
+    g.trace_span = g.trace_stack.enter_context(span(
+        f"{request.method} {route}",
+        {"http.method": request.method, "http.path": request.path},
+        trace_id=trace_id,
+        parent_id=parent_id,
+    ))
+    g.trace_stack.enter_context(log_context(method=request.method, path=request.path))
+
+
+@app.after_request
+def tag_request_span(response):
+    """Returns the trace ID to the client and records the status on the span."""
+    root = g.get('trace_span')
+    if root is not None:
+        root.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            root.status = "error"
+        response.headers['X-Trace-Id'] = root.trace_id
+    return response
+
+
+@app.teardown_request
+def end_request_span(exc):
+    """Closes the request's root span."""
+    stack = g.pop('trace_stack', None)
+    if stack is not None:
+        if exc is not None:
+            stack.__exit__(type(exc), exc, exc.__traceback__)
+        else:
+            stack.close()
+
+
 # ═══════════════════════════════════════════════════
 # Page Routes
 # ═══════════════════════════════════════════════════
@@ -53,6 +139,7 @@ def index():
 # ═══════════════════════════════════════════════════
 
 @app.route('/api/chat', methods=['POST'])
+@admission_controlled('chat')
 def api_chat():
     """
     Process a text message and return an AI response with optional audio.
@@ -73,7 +160,8 @@ def api_chat():
 
     try:
         llm = get_voice_llm()
-        ai_response, audio_path = llm.process_text_input(user_text)
+        with deadline(parse_timeout(request.headers.get(DEADLINE_HEADER))):
+            ai_response, audio_path = llm.process_text_input(user_text)
 
         audio_url = None
         if audio_path and os.path.exists(audio_path):
@@ -85,12 +173,16 @@ def api_chat():
             'audio_url': audio_url,
         })
 
+    except DeadlineExceededError:
+        return jsonify({'error': 'Request timed out'}), 504
+
     except Exception as e:
         logger.error(f"Chat processing error: {e}")
         return jsonify({'error': 'Failed to process message'}), 500
 
 
 @app.route('/api/transcribe', methods=['POST'])
+@admission_controlled('transcribe')
 def api_transcribe():
     """
     Transcribe uploaded audio, generate AI response, and return everything.
@@ -117,12 +209,13 @@ def api_transcribe():
         os.makedirs(input_dir, exist_ok=True)
 
         ext = audio_file.filename.rsplit('.', 1)[-1] if '.' in audio_file.filename else 'webm'
-        temp_path = os.path.join(input_dir, f'upload_{int(time.time())}.{ext}')
+        temp_path = os.path.join(input_dir, f'upload_{time.time_ns()}.{ext}')
         audio_file.save(temp_path)
 
         # Process through VoiceLLM pipeline
         llm = get_voice_llm()
-        transcription, ai_response, audio_path = llm.process_audio_upload(temp_path)
+        with deadline(parse_timeout(request.headers.get(DEADLINE_HEADER))):
+            transcription, ai_response, audio_path = llm.process_audio_upload(temp_path)
 
         # Clean up uploaded file
         try:
@@ -141,21 +234,101 @@ def api_transcribe():
             'audio_url': audio_url,
         })
 
+    except DeadlineExceededError:
+        return jsonify({'error': 'Request timed out'}), 504
+
+    except CircuitOpenError as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         return jsonify({'error': 'Failed to process audio'}), 500
 
 
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    """
+    Queue uploaded audio for background transcription and response.
+
+    Request: multipart/form-data with 'audio' file
+
+    Response JSON (202 Accepted):
+        { "job_id": "<id>", "status": "queued", "status_url": "/api/jobs/<id>" }
+    """
+    if 'audio' not in request.files:
+        return jsonify({'error': 'No audio file provided'}), 400
+
+    audio_file = request.files['audio']
+    if not audio_file.filename:
+        return jsonify({'error': 'Empty audio file'}), 400
+
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    ext = audio_file.filename.rsplit('.', 1)[-1] if '.' in audio_file.filename else 'webm'
+    temp_path = os.path.join(JOB_UPLOAD_DIR, f'job_{time.time_ns()}.{ext}')
+    audio_file.save(temp_path)
+
+    try:
+        new_pipeline = job_pipeline_factory(get_voice_llm().openai_client)
+        job = get_job_manager().submit(transcription_job(new_pipeline, temp_path))
+    except AdmissionRejectedError as e:
+        os.remove(temp_path)
+        response = jsonify({'error': 'Too many pending jobs, please retry later'})
+        response.status_code = e.status_code
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+    status_url = f'/api/jobs/{job.id}'
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """
+    Return a job's status, and its result once finished.
+
+    Response JSON:
+        {
+            "job_id": "<id>",
+            "status": "queued" | "running" | "succeeded" | "failed",
+            "created_at": ..., "started_at": ..., "finished_at": ...,
+            "result": { "transcription": ..., "response": ..., "audio_url": ... },
+            "error": null
+        }
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job.to_dict())
+
+
 @app.route('/api/audio/<filename>')
 def api_audio(filename):
-    """Serve a generated audio file."""
-    audio_dir = os.path.join('data', 'audio', 'output')
-    file_path = os.path.join(audio_dir, filename)
+    """
+    Serve a generated audio file.
 
-    if not os.path.exists(file_path):
+    Responses carry a strong ETag (the content hash) and, for content-addressed
+    files, an immutable Cache-Control header. ``If-None-Match`` is answered
+    with 304 and ``Range`` requests with 206 partial content.
+    """
+    file_path = resolve_audio(filename)
+    if file_path is None:
         return jsonify({'error': 'Audio file not found'}), 404
 
-    return send_file(file_path, mimetype='audio/mpeg')
+    response = send_file(
+        file_path,
+        mimetype='audio/mpeg',
+        conditional=True,
+        etag=audio_etag(file_path),
+    )
+    response.headers['Cache-Control'] = cache_control(file_path)
+    record_cache('audio_http', response.status_code == 304)
+    return response
 
 
 @app.route('/api/settings', methods=['GET'])
@@ -169,6 +342,28 @@ def api_settings():
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """Return runtime metrics (routing, speculation, janitor, admission control, jobs, API lanes, hedging, circuit breakers)."""
+    llm = get_voice_llm()
+    return jsonify({
+        'routing': llm.get_routing_metrics(),
+        'speculation': llm.get_speculation_metrics(),
+        'janitor': get_janitor().metrics(),
+        'admission': admission_metrics(),
+        'jobs': get_job_manager().metrics(),
+        'api_lanes': scheduler_metrics(),
+        'hedging': hedging_stats(),
+        'circuits': breaker_metrics(),
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose stage latencies, API and queue metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
 @app.route('/api/clear', methods=['POST'])
 def api_clear():
     """Clear the conversation memory."""
@@ -186,17 +381,36 @@ def api_clear():
 # ═══════════════════════════════════════════════════
 
 def run_web():
-    """Run the Flask development server."""
+    """
+    Run the web app. Uses the ASGI server (``src/asgi.py``) unless
+    ``WEB_SERVER=flask`` is set or the optional ASGI dependencies are
+    missing, in which case the Flask development server is used.
+    """
+    if config.WEB_SERVER == 'asgi':
+        try:
+            from src.asgi import run_asgi
+        except ImportError as e:
+            print(f"ASGI server unavailable ({e}); falling back to the Flask development server.")
+            print("Install it with: pip install '.[asgi]'")
+        else:
+            run_asgi()
+            return
+
     print("\n--- Starting Voice-Controlled LLM Web App ---")
     print(f"  Model: {config.MODEL_NAME}")
     print(f"  TTS Voice: {config.TTS_VOICE}")
     print(f"  Debug: {config.DEBUG}")
-    print(f"  Open http://127.0.0.1:5000 in your browser")
+    print(f"  Open http://127.0.0.1:{config.WEB_PORT} in your browser")
     print("----------------------------------------------\n")
 
+    setup_logging()
+    # Open API connections now so the first user turn skips DNS/TLS setup
+    prewarm_in_background()
+    start_janitor()
+
     app.run(
-        host='0.0.0.0',
-        port=5000,
+        host=config.WEB_HOST,
+        port=config.WEB_PORT,
         debug=config.DEBUG,
     )
 
@@ -0,0 +1,483 @@
+"""
+A batch work queue in a shared directory, for scaling batch processing
+across worker processes and hosts without a message broker.
+
+Items are enqueued as files; any number of workers (on one host, or on
+several hosts sharing the directory over NFS or similar) claim them with
+lease files and write one result file per item::
+
+    <queue>/items/<name>.json     enqueued item (plus IDs of identical inputs)
+    <queue>/leases/<name>.lease   claim held by a worker; mtime is its heartbeat
+    <queue>/results/<name>.json   the item's result
+
+Claiming an item is an exclusive file create (``O_CREAT | O_EXCL``), so
+only one worker gets it. While processing, the worker touches its lease
+every ``lease_ttl / 3`` seconds. A lease whose heartbeat is older than
+``lease_ttl`` belongs to a worker that died, and another worker takes the
+item over. Results are written to a temporary file and renamed into place,
+so a result is never seen half-written.
+
+Delivery is at-least-once: a worker stalled for longer than the lease TTL
+may have its item processed a second time (the later result wins). Host
+clocks must agree to well within ``lease_ttl``.
+
+Each worker process has its own rate limit and may use its own
+``OPENAI_API_KEY``, so throughput scales with the number of workers::
+
+    python -m src.workqueue enqueue inputs.jsonl --queue /shared/q
+    python -m src.workqueue work --queue /shared/q      # on each host, as often as needed
+    python -m src.workqueue status --queue /shared/q
+    python -m src.workqueue collect --queue /shared/q --output results.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Iterable, Optional
+
+from src.batch import (
+    BatchItem,
+    BatchSummary,
+    ERROR,
+    OK,
+    TEXT,
+    RateLimiter,
+    ThreadPipelines,
+    load_items,
+    result_record,
+    run_item,
+)
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+ITEMS_DIR = "items"
+LEASES_DIR = "leases"
+RESULTS_DIR = "results"
+
+
+def _item_name(item_id: str) -> str:
+    """File name stem of an item (IDs may contain characters unsafe in names)."""
+    return hashlib.sha1(item_id.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: dict) -> None:
+    """Writes JSON to ``path`` via a temporary file and a rename."""
+    tmp_path = os.path.join(os.path.dirname(path), f".tmp-{uuid.uuid4().hex}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _list_names(directory: str, suffix: str) -> list[str]:
+    """Returns the name stems of the files in ``directory`` ending in ``suffix``."""
+    try:
+        return [
+            entry[: -len(suffix)] for entry in os.listdir(directory)
+            if entry.endswith(suffix) and not entry.startswith(".")
+        ]
+    except FileNotFoundError:
+        return []
+
+
+class WorkQueue:
+    """A work queue in a (possibly shared) directory."""
+
+    def __init__(self, path: str, lease_ttl: float = 60.0) -> None:
+        """
+        Args:
+            path: Queue directory.
+            lease_ttl: Seconds without a heartbeat after which a claimed item
+                is considered abandoned and may be claimed again.
+        """
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.items_dir = os.path.join(path, ITEMS_DIR)
+        self.leases_dir = os.path.join(path, LEASES_DIR)
+        self.results_dir = os.path.join(path, RESULTS_DIR)
+        for directory in (self.items_dir, self.leases_dir, self.results_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def _item_path(self, name: str) -> str:
+        return os.path.join(self.items_dir, f"{name}.json")
+
+    def _lease_path(self, name: str) -> str:
+        return os.path.join(self.leases_dir, f"{name}.lease")
+
+    def _result_path(self, name: str) -> str:
+        return os.path.join(self.results_dir, f"{name}.json")
+
+    # ── Producer ──────────────────────────────────────────────
+
+    def enqueue(self, items: Iterable[BatchItem]) -> int:
+        """
+        Adds items to the queue. Identical inputs become one queue entry
+        carrying the IDs of the duplicates.
+
+        Enqueueing again is idempotent: items already queued are kept, and
+        items whose result is an error are queued for another attempt.
+
+        Returns:
+            The number of queue entries added or re-queued.
+        """
+        groups: dict[str, list[BatchItem]] = {}
+        for item in items:
+            groups.setdefault(item.key, []).append(item)
+
+        added = 0
+        for group in groups.values():
+            primary = group[0]
+            name = _item_name(primary.id)
+            result = _read_json(self._result_path(name))
+            if result is not None:
+                if result.get("status") == OK:
+                    continue
+                os.remove(self._result_path(name))
+            elif os.path.exists(self._item_path(name)):
+                continue
+            _write_atomic(self._item_path(name), {
+                "id": primary.id,
+                "kind": primary.kind,
+                "value": primary.value,
+                "key": primary.key,
+                "duplicates": [{"id": item.id, "value": item.value} for item in group[1:]],
+            })
+            added += 1
+        return added
+
+    # ── Leases ────────────────────────────────────────────────
+
+    def try_claim(self, name: str, worker_id: str) -> bool:
+        """
+        Claims an item for ``worker_id`` unless it is done or held by a live
+        lease. Returns True if the caller now owns the item.
+        """
+        if os.path.exists(self._result_path(name)):
+            return False
+        lease_path = self._lease_path(name)
+        if not self._create_lease(lease_path, worker_id):
+            if not self._take_over(name) or not self._create_lease(lease_path, worker_id):
+                return False
+        # The previous holder may have finished between the check above and the claim
+        if os.path.exists(self._result_path(name)):
+            self.release(name, worker_id)
+            return False
+        return True
+
+    def _take_over(self, name: str) -> bool:
+        """
+        Removes an abandoned lease so the item can be claimed again. Returns
+        False if the lease is live, or if another worker took it over first.
+        """
+        lease_path = self._lease_path(name)
+        try:
+            age = time.time() - os.stat(lease_path).st_mtime
+        except FileNotFoundError:
+            return True  # Released just now
+        if age <= self.lease_ttl:
+            return False
+        # Whoever renames the stale lease away gets to retry the claim
+        stale_path = f"{lease_path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return False
+        if self._is_live(stale_path):
+            # Between the stat and the rename another worker took the item
+            # over and claimed it: put its lease back, unless yet another
+            # claim got there first (the holder then sees its lease is lost)
+            try:
+                os.link(stale_path, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        logger.info("Took over abandoned lease on item %s (heartbeat %.0fs old)", name, age)
+        return True
+
+    def _is_live(self, lease_path: str) -> bool:
+        """True if the lease file at ``lease_path`` has a recent heartbeat."""
+        try:
+            return time.time() - os.stat(lease_path).st_mtime <= self.lease_ttl
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _create_lease(lease_path: str, worker_id: str) -> bool:
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"worker": worker_id, "claimed_at": time.time()}, f)
+        return True
+
+    def heartbeat(self, name: str, worker_id: str) -> bool:
+        """Renews a lease. Returns False if ``worker_id`` no longer holds it."""
+        lease = _read_json(self._lease_path(name))
+        if lease is None or lease.get("worker") != worker_id:
+            return False
+        try:
+            os.utime(self._lease_path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, name: str, worker_id: str) -> None:
+        """Removes a lease if ``worker_id`` still holds it."""
+        lease = _read_json(self._lease_path(name))
+        if lease is not None and lease.get("worker") == worker_id:
+            try:
+                os.remove(self._lease_path(name))
+            except FileNotFoundError:
+                pass
+
+    # ── Items and results ─────────────────────────────────────
+
+    def load_item(self, name: str) -> Optional[BatchItem]:
+        """Returns a queued item, or None if it can't be read."""
+        entry = _read_json(self._item_path(name))
+        if entry is None:
+            return None
+        return BatchItem(entry["id"], entry["kind"], entry["value"], entry["key"])
+
+    def complete(self, name: str, result: dict[str, Any]) -> None:
+        """Records an item's result."""
+        _write_atomic(self._result_path(name), result)
+
+    def open_items(self) -> list[str]:
+        """Returns the names of items without a result, in a stable order."""
+        done = set(_list_names(self.results_dir, ".json"))
+        return sorted(name for name in _list_names(self.items_dir, ".json") if name not in done)
+
+    def live_leases(self) -> int:
+        """Returns the number of leases with a recent heartbeat."""
+        return sum(self._is_live(self._lease_path(name)) for name in _list_names(self.leases_dir, ".lease"))
+
+    def status(self) -> dict[str, int]:
+        """Returns counts of queued, leased, succeeded and failed entries."""
+        items = _list_names(self.items_dir, ".json")
+        succeeded = failed = 0
+        for name in _list_names(self.results_dir, ".json"):
+            result = _read_json(self._result_path(name)) or {}
+            if result.get("status") == OK:
+                succeeded += 1
+            else:
+                failed += 1
+        return {
+            "items": len(items),
+            "open": len(self.open_items()),
+            "leased": self.live_leases(),
+            "succeeded": succeeded,
+            "failed": failed,
+        }
+
+    def collect(self, output_path: str) -> int:
+        """
+        Writes every result (one line per input ID, duplicates included) to
+        ``output_path`` in the ``python -m src.batch`` output format.
+
+        Returns:
+            The number of lines written.
+        """
+        written = 0
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as out:
+            for name in sorted(_list_names(self.items_dir, ".json")):
+                entry = _read_json(self._item_path(name))
+                result = _read_json(self._result_path(name))
+                if entry is None or result is None:
+                    continue
+                primary = BatchItem(entry["id"], entry["kind"], entry["value"], entry["key"])
+                duplicates = [
+                    BatchItem(d["id"], entry["kind"], d["value"], entry["key"]) for d in entry.get("duplicates", [])
+                ]
+                for item in [primary, *duplicates]:
+                    out.write(json.dumps(result_record(item, result, primary.id), ensure_ascii=False) + "\n")
+                    written += 1
+        return written
+
+
+class QueueWorker:
+    """
+    Processes items from a :class:`WorkQueue` on ``concurrency`` threads
+    until every item has a result.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        concurrency: int = 4,
+        rate: float = 0.0,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 5.0,
+        pipeline_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Args:
+            queue: The queue to work on.
+            concurrency: Items processed at once by this process.
+            rate: Maximum items started per second by this process (0 for no limit).
+            worker_id: Name recorded in leases (default: host name and PID).
+            poll_interval: Seconds between checks for abandoned items while
+                other workers hold the remaining ones.
+            pipeline_factory: See :class:`src.batch.ThreadPipelines`.
+        """
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rate)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.pipelines = ThreadPipelines(pipeline_factory)
+        self.summary = BatchSummary()
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _claim_next(self) -> Optional[str]:
+        """Claims an open item, or returns None if none is claimable now."""
+        for name in self.queue.open_items():
+            if self.queue.try_claim(name, self.worker_id):
+                with self._lock:
+                    self._held.add(name)
+                return name
+        return None
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.queue.lease_ttl / 3):
+            with self._lock:
+                held = list(self._held)
+            for name in held:
+                if not self.queue.heartbeat(name, self.worker_id):
+                    logger.warning("Lost the lease on item %s; it may be processed twice", name)
+
+    def _work_loop(self) -> None:
+        while not self._stop.is_set():
+            name = self._claim_next()
+            if name is None:
+                if not self.queue.open_items():
+                    return
+                # The rest are leased by other workers; wait in case one dies
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                self._process(name)
+            finally:
+                with self._lock:
+                    self._held.discard(name)
+                self.queue.release(name, self.worker_id)
+
+    def _process(self, name: str) -> None:
+        """Runs a claimed item and records its result."""
+        item = self.queue.load_item(name)
+        if item is None:
+            # Recorded as failed, so workers don't claim it over and over;
+            # enqueueing the input again retries it
+            result = {"status": ERROR, "error": "Queue entry could not be read"}
+        else:
+            self.limiter.acquire()
+            result = run_item(self.pipelines.get(), item)
+        result["worker"] = self.worker_id
+        self.queue.complete(name, result)
+        with self._lock:
+            self.summary.processed += 1
+            if result["status"] == OK:
+                self.summary.succeeded += 1
+            else:
+                self.summary.failed += 1
+
+    def run(self) -> BatchSummary:
+        """
+        Works until no open items remain.
+
+        Returns:
+            A :class:`src.batch.BatchSummary` of the items this process handled.
+        """
+        start = time.perf_counter()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._work_loop, name=f"queue-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        finally:
+            # On an interrupt, unclaimed items stay queued; held leases expire
+            self._stop.set()
+            self.pipelines.close()
+        self.summary.total = self.summary.processed
+        self.summary.elapsed_s = time.perf_counter() - start
+        logger.info("Worker %s finished: %s", self.worker_id, self.summary)
+        return self.summary
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command-line interface: enqueue, work, status and collect."""
+    parser = argparse.ArgumentParser(description="Distribute a batch over worker processes via a shared directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Add a JSONL file or directory of inputs to the queue.")
+    enqueue.add_argument("input")
+
+    work = subparsers.add_parser("work", help="Process queued items until none are left.")
+    work.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY, help="Items processed at once (default: BATCH_CONCURRENCY).")
+    work.add_argument("--rate", type=float, default=config.BATCH_RATE_LIMIT, help="Max items started per second by this worker (default: BATCH_RATE_LIMIT).")
+    work.add_argument("--worker-id", help="Name recorded in leases (default: host-pid).")
+
+    subparsers.add_parser("status", help="Show queue progress.")
+
+    collect = subparsers.add_parser("collect", help="Write all results to a JSONL file.")
+    collect.add_argument("--output", required=True)
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--queue", default=config.QUEUE_DIR, help="Queue directory (default: QUEUE_DIR).")
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.queue, lease_ttl=config.QUEUE_LEASE_TTL)
+    if args.command == "enqueue":
+        # Audio paths must resolve on every host
+        items = [
+            BatchItem(item.id, item.kind, item.value if item.kind == TEXT else os.path.abspath(item.value), item.key)
+            for item in load_items(args.input)
+        ]
+        print(f"Queued {queue.enqueue(items)} of {len(items)} items in {args.queue}")
+    elif args.command == "work":
+        from src.utils.logger import setup_logging
+        setup_logging(log_file="workqueue.log")
+        worker = QueueWorker(
+            queue, concurrency=args.concurrency, rate=args.rate,
+            worker_id=args.worker_id, poll_interval=config.QUEUE_POLL_INTERVAL,
+        )
+        print(worker.run())
+    elif args.command == "status":
+        print(json.dumps(queue.status()))
+    elif args.command == "collect":
+        print(f"Wrote {queue.collect(args.output)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
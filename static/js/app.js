@@ -92,7 +92,7 @@ async function handleSendText() {
     dom.textInput.value = '';
     autoResizeTextarea();
 
-    await processWithAPI('/api/chat', { text });
+    await processWithStream('/api/chat/stream', '/api/chat', { text });
 }
 
 // ─── Audio Recording ───
@@ -163,7 +163,7 @@ async function handleAudioBlob(blob) {
     const formData = new FormData();
     formData.append('audio', blob, 'recording.webm');
 
-    await processWithAPI('/api/transcribe', formData, true);
+    await processWithStream('/api/transcribe/stream', '/api/transcribe', formData, true);
 }
 
 // ─── API Communication ───
@@ -184,10 +184,11 @@ async function processWithAPI(endpoint, data, isFormData = false) {
             options.body = JSON.stringify(data);
         }
 
-        const response = await fetch(endpoint, options);
+        const response = await fetchWithRetryAfter(endpoint, options);
 
         if (!response.ok) {
-            throw new Error(`Server error: ${response.status}`);
+            addMessage('assistant', await errorMessageFor(response));
+            return;
         }
 
         const result = await response.json();
@@ -210,6 +211,251 @@ async function processWithAPI(endpoint, data, isFormData = false) {
     }
 }
 
+// Statuses meaning the server has no streaming endpoint
+const STREAM_UNSUPPORTED_STATUSES = [404, 405];
+// Longest Retry-After (seconds) worth waiting for before retrying once
+const MAX_RETRY_AFTER_S = 10;
+
+function retryAfterSeconds(response) {
+    const seconds = parseInt(response.headers.get('Retry-After'), 10);
+    return Number.isFinite(seconds) && seconds >= 0 ? seconds : null;
+}
+
+// A request the server shed (429/503) is retried once, after its Retry-After,
+// if that is short; otherwise the refusal is returned to the caller.
+async function fetchWithRetryAfter(endpoint, options) {
+    const response = await fetch(endpoint, options);
+    if (response.status !== 429 && response.status !== 503) return response;
+
+    const delay = retryAfterSeconds(response);
+    if (delay === null || delay > MAX_RETRY_AFTER_S) return response;
+    setStatus('processing', `Server busy, retrying in ${delay}s...`);
+    await new Promise(resolve => setTimeout(resolve, delay * 1000));
+    return fetch(endpoint, options);
+}
+
+// User-facing message for a failed request (null response: network error)
+async function errorMessageFor(response) {
+    if (!response) {
+        return 'Sorry, the server could not be reached. Please try again.';
+    }
+    let detail = null;
+    try {
+        detail = (await response.json()).error;
+    } catch (err) {
+        // Not a JSON error body
+    }
+    if (response.status === 429 || response.status === 503) {
+        const delay = retryAfterSeconds(response);
+        return `The server is busy. Please try again ${delay ? `in ${delay} seconds` : 'shortly'}.`;
+    }
+    if (response.status === 504) {
+        return 'Sorry, that took too long. Please try again.';
+    }
+    if (response.status >= 400 && response.status < 500) {
+        return `Sorry, the request was rejected${detail ? `: ${detail}` : ''}.`;
+    }
+    return 'Sorry, an error occurred while processing your request. Please try again.';
+}
+
+// ─── Streaming API (Server-Sent Events) ───
+function buildRequestOptions(data, isFormData) {
+    if (isFormData) {
+        return { method: 'POST', body: data };
+    }
+    return {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data),
+    };
+}
+
+async function processWithStream(endpoint, fallbackEndpoint, data, isFormData = false) {
+    state.isProcessing = true;
+    showTypingIndicator(true);
+    setStatus('processing', 'Processing...');
+
+    let response = null;
+    try {
+        response = await fetchWithRetryAfter(endpoint, buildRequestOptions(data, isFormData));
+    } catch (err) {
+        console.error('Streaming API Error:', err);
+    }
+
+    // Server without streaming endpoints (e.g. the Flask dev server): use the JSON API.
+    // Any other failure is reported, not re-posted, so a busy server isn't asked twice.
+    if (response && STREAM_UNSUPPORTED_STATUSES.includes(response.status)) {
+        await processWithAPI(fallbackEndpoint, data, isFormData);
+        return;
+    }
+    if (!response || !response.ok || !response.body ||
+        !(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+        addMessage('assistant', await errorMessageFor(response));
+        state.isProcessing = false;
+        showTypingIndicator(false);
+        setStatus('ready', 'Ready');
+        return;
+    }
+
+    let message = null;
+    let player = null;
+    let text = '';
+    let audioUrls = [];
+
+    const ensureMessage = () => {
+        if (!message) {
+            showTypingIndicator(false);
+            message = addStreamingMessage();
+            player = new ChunkedAudioPlayer(message.content);
+        }
+    };
+
+    try {
+        for await (const { event, data: payload } of readServerSentEvents(response)) {
+            if (event === 'transcript') {
+                updateLastUserMessage(`🎤 "${payload.text}"`);
+                setStatus('processing', 'Thinking...');
+            } else if (event === 'token') {
+                ensureMessage();
+                text += payload.text;
+                message.bubble.textContent = text;
+                scrollToBottom();
+            } else if (event === 'audio') {
+                ensureMessage();
+                if (payload.audio_url) {
+                    audioUrls.push(payload.audio_url);
+                    player.enqueue(payload.audio_url);
+                    setStatus('processing', 'Speaking...');
+                }
+            } else if (event === 'done') {
+                ensureMessage();
+                text = payload.response;
+                message.bubble.textContent = text;
+            } else if (event === 'error') {
+                throw new Error(payload.error);
+            }
+        }
+        if (player) player.finish();
+        state.messages.push({ role: 'assistant', content: text, audioUrls });
+    } catch (err) {
+        console.error('Streaming API Error:', err);
+        if (player) player.finish();
+        if (!text) {
+            if (message) message.element.remove();
+            addMessage('assistant', 'Sorry, an error occurred while processing your request. Please try again.');
+        }
+    } finally {
+        state.isProcessing = false;
+        showTypingIndicator(false);
+        setStatus('ready', 'Ready');
+    }
+}
+
+async function* readServerSentEvents(response) {
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            if (data) yield { event, data: JSON.parse(data) };
+        }
+    }
+}
+
+// ─── Chunked Audio Playback ───
+// Plays audio chunks back to back as they arrive. Uses MediaSource so the
+// chunks form one continuous track; browsers without MPEG support in
+// MediaSource play them one after another through a single <audio> element.
+class ChunkedAudioPlayer {
+    constructor(container) {
+        this.pending = [];     // Promises of chunk bytes, in playback order
+        this.urls = [];
+        this.finished = false;
+        this.appending = false;
+
+        const wrapper = document.createElement('div');
+        wrapper.className = 'message__audio';
+        this.audio = document.createElement('audio');
+        this.audio.controls = true;
+        wrapper.appendChild(this.audio);
+        container.appendChild(wrapper);
+
+        this.useMediaSource = 'MediaSource' in window && MediaSource.isTypeSupported('audio/mpeg');
+        if (this.useMediaSource) {
+            this.mediaSource = new MediaSource();
+            this.audio.src = URL.createObjectURL(this.mediaSource);
+            this.mediaSource.addEventListener('sourceopen', () => {
+                this.sourceBuffer = this.mediaSource.addSourceBuffer('audio/mpeg');
+                this.sourceBuffer.mode = 'sequence';
+                this.sourceBuffer.addEventListener('updateend', () => this.pump());
+                this.pump();
+            }, { once: true });
+        } else {
+            this.nextIndex = 0;
+            this.audio.addEventListener('ended', () => this.playNext());
+        }
+    }
+
+    enqueue(url) {
+        this.urls.push(url);
+        if (this.useMediaSource) {
+            // Fetch chunks in parallel, append them in order
+            this.pending.push(fetch(url).then(r => r.arrayBuffer()));
+            this.pump();
+        } else if (this.audio.paused && this.nextIndex === this.urls.length - 1) {
+            this.playNext();
+        }
+        if (this.urls.length === 1) {
+            this.audio.play().catch(() => { }); // Autoplay may be blocked; controls remain
+        }
+    }
+
+    finish() {
+        this.finished = true;
+        if (this.useMediaSource) this.pump();
+    }
+
+    async pump() {
+        if (!this.sourceBuffer || this.sourceBuffer.updating || this.appending) return;
+        if (this.pending.length === 0) {
+            if (this.finished && this.mediaSource.readyState === 'open') {
+                this.mediaSource.endOfStream();
+            }
+            return;
+        }
+        this.appending = true;
+        try {
+            this.sourceBuffer.appendBuffer(await this.pending.shift());
+        } catch (err) {
+            console.error('Audio chunk failed:', err);
+            this.appending = false;
+            this.pump();
+            return;
+        }
+        this.appending = false;
+    }
+
+    playNext() {
+        if (this.nextIndex >= this.urls.length) return;
+        this.audio.src = this.urls[this.nextIndex++];
+        this.audio.play().catch(() => { });
+    }
+}
+
 // ─── Chat UI ───
 function addMessage(role, content, audioUrl = null) {
     // Hide empty state
@@ -248,6 +494,30 @@ function addMessage(role, content, audioUrl = null) {
     state.messages.push({ role, content, audioUrl });
 }
 
+function addStreamingMessage() {
+    // Assistant message whose bubble is filled in as tokens arrive
+    if (dom.emptyState) {
+        dom.emptyState.style.display = 'none';
+    }
+
+    const element = document.createElement('div');
+    element.className = 'message message--assistant';
+    element.innerHTML = `
+        <div class="message__avatar">🤖</div>
+        <div class="message__content">
+            <div class="message__bubble"></div>
+        </div>
+    `;
+    dom.chatArea.appendChild(element);
+    scrollToBottom();
+
+    return {
+        element,
+        content: element.querySelector('.message__content'),
+        bubble: element.querySelector('.message__bubble'),
+    };
+}
+
 function updateLastUserMessage(content) {
     const userMessages = dom.chatArea.querySelectorAll('.message--user');
     if (userMessages.length > 0) {
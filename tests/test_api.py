@@ -30,10 +30,11 @@ from src.utils.exceptions import (
 class TestOpenAIClient:
     """Tests for OpenAIClient class."""
 
+    @patch("src.api.openai_client.get_http_client")
     @patch("src.api.openai_client.config")
     @patch("src.api.openai_client.OpenAI")
-    def test_init(self, mock_openai_cls, mock_config):
-        """Test OpenAIClient initializes with config values."""
+    def test_init(self, mock_openai_cls, mock_config, mock_get_http_client):
+        """Test OpenAIClient initializes with config values and the shared transport."""
         mock_config.OPENAI_API_KEY = "test-key"
         mock_config.WHISPER_MODEL = "whisper-1"
         mock_config.TTS_MODEL = "tts-1"
@@ -44,7 +45,9 @@ class TestOpenAIClient:
         assert client.whisper_model == "whisper-1"
         assert client.tts_model == "tts-1"
         assert client.tts_voice == "alloy"
-        mock_openai_cls.assert_called_once_with(api_key="test-key")
+        mock_openai_cls.assert_called_once_with(
+            api_key="test-key", http_client=mock_get_http_client.return_value
+        )
 
     @patch("src.api.openai_client.config")
     @patch("src.api.openai_client.OpenAI")
@@ -124,6 +127,31 @@ class TestOpenAIClient:
 
         assert result == "Hello! I'm fine."
 
+    @patch("src.api.openai_client.OpenAI")
+    def test_chat_completion_records_tokens_and_retries(self, mock_openai_cls):
+        """Test token usage and retried attempts are counted in the metrics registry."""
+        from src.utils.metrics import API_RETRIES, TOKENS
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Hi"
+        mock_response.usage.prompt_tokens = 12
+        mock_response.usage.completion_tokens = 3
+        mock_create = mock_openai_cls.return_value.chat.completions.create
+        mock_create.side_effect = [Exception("blip"), mock_response]
+
+        tokens_in = TOKENS.value(model="metrics-test", direction="in")
+        tokens_out = TOKENS.value(model="metrics-test", direction="out")
+        retries = API_RETRIES.value(endpoint="chat")
+
+        client = OpenAIClient()
+        with patch("tenacity.nap.time.sleep"):
+            assert client.get_chat_completion([], "metrics-test", 0.7, 10) == "Hi"
+
+        assert TOKENS.value(model="metrics-test", direction="in") == tokens_in + 12
+        assert TOKENS.value(model="metrics-test", direction="out") == tokens_out + 3
+        assert API_RETRIES.value(endpoint="chat") == retries + 1
+
     @patch("src.api.openai_client.config")
     @patch("src.api.openai_client.OpenAI")
     def test_get_chat_completion_error(self, mock_openai_cls, mock_config):
@@ -182,6 +210,581 @@ class TestOpenAIClient:
             client.synthesize_speech("Hello", "output.mp3")
 
 
+class TestOpenAIClientAsync:
+    """Tests for the async OpenAIClient variants used by the ASGI server."""
+
+    @patch("src.api.openai_client.AsyncOpenAI")
+    def test_asynthesize_speech_success(self, mock_async_cls):
+        """Test async synthesis streams the response to the output file."""
+        import asyncio
+        from unittest.mock import AsyncMock
+
+        mock_response = MagicMock()
+        mock_response.astream_to_file = AsyncMock()
+        mock_async_cls.return_value.audio.speech.create = AsyncMock(return_value=mock_response)
+
+        client = OpenAIClient()
+        result = asyncio.run(client.asynthesize_speech("Hello", "output.mp3"))
+
+        assert result == "output.mp3"
+        mock_response.astream_to_file.assert_awaited_once_with("output.mp3")
+
+    @patch("src.api.openai_client.AsyncOpenAI")
+    def test_atranscribe_audio_file_not_found(self, mock_async_cls):
+        """Test async transcription raises AudioFileNotFoundError for a missing file."""
+        import asyncio
+
+        client = OpenAIClient()
+        with pytest.raises(AudioFileNotFoundError):
+            asyncio.run(client.atranscribe_audio("nonexistent.wav"))
+
+
+# ═══════════════════════════════════════════════════
+# Shared Transport Tests
+# ═══════════════════════════════════════════════════
+
+from src.api import transport
+
+
+class TestTransport:
+    """Tests for the shared HTTP transport."""
+
+    def test_http_client_is_shared(self, monkeypatch):
+        """Test every caller gets the same pooled HTTP client."""
+        monkeypatch.setattr(transport, "_http_client", None)
+
+        first = transport.get_http_client()
+        second = transport.get_http_client()
+
+        assert first is second
+        transport.close_http_client()
+
+    def test_clients_share_transport(self, monkeypatch):
+        """Test two OpenAIClient instances use the same HTTP client."""
+        monkeypatch.setattr(transport, "_http_client", None)
+
+        a = OpenAIClient()
+        b = OpenAIClient()
+
+        assert a.client._client is b.client._client
+        transport.close_http_client()
+
+    @patch("src.api.transport.get_http_client")
+    def test_prewarm_opens_requested_connections(self, mock_get_client):
+        """Test pre-warming issues one request per connection."""
+        warmed = transport.prewarm_connections(count=3)
+
+        assert warmed == 3
+        assert mock_get_client.return_value.get.call_count == 3
+
+    @patch("src.api.transport.get_http_client")
+    def test_prewarm_ignores_failures(self, mock_get_client):
+        """Test a failed warm-up is reported but not raised."""
+        import httpx
+        mock_get_client.return_value.get.side_effect = httpx.ConnectError("offline")
+
+        assert transport.prewarm_connections(count=1) == 0
+
+    def test_prewarm_disabled(self):
+        """Test a count of zero skips pre-warming entirely."""
+        assert transport.prewarm_connections(count=0) == 0
+
+
+# ═══════════════════════════════════════════════════
+# Priority Scheduler Tests
+# ═══════════════════════════════════════════════════
+
+import threading
+import time
+
+import httpx
+
+from src.api import scheduler as sched
+
+
+def _wait_for(predicate):
+    """Polls until ``predicate()`` is true."""
+    for _ in range(500):
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+class TestPriorityScheduler:
+    """Tests for API priority lanes."""
+
+    def test_reserved_slots_stay_free_for_interactive(self):
+        """Test batch work can't take the reserved slots but interactive can."""
+        scheduler = sched.PriorityScheduler(max_concurrency=2, reserved_interactive=1)
+        scheduler.acquire(sched.BATCH)
+        blocked = threading.Thread(target=scheduler.acquire, args=(sched.BATCH,), daemon=True)
+        blocked.start()
+        _wait_for(lambda: scheduler.metrics()["lanes"]["batch"]["queued"] == 1)
+
+        scheduler.acquire(sched.INTERACTIVE)  # Doesn't block
+
+        assert scheduler.metrics()["lanes"]["interactive"]["active"] == 1
+        scheduler.release(sched.INTERACTIVE)
+        scheduler.release(sched.BATCH)
+        blocked.join(timeout=5)
+        assert scheduler.metrics()["lanes"]["batch"]["active"] == 1
+
+    def test_freed_slot_goes_to_highest_lane(self):
+        """Test queued interactive requests overtake batch requests queued earlier."""
+        scheduler = sched.PriorityScheduler(max_concurrency=1)
+        scheduler.acquire(sched.BATCH)
+        order = []
+
+        def waiter(lane):
+            scheduler.acquire(lane)
+            order.append(lane)
+            scheduler.release(lane)
+
+        threads = [threading.Thread(target=waiter, args=(sched.BATCH,))]
+        threads[0].start()
+        _wait_for(lambda: scheduler.metrics()["lanes"]["batch"]["queued"] == 1)
+        threads.append(threading.Thread(target=waiter, args=(sched.INTERACTIVE,)))
+        threads[1].start()
+        _wait_for(lambda: scheduler.metrics()["lanes"]["interactive"]["queued"] == 1)
+
+        scheduler.release(sched.BATCH)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert order == [sched.INTERACTIVE, sched.BATCH]
+
+    def test_transport_holds_slot_until_response_closed(self):
+        """Test a request takes a slot in the caller's lane until its body is closed."""
+        scheduler = sched.PriorityScheduler(max_concurrency=4)
+        seen = []
+
+        def handler(request):
+            seen.append(scheduler.metrics()["lanes"]["batch"]["active"])
+            return httpx.Response(200, content=b"ok")
+
+        client = httpx.Client(transport=sched.PriorityTransport(httpx.MockTransport(handler), scheduler))
+        with sched.priority(sched.BATCH):
+            response = client.get("https://api.example/v1/models")
+
+        assert response.content == b"ok"
+        assert seen == [1]
+        assert scheduler.metrics()["lanes"]["batch"] == {"active": 0, "queued": 0, "admitted": 1}
+
+    def test_async_transport_uses_lane(self):
+        """Test the async transport schedules in the caller's lane."""
+        import asyncio
+        scheduler = sched.PriorityScheduler(max_concurrency=4)
+
+        async def run():
+            transport = sched.AsyncPriorityTransport(httpx.MockTransport(lambda r: httpx.Response(204)), scheduler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                with sched.priority(sched.BACKGROUND):
+                    return await client.get("https://api.example/v1/models")
+
+        assert asyncio.run(run()).status_code == 204
+        assert scheduler.metrics()["lanes"]["background"]["admitted"] == 1
+        assert scheduler.metrics()["lanes"]["background"]["active"] == 0
+
+    def test_queue_wait_is_bounded_by_turn_deadline(self):
+        """Test a queued request gives up its place when the turn deadline passes."""
+        import asyncio
+        from src.utils.deadline import deadline
+        from src.utils.exceptions import DeadlineExceededError
+        scheduler = sched.PriorityScheduler(max_concurrency=1)
+        scheduler.acquire(sched.INTERACTIVE)
+
+        async def aqueued():
+            with deadline(0.05):
+                await scheduler.aacquire(sched.INTERACTIVE)
+
+        with deadline(0.05), pytest.raises(DeadlineExceededError):
+            scheduler.acquire(sched.INTERACTIVE)
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(aqueued())
+
+        assert scheduler.metrics()["lanes"]["interactive"]["queued"] == 0
+        scheduler.release(sched.INTERACTIVE)
+        assert scheduler.metrics()["lanes"]["interactive"]["active"] == 0
+
+    def test_unknown_lane_rejected(self):
+        """Test an invalid lane name raises ValueError."""
+        with pytest.raises(ValueError):
+            with sched.priority("urgent"):
+                pass
+
+
+# ═══════════════════════════════════════════════════
+# Request Coalescing Tests
+# ═══════════════════════════════════════════════════
+
+from src.api.singleflight import AsyncSingleFlight, SingleFlight
+from src.utils.metrics import API_COALESCED
+
+
+class TestSingleFlight:
+    """Tests for single-flight request coalescing."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent calls run once and every caller gets the result."""
+        flights = SingleFlight()
+        gate = threading.Event()
+        calls = []
+        results = []
+
+        def work():
+            calls.append(1)
+            gate.wait(5)
+            return "result"
+
+        threads = [threading.Thread(target=lambda: results.append(flights.do("k", work))) for _ in range(4)]
+        threads[0].start()
+        _wait_for(lambda: flights.in_flight() == 1)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(calls) == 1
+        assert sorted(results) == [("result", False)] * 3 + [("result", True)]
+        assert flights.in_flight() == 0
+
+    def test_followers_get_leader_error(self):
+        """Test a failed call raises in the followers too."""
+        flights = SingleFlight()
+        gate = threading.Event()
+        errors = []
+
+        def work():
+            gate.wait(5)
+            raise RuntimeError("upstream down")
+
+        def call():
+            try:
+                flights.do("k", work)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        threads[0].start()
+        _wait_for(lambda: flights.in_flight() == 1)
+        threads[1].start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert errors == ["upstream down"] * 2
+
+    def test_concurrent_synthesis_coalesced(self, tmp_path):
+        """Test identical concurrent TTS calls make one request and each get their own file."""
+        client = OpenAIClient()
+        gate = threading.Event()
+        calls = []
+
+        def fake_tts(text, output_file_path):
+            calls.append(output_file_path)
+            gate.wait(5)
+            with open(output_file_path, "wb") as f:
+                f.write(b"mp3 bytes")
+            return output_file_path
+
+        before = API_COALESCED.value(endpoint="speech")
+        paths = [str(tmp_path / f"{i}.mp3") for i in range(3)]
+        with patch.object(client, "_call_tts_api", side_effect=fake_tts):
+            threads = [threading.Thread(target=client.synthesize_speech, args=("Hello!", p)) for p in paths]
+            threads[0].start()
+            _wait_for(lambda: calls)
+            for thread in threads[1:]:
+                thread.start()
+            time.sleep(0.05)
+            gate.set()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        assert calls == [paths[0]]
+        assert all(open(p, "rb").read() == b"mp3 bytes" for p in paths)
+        assert API_COALESCED.value(endpoint="speech") - before == 2
+
+    def test_async_calls_coalesced(self):
+        """Test identical concurrent coroutines share one execution."""
+        import asyncio
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("k", work, share=str.upper) for _ in range(3)))
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert results == [("done", True), ("DONE", False), ("DONE", False)]
+
+
+from src.api.hedging import Hedger
+
+
+def _warmed_hedger(**kwargs):
+    """A hedger with enough fast samples on 'speech' to start hedging."""
+    hedger = Hedger(min_delay=0.01, min_samples=3, **kwargs)
+    for _ in range(3):
+        hedger.call("speech", lambda i: "fast")
+    return hedger
+
+
+class TestHedging:
+    """Tests for hedged requests."""
+
+    def test_no_hedge_without_latency_data(self):
+        """Test calls aren't hedged until the endpoint has enough samples."""
+        hedger = Hedger(min_delay=0.01, min_samples=3)
+        attempts = []
+
+        assert hedger.hedge_delay("speech") is None
+        assert hedger.call("speech", lambda i: attempts.append(i) or "ok") == ("ok", 0)
+        assert attempts == [0]
+
+    def test_slow_call_is_hedged(self):
+        """Test a call slower than the hedge delay races a duplicate and the faster one wins."""
+        hedger = _warmed_hedger()
+        discarded = []
+        release = threading.Event()
+
+        def attempt(i):
+            if i == 0:
+                release.wait(5)
+            return f"attempt {i}"
+
+        result = hedger.call("speech", attempt, discard=discarded.append)
+        release.set()
+        _wait_for(lambda: discarded)
+
+        stats = hedger.stats()["speech"]
+        assert result == ("attempt 1", 1)
+        assert discarded == [0]
+        assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (4, 1, 1)
+        assert stats["extra_request_ratio"] == 0.25
+
+    def test_budget_limits_hedges(self):
+        """Test hedges stop once the budget's tokens are spent."""
+        hedger = _warmed_hedger(budget=0.0)
+        hedger._endpoints["speech"].tokens = 1.0
+
+        def attempt(i):
+            time.sleep(0.05 if i == 0 else 0)
+            return i
+
+        assert hedger.call("speech", attempt) == (1, 1)
+        assert hedger.call("speech", attempt) == (0, 0)
+        assert hedger.stats()["speech"]["hedged"] == 1
+
+    def test_running_losers_bound_hedging(self):
+        """Test calls run on the caller's thread, unhedged, while losers fill the pool."""
+        hedger = _warmed_hedger(max_workers=2)
+        release = threading.Event()
+        threads = []
+
+        def attempt(i):
+            threads.append(threading.get_ident())
+            if i == 0 and len(threads) == 1:
+                release.wait(5)
+            return i
+
+        assert hedger.call("speech", attempt) == (1, 1)
+        assert hedger.call("speech", attempt) == (0, 0)
+        assert threads[-1] == threading.get_ident()
+        assert hedger.stats()["speech"]["hedged"] == 1
+        release.set()
+        _wait_for(lambda: hedger._running == 0)
+
+    def test_async_loser_is_cancelled(self):
+        """Test the slow async attempt is cancelled once the hedge wins."""
+        import asyncio
+        hedger = _warmed_hedger()
+        cancelled = []
+
+        async def attempt(i):
+            if i == 0:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(i)
+                    raise
+            return i
+
+        async def run():
+            result = await hedger.acall("speech", attempt)
+            await asyncio.sleep(0)
+            return result
+
+        assert asyncio.run(run()) == (1, 1)
+        assert cancelled == [0]
+
+    def test_hedged_synthesis_moves_winner_into_place(self, tmp_path):
+        """Test hedged TTS writes the winner's audio to the output path and removes the loser's file."""
+        client = OpenAIClient()
+        hedger = _warmed_hedger()
+        release = threading.Event()
+
+        def fake_tts(text, output_file_path):
+            if output_file_path.endswith(".hedge0.mp3"):
+                release.wait(5)
+            with open(output_file_path, "wb") as f:
+                f.write(output_file_path.encode())
+            return output_file_path
+
+        output = tmp_path / "reply.mp3"
+        with patch("src.api.openai_client.get_hedger", return_value=hedger), \
+                patch.object(client, "_call_tts_api", side_effect=fake_tts):
+            path = client._synthesize("Hello!", str(output))
+        release.set()
+        _wait_for(lambda: os.listdir(tmp_path) == ["reply.mp3"])
+
+        assert path == str(output)
+        assert output.read_bytes().endswith(b".hedge1.mp3")
+
+
+from src.api.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.utils.exceptions import CircuitOpenError, SynthesisUnavailableError
+
+
+class TestCircuitBreaker:
+    """Tests for per-endpoint circuit breakers."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens after the threshold and then fails fast."""
+        breaker = CircuitBreaker("speech", failure_threshold=3, reset_timeout=60)
+        for ok in (False, False, True, False, False):
+            breaker.before_call()
+            breaker.record(ok)
+        assert breaker.state == CLOSED
+
+        breaker.before_call()
+        breaker.record(False)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as excinfo:
+            breaker.before_call()
+        assert excinfo.value.retry_after == 60
+        assert breaker.metrics()["rejected"] == 1
+
+    def test_slow_successes_count_as_failures(self):
+        """Test calls over the latency threshold open the circuit too."""
+        breaker = CircuitBreaker("speech", failure_threshold=2, latency_threshold=1.0)
+        breaker.record(True, latency=5.0)
+        breaker.record(True, latency=5.0)
+
+        assert breaker.state == OPEN
+
+    def test_slow_background_calls_do_not_open_the_circuit(self):
+        """Test only interactive calls are held to the latency threshold."""
+        from src.api.breaker import guarded
+        from src.api.scheduler import BACKGROUND, priority
+        breaker = CircuitBreaker("transcription", failure_threshold=1, latency_threshold=1e-9)
+
+        with patch("src.api.breaker.get_breaker", return_value=breaker):
+            with priority(BACKGROUND), guarded("transcription", CircuitOpenError):
+                time.sleep(0.001)
+            assert breaker.state == CLOSED
+            with guarded("transcription", CircuitOpenError):
+                time.sleep(0.001)
+        assert breaker.state == OPEN
+
+    def test_half_open_probe(self):
+        """Test one probe goes through after the timeout; its result closes or reopens the circuit."""
+        breaker = CircuitBreaker("speech", failure_threshold=1, reset_timeout=0.05)
+        breaker.record(False)
+        time.sleep(0.06)
+        assert breaker.state == HALF_OPEN
+
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record(False)
+        assert breaker.state == OPEN
+
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record(True)
+        assert breaker.state == CLOSED
+        assert breaker.metrics()["times_opened"] == 2
+
+    def test_open_circuit_skips_api_call(self, tmp_path):
+        """Test the client raises SynthesisUnavailableError without calling TTS while open."""
+        client = OpenAIClient()
+        breaker = CircuitBreaker("speech", failure_threshold=1, reset_timeout=60)
+        breaker.record(False)
+
+        with patch("src.api.breaker.get_breaker", return_value=breaker), \
+                patch.object(client, "_call_tts_api") as mock_tts:
+            with pytest.raises(SynthesisUnavailableError):
+                client.synthesize_speech("Hello!", str(tmp_path / "out.mp3"))
+
+        mock_tts.assert_not_called()
+
+
+from src.utils.deadline import deadline
+from src.utils.exceptions import DeadlineExceededError
+
+
+class TestDeadlinePropagation:
+    """Tests for turn deadlines in API calls."""
+
+    def test_calls_get_remaining_time_without_sdk_retries(self):
+        """Test a call under a deadline uses the time left as timeout and no SDK retries."""
+        client = OpenAIClient()
+        with patch.object(client, "client") as mock_sdk:
+            mock_sdk.with_options.return_value.chat.completions.create.return_value.choices = [
+                MagicMock(message=MagicMock(content="hi"))
+            ]
+            with deadline(5):
+                client._call_chat_api([{"role": "user", "content": "hi"}], "gpt-4o-mini", 0.7, 10)
+
+        kwargs = mock_sdk.with_options.call_args.kwargs
+        assert 0 < kwargs["timeout"] <= 5
+        assert kwargs["max_retries"] == 0
+
+    def test_retry_skipped_when_it_cannot_finish_in_time(self, tmp_path):
+        """Test a failed call isn't retried when the backoff alone exceeds the time left."""
+        client = OpenAIClient()
+        audio = tmp_path / "a.wav"
+        audio.write_bytes(b"audio")
+        with patch.object(client, "client") as mock_sdk:
+            create = mock_sdk.with_options.return_value.audio.transcriptions.create
+            create.side_effect = RuntimeError("upstream slow")
+            start = time.perf_counter()
+            with deadline(1.0), pytest.raises(RuntimeError):
+                client._whisper(str(audio))
+
+        assert create.call_count == 1
+        assert time.perf_counter() - start < 1.0
+
+    def test_expired_deadline_skips_call(self):
+        """Test no request is sent once the turn is out of time."""
+        client = OpenAIClient()
+        with deadline(0.001):
+            time.sleep(0.01)
+            with pytest.raises(DeadlineExceededError):
+                client.synthesize_speech("Hello!", "out.mp3")
+
+    def test_http_timeouts_capped(self):
+        """Test the shared clients' request hook caps timeouts at the time left."""
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions",
+                                extensions={"timeout": {"connect": 5.0, "read": 60.0, "write": 60.0, "pool": None}})
+        with deadline(2):
+            transport._cap_timeout(request)
+
+        timeout = request.extensions["timeout"]
+        assert timeout["connect"] <= 2 and timeout["read"] <= 2 and timeout["pool"] <= 2
+
+
 # ═══════════════════════════════════════════════════
 # Whisper Wrapper Tests
 # ═══════════════════════════════════════════════════
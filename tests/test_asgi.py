@@ -0,0 +1,318 @@
+"""
+Tests for the ASGI web server (src/asgi.py).
+Uses Starlette's test client; mirrors the Flask endpoint tests.
+"""
+
+import os
+import json
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from io import BytesIO
+
+pytest.importorskip("starlette")
+pytest.importorskip("multipart")
+
+from starlette.testclient import TestClient
+
+
+@pytest.fixture
+def mock_voice_llm():
+    """Mock VoiceLLM with async pipeline methods."""
+    with patch("src.asgi.VoiceLLM") as mock_cls:
+        mock_instance = MagicMock()
+        mock_cls.return_value = mock_instance
+        mock_instance.aprocess_text_input = AsyncMock(return_value=("AI response", None))
+        mock_instance.aprocess_audio_upload = AsyncMock(
+            return_value=("transcribed text", "AI audio response", None)
+        )
+        mock_instance.get_routing_metrics.return_value = {}
+        mock_instance.get_speculation_metrics.return_value = {}
+        yield mock_instance
+
+
+@pytest.fixture
+def client(mock_voice_llm):
+    """Create a Starlette test client with a fresh VoiceLLM slot."""
+    import src.asgi as asgi_module
+    asgi_module.voice_llm = None
+    # Not used as a context manager, so the lifespan (connection pre-warm) doesn't run
+    yield TestClient(asgi_module.app)
+    asgi_module.voice_llm = None
+
+
+class TestASGIPages:
+    """Tests for the HTML page route."""
+
+    def test_index_renders_template(self, client):
+        """Test the shared template renders with static URLs."""
+        response = client.get("/")
+        assert response.status_code == 200
+        assert b"Voice-Controlled LLM" in response.content
+        assert b"/static/js/app.js" in response.content
+
+
+class TestASGIChat:
+    """Tests for /api/chat on the ASGI server."""
+
+    def test_chat_success(self, client, mock_voice_llm):
+        """Test the JSON contract matches the Flask endpoint."""
+        mock_voice_llm.aprocess_text_input.return_value = ("Hello!", None)
+
+        response = client.post("/api/chat", json={"text": "Hi"})
+
+        assert response.status_code == 200
+        assert response.json() == {"response": "Hello!", "audio_url": None}
+        mock_voice_llm.aprocess_text_input.assert_awaited_once_with("Hi")
+
+    def test_chat_no_body(self, client):
+        """Test a missing body returns 400."""
+        response = client.post("/api/chat", headers={"content-type": "application/json"})
+        assert response.status_code == 400
+
+    def test_chat_empty_text(self, client):
+        """Test whitespace-only text returns 400."""
+        response = client.post("/api/chat", json={"text": "   "})
+        assert response.status_code == 400
+
+    def test_chat_pipeline_error_returns_500(self, client, mock_voice_llm):
+        """Test pipeline failures map to a 500 JSON error."""
+        mock_voice_llm.aprocess_text_input.side_effect = Exception("boom")
+
+        response = client.post("/api/chat", json={"text": "Hi"})
+
+        assert response.status_code == 500
+        assert "error" in response.json()
+
+
+class TestASGITranscribe:
+    """Tests for /api/transcribe on the ASGI server."""
+
+    def test_transcribe_no_file(self, client):
+        """Test a request without an audio file returns 400."""
+        response = client.post("/api/transcribe", data={"other": "x"})
+        assert response.status_code == 400
+
+    def test_transcribe_success(self, client, mock_voice_llm):
+        """Test an upload is processed and the temp file removed."""
+        mock_voice_llm.aprocess_audio_upload.return_value = ("Hello world", "AI response", None)
+
+        response = client.post(
+            "/api/transcribe",
+            files={"audio": ("recording.webm", BytesIO(b"fake audio data"), "audio/webm")},
+        )
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["transcription"] == "Hello world"
+        assert result["response"] == "AI response"
+        temp_path = mock_voice_llm.aprocess_audio_upload.await_args.args[0]
+        assert not os.path.exists(temp_path)
+
+
+def _parse_sse(body):
+    """Splits a text/event-stream body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestASGIStreaming:
+    """Tests for the Server-Sent Events streaming endpoints."""
+
+    def test_chat_stream_emits_tokens_audio_and_done(self, client, mock_voice_llm, tmp_path):
+        """Test stream events are forwarded in order with audio paths mapped to URLs."""
+        chunk = tmp_path / "response_1_abc_0.mp3"
+        chunk.write_bytes(b"mp3")
+
+        async def fake_stream(text):
+            yield {"type": "token", "text": "Hi"}
+            yield {"type": "audio", "index": 0, "path": str(chunk)}
+            yield {"type": "done", "response": "Hi"}
+
+        mock_voice_llm.astream_text_input = fake_stream
+
+        response = client.post("/api/chat/stream", json={"text": "Hello"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert _parse_sse(response.text) == [
+            ("token", {"text": "Hi"}),
+            ("audio", {"index": 0, "audio_url": "/api/audio/response_1_abc_0.mp3"}),
+            ("done", {"response": "Hi"}),
+        ]
+
+    def test_chat_stream_empty_text(self, client):
+        """Test validation errors are returned as JSON before streaming starts."""
+        response = client.post("/api/chat/stream", json={"text": " "})
+        assert response.status_code == 400
+
+    def test_chat_stream_error_event(self, client, mock_voice_llm):
+        """Test a failure mid-stream ends the stream with an error event."""
+        async def failing_stream(text):
+            yield {"type": "token", "text": "Hi"}
+            raise RuntimeError("boom")
+
+        mock_voice_llm.astream_text_input = failing_stream
+
+        events = _parse_sse(client.post("/api/chat/stream", json={"text": "Hello"}).text)
+
+        assert events[0] == ("token", {"text": "Hi"})
+        assert events[-1][0] == "error"
+
+    def test_chat_stream_applies_request_timeout(self, client, mock_voice_llm):
+        """Test the X-Request-Timeout deadline covers the stream and a timeout ends it with an error."""
+        from src.utils.deadline import remaining
+        from src.utils.exceptions import DeadlineExceededError
+        seen = []
+
+        async def slow_stream(text):
+            seen.append(remaining())
+            yield {"type": "token", "text": "Hi"}
+            raise DeadlineExceededError("Turn deadline exceeded during generation")
+
+        mock_voice_llm.astream_text_input = slow_stream
+
+        response = client.post("/api/chat/stream", json={"text": "Hello"},
+                               headers={"X-Request-Timeout": "5"})
+
+        assert seen[0] is not None and 0 < seen[0] <= 5
+        assert _parse_sse(response.text)[-1] == ("error", {"error": "Request timed out"})
+
+    def test_stream_holds_admission_slot_until_done(self, client, mock_voice_llm):
+        """Test a streaming response keeps its slot while streaming and frees it after."""
+        from src.utils.admission import AdmissionController
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=0, max_queue_wait_s=1)
+        active_during_stream = []
+
+        async def fake_stream(text):
+            active_during_stream.append(controller.metrics()["active"])
+            yield {"type": "done", "response": "Hi"}
+
+        mock_voice_llm.astream_text_input = fake_stream
+
+        with patch("src.asgi.get_admission_controller", return_value=controller):
+            response = client.post("/api/chat/stream", json={"text": "Hello"})
+
+        assert response.status_code == 200
+        assert active_during_stream == [1]
+        assert controller.metrics()["active"] == 0
+
+    def test_transcribe_stream_removes_upload(self, client, mock_voice_llm):
+        """Test the transcript event is streamed and the upload removed afterwards."""
+        seen = {}
+
+        async def fake_stream(path):
+            seen["path"] = path
+            assert os.path.exists(path)
+            yield {"type": "transcript", "text": "Hello"}
+            yield {"type": "done", "response": "Hi"}
+
+        mock_voice_llm.astream_audio_upload = fake_stream
+
+        response = client.post(
+            "/api/transcribe/stream",
+            files={"audio": ("recording.webm", BytesIO(b"fake audio data"), "audio/webm")},
+        )
+
+        assert _parse_sse(response.text)[0] == ("transcript", {"text": "Hello"})
+        assert not os.path.exists(seen["path"])
+
+    def test_stream_cleanup_runs_if_client_leaves_before_it_starts(self):
+        """Test on_close callbacks run even when the body generator never starts."""
+        import asyncio
+        import src.asgi as asgi_module
+        closed = []
+
+        async def events():
+            yield 'event: done\ndata: {}\n\n'
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            raise OSError("connection reset")
+
+        response = asgi_module._sse_response(events(), on_close=[lambda: closed.append(True)])
+        with pytest.raises(Exception):
+            asyncio.run(response({'type': 'http', 'asgi': {'spec_version': '2.4'}}, receive, send))
+
+        assert closed == [True]
+
+
+class TestASGIMisc:
+    """Tests for settings, clear, audio and admission behaviour."""
+
+    def test_saturated_chat_returns_429(self, client, mock_voice_llm):
+        """Test saturated endpoints shed load with Retry-After."""
+        from src.utils.admission import AdmissionController
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=0, max_queue_wait_s=1)
+        controller.acquire()
+
+        with patch("src.asgi.get_admission_controller", return_value=controller):
+            response = client.post("/api/chat", json={"text": "Hi"})
+
+        assert response.status_code == 429
+        assert "retry-after" in response.headers
+        mock_voice_llm.aprocess_text_input.assert_not_awaited()
+
+    def test_request_span_exported_with_trace_id(self, client):
+        """Test each request gets a root span whose trace ID is returned."""
+        from src.utils import tracing
+        exported = []
+
+        class Collector:
+            def export(self, span):
+                exported.append(span)
+
+            def shutdown(self):
+                pass
+
+        tracing.set_exporters([Collector()])
+        try:
+            response = client.get("/api/settings")
+        finally:
+            tracing.set_exporters(None)
+
+        root = exported[-1]
+        assert root.name == "GET /api/settings"
+        assert root.attributes["http.status_code"] == 200
+        assert response.headers["x-trace-id"] == root.trace_id
+
+    def test_settings(self, client):
+        """Test settings endpoint returns configuration values."""
+        response = client.get("/api/settings")
+        assert response.status_code == 200
+        assert set(response.json()) == {"model", "temperature", "max_tokens", "voice"}
+
+    def test_clear(self, client, mock_voice_llm):
+        """Test clearing memory."""
+        response = client.post("/api/clear")
+        assert response.json() == {"status": "ok"}
+        mock_voice_llm.memory.clear.assert_called_once()
+
+    def test_audio_not_found(self, client):
+        """Test a missing audio file returns 404."""
+        response = client.get("/api/audio/nonexistent.mp3")
+        assert response.status_code == 404
+
+    def test_audio_caching(self, client, tmp_path):
+        """Test ETag, immutable caching, conditional GET and Range on stored audio."""
+        from src.audio import storage
+        temp = tmp_path / "t.mp3"
+        temp.write_bytes(b"0123456789")
+        name = os.path.basename(storage.store_audio(str(temp), output_dir=str(tmp_path)))
+        etag = f'"{name[:-4]}"'
+
+        with patch("src.asgi.resolve_audio", lambda n: storage.resolve_audio(n, str(tmp_path))):
+            full = client.get(f"/api/audio/{name}")
+            cached = client.get(f"/api/audio/{name}", headers={"If-None-Match": f"W/{etag}"})
+            partial = client.get(f"/api/audio/{name}", headers={"Range": "bytes=2-5"})
+
+        assert full.status_code == 200
+        assert full.headers["etag"] == etag
+        assert "immutable" in full.headers["cache-control"]
+        assert cached.status_code == 304
+        assert partial.status_code == 206
+        assert partial.content == b"2345"
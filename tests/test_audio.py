@@ -4,6 +4,10 @@ Uses mocking to avoid requiring actual audio hardware.
 """
 
 import os
+
+# The janitor reads config, which requires an API key at import
+os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
+
 import pytest
 import numpy as np
 from unittest.mock import patch, MagicMock, mock_open
@@ -11,6 +15,7 @@ from unittest.mock import patch, MagicMock, mock_open
 from src.audio.recorder import AudioRecorder
 from src.audio.player import AudioPlayer
 from src.audio.processor import AudioProcessor
+from src.audio import storage
 
 
 # ═══════════════════════════════════════════════════
@@ -206,3 +211,177 @@ class TestAudioProcessor:
         processor = AudioProcessor()
         result = processor.apply_noise_reduction("nonexistent.wav", "output.wav")
         assert result == ""
+
+
+# ═══════════════════════════════════════════════════
+# Audio Storage Tests
+# ═══════════════════════════════════════════════════
+
+class TestAudioStorage:
+    """Tests for content-addressed audio storage."""
+
+    def test_store_audio_uses_sharded_content_hash(self, tmp_path):
+        """Test stored files are named by SHA-256 in a two-character shard."""
+        temp = tmp_path / "tmp.mp3"
+        temp.write_bytes(b"audio bytes")
+
+        final = storage.store_audio(str(temp), output_dir=str(tmp_path))
+
+        digest = storage.file_digest(final)
+        assert final == os.path.join(str(tmp_path), digest[:2], f"{digest}.mp3")
+        assert not temp.exists()
+
+    def test_identical_audio_is_stored_once(self, tmp_path):
+        """Test identical content maps to the same path and distinct content doesn't."""
+        paths = []
+        for i, data in enumerate([b"same", b"same", b"other"]):
+            temp = tmp_path / f"t{i}.mp3"
+            temp.write_bytes(data)
+            paths.append(storage.store_audio(str(temp), output_dir=str(tmp_path)))
+
+        assert paths[0] == paths[1]
+        assert paths[0] != paths[2]
+
+    def test_temp_paths_are_unique(self):
+        """Test two temp paths never collide (e.g. concurrent turns in the same second)."""
+        assert storage.temp_audio_path() != storage.temp_audio_path()
+
+    def test_resolve_audio(self, tmp_path):
+        """Test content-addressed and legacy names resolve; traversal and misses don't."""
+        temp = tmp_path / "t.mp3"
+        temp.write_bytes(b"x")
+        final = storage.store_audio(str(temp), output_dir=str(tmp_path))
+        (tmp_path / "response_1.mp3").write_bytes(b"legacy")
+
+        assert storage.resolve_audio(os.path.basename(final), str(tmp_path)) == final
+        assert storage.resolve_audio("response_1.mp3", str(tmp_path)) == str(tmp_path / "response_1.mp3")
+        assert storage.resolve_audio("../response_1.mp3", str(tmp_path / "sub")) is None
+        assert storage.resolve_audio("missing.mp3", str(tmp_path)) is None
+
+    def test_etag_and_cache_control(self, tmp_path):
+        """Test content-addressed files are immutable and ETags are content hashes."""
+        legacy = tmp_path / "response_1.mp3"
+        legacy.write_bytes(b"legacy")
+        name = "a" * 64 + ".mp3"
+
+        assert storage.audio_etag(name) == "a" * 64
+        assert storage.audio_etag(str(legacy)) == storage.file_digest(str(legacy))
+        assert "immutable" in storage.cache_control(name)
+        assert storage.cache_control(str(legacy)) == storage.REVALIDATE_CACHE_CONTROL
+
+    def test_cache_lifetime_ends_when_janitor_deletes_file(self, tmp_path):
+        """Test immutable audio is not cached past its janitor retention."""
+        stored = tmp_path / ("b" * 64 + ".mp3")
+        stored.write_bytes(b"mp3")
+        hour_old = os.stat(stored).st_mtime - 3600
+        os.utime(stored, (hour_old, hour_old))
+
+        with patch("src.audio.storage.config", MagicMock(JANITOR_ENABLED=True, AUDIO_OUTPUT_MAX_AGE=7200.0)):
+            max_age = int(storage.cache_control(str(stored)).split("max-age=")[1].split(",")[0])
+        with patch("src.audio.storage.config", MagicMock(JANITOR_ENABLED=False)):
+            forever = storage.cache_control(str(stored))
+
+        assert 3500 < max_age <= 3600
+        assert forever == f"public, max-age={storage.IMMUTABLE_MAX_AGE}, immutable"
+
+    def test_audio_bytes_cache_is_bounded_lru(self, tmp_path):
+        """Test cached audio is served from memory and the oldest entry is evicted."""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"{i}.mp3"
+            path.write_bytes(f"audio {i}".encode())
+            paths.append(str(path))
+        cache = storage.AudioBytesCache(max_items=2)
+
+        assert cache.get(paths[0]) == b"audio 0"
+        os.remove(paths[0])
+        assert cache.get(paths[0]) == b"audio 0"  # Served without the file
+        cache.get(paths[1])
+        cache.get(paths[2])
+
+        assert len(cache) == 2
+        assert cache.get(paths[0]) is None  # Evicted, and gone from disk
+        assert cache.get(str(tmp_path / "missing.mp3")) is None
+
+
+# ═══════════════════════════════════════════════════
+# Audio Janitor Tests
+# ═══════════════════════════════════════════════════
+
+class TestAudioJanitor:
+    """Tests for the disk-quota janitor."""
+
+    @staticmethod
+    def _make(path, name, size, mtime):
+        path.mkdir(parents=True, exist_ok=True)
+        file_path = path / name
+        file_path.write_bytes(b"x" * size)
+        os.utime(file_path, (mtime, mtime))
+        return file_path
+
+    def test_removes_expired_files_recursively(self, tmp_path):
+        """Test files past max age are deleted, including in shard subdirectories."""
+        from src.audio.janitor import AudioJanitor, DirectoryQuota
+
+        old = self._make(tmp_path / "ab", "old.mp3", 10, 1000)
+        new = self._make(tmp_path, "new.mp3", 10, 9000)
+        janitor = AudioJanitor([DirectoryQuota(str(tmp_path), max_age_s=3600)])
+
+        reclaimed = janitor.sweep_directory(janitor.quotas[0], now=10000)
+
+        assert reclaimed == 10
+        assert not old.exists()
+        assert new.exists()
+
+    def test_evicts_oldest_first_until_under_quota(self, tmp_path):
+        """Test size eviction removes the oldest files and spares recent ones."""
+        from src.audio.janitor import AudioJanitor, DirectoryQuota
+
+        files = [self._make(tmp_path, f"{i}.mp3", 100, 1000 + i) for i in range(5)]
+        recent = self._make(tmp_path, "recent.mp3", 100, 9990)
+        janitor = AudioJanitor([DirectoryQuota(str(tmp_path), max_bytes=250, min_age_s=60)])
+
+        janitor.sweep_directory(janitor.quotas[0], now=10000)
+
+        assert [f.exists() for f in files] == [False, False, False, False, True]
+        assert recent.exists()
+
+    def test_job_uploads_only_expire_by_age(self):
+        """Test queued job uploads are swept by age alone, never evicted for size."""
+        from src.audio.janitor import INPUT_DIR, AudioJanitor
+        from src.audio.storage import JOB_UPLOAD_DIR
+        from src.utils.config import config
+
+        quotas = {q.path: q for q in AudioJanitor.from_config().quotas}
+
+        assert JOB_UPLOAD_DIR != INPUT_DIR
+        assert quotas[JOB_UPLOAD_DIR].max_bytes == 0
+        assert quotas[JOB_UPLOAD_DIR].max_age_s == config.JOB_UPLOAD_MAX_AGE
+
+    def test_metrics_track_reclaimed_bytes(self, tmp_path):
+        """Test sweeps report files removed and bytes reclaimed per directory."""
+        from src.audio.janitor import AudioJanitor, DirectoryQuota
+
+        self._make(tmp_path, "old.mp3", 42, 0)
+        janitor = AudioJanitor([
+            DirectoryQuota(str(tmp_path), max_age_s=1),
+            DirectoryQuota(str(tmp_path / "missing")),
+        ])
+
+        assert janitor.sweep() == 42
+        metrics = janitor.metrics()
+        assert metrics["runs"] == 1
+        assert metrics["bytes_reclaimed_total"] == 42
+        assert metrics["directories"][str(tmp_path)] == {
+            "files_removed": 1, "bytes_reclaimed": 42, "bytes_used": 0,
+        }
+
+    def test_start_and_stop(self, tmp_path):
+        """Test the background thread sweeps on start and stops cleanly."""
+        from src.audio.janitor import AudioJanitor, DirectoryQuota
+
+        janitor = AudioJanitor([DirectoryQuota(str(tmp_path))], interval_s=60)
+        janitor.start()
+        janitor.stop()
+
+        assert janitor.metrics()["runs"] == 1
@@ -0,0 +1,133 @@
+"""
+Tests for the batch runner (src/batch.py).
+"""
+
+import os
+
+# Set dummy API key BEFORE importing src modules
+os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
+
+import json
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+
+from src.batch import AUDIO, TEXT, BatchItem, BatchRunner, RateLimiter, load_checkpoint, load_items
+
+
+def _pipeline_factory(calls, fail=()):
+    """Returns a factory of mock pipelines echoing their input."""
+    lock = threading.Lock()
+
+    def process_text_input(text):
+        with lock:
+            calls.append(text)
+        if text in fail:
+            raise RuntimeError(f"failed: {text}")
+        return f"echo {text}", f"/audio/{text}.mp3"
+
+    def factory():
+        pipeline = MagicMock()
+        pipeline.process_text_input.side_effect = process_text_input
+        pipeline.process_audio_upload.side_effect = lambda path: ("heard", "reply", "/audio/reply.mp3")
+        return pipeline
+    return factory
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestLoadItems:
+    """Tests for reading batch inputs."""
+
+    def test_jsonl_items(self, tmp_path):
+        """Test JSONL lines become text/audio items; audio paths are relative to the file."""
+        source = tmp_path / "in.jsonl"
+        source.write_text('{"id": "a", "text": "hi"}\n\n{"audio": "clip.wav"}\n')
+
+        items = load_items(str(source))
+
+        assert [(i.id, i.kind) for i in items] == [("a", TEXT), ("3", AUDIO)]
+        assert items[1].value == str(tmp_path / "clip.wav")
+
+    def test_directory_items(self, tmp_path):
+        """Test a directory yields its audio and .txt files; identical audio shares a key."""
+        (tmp_path / "q.txt").write_text("question\n")
+        (tmp_path / "a.wav").write_bytes(b"same")
+        (tmp_path / "b.wav").write_bytes(b"same")
+        (tmp_path / "notes.md").write_text("ignored")
+
+        items = load_items(str(tmp_path))
+
+        assert [i.id for i in items] == ["a.wav", "b.wav", "q.txt"]
+        assert items[0].key == items[1].key
+        assert items[2].value == "question"
+
+    def test_invalid_line_raises(self, tmp_path):
+        """Test a line without text or audio is rejected before anything runs."""
+        source = tmp_path / "in.jsonl"
+        source.write_text('{"id": "a"}\n')
+
+        with pytest.raises(ValueError):
+            load_items(str(source))
+
+
+class TestBatchRunner:
+    """Tests for BatchRunner."""
+
+    def test_processes_items_concurrently_and_dedupes(self, tmp_path):
+        """Test every item gets a result and identical inputs are processed once."""
+        calls = []
+        output = tmp_path / "out.jsonl"
+        items = [BatchItem(str(i), TEXT, text) for i, text in enumerate(["x", "y", "x", "z"])]
+
+        summary = BatchRunner(str(output), concurrency=3, pipeline_factory=_pipeline_factory(calls)).run(items)
+
+        records = {r["id"]: r for r in _read(output)}
+        assert sorted(calls) == ["x", "y", "z"]
+        assert records["2"]["response"] == "echo x"
+        assert records["2"]["duplicate_of"] == "0"
+        assert summary.succeeded == 4 and summary.duplicates == 1 and summary.failed == 0
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        """Test a rerun skips finished items, retries failed ones and survives a torn last line."""
+        calls = []
+        output = tmp_path / "out.jsonl"
+        items = [BatchItem(str(i), TEXT, text) for i, text in enumerate(["x", "y", "z"])]
+        BatchRunner(str(output), pipeline_factory=_pipeline_factory(calls, fail={"y"})).run(items[:2])
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"id": "2", "sta')  # Crashed mid-write
+
+        calls.clear()
+        summary = BatchRunner(str(output), pipeline_factory=_pipeline_factory(calls)).run(items)
+
+        assert sorted(calls) == ["y", "z"]
+        assert summary.already_done == 1
+        assert {k: r["status"] for k, r in load_checkpoint(str(output)).items()} == {"0": "ok", "1": "ok", "2": "ok"}
+
+    def test_reuses_result_of_identical_finished_input(self, tmp_path):
+        """Test a new ID whose input was already processed copies that result."""
+        calls = []
+        output = tmp_path / "out.jsonl"
+        BatchRunner(str(output), pipeline_factory=_pipeline_factory(calls)).run([BatchItem("a", TEXT, "x")])
+
+        BatchRunner(str(output), pipeline_factory=_pipeline_factory(calls)).run([BatchItem("b", TEXT, "x")])
+
+        assert calls == ["x"]
+        assert load_checkpoint(str(output))["b"]["duplicate_of"] == "a"
+
+
+class TestRateLimiter:
+    """Tests for the token bucket."""
+
+    def test_limits_rate_after_burst(self):
+        """Test acquisitions beyond the burst are spaced at the configured rate."""
+        limiter = RateLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+
+        assert time.monotonic() - start >= 0.05
@@ -0,0 +1,118 @@
+"""
+Tests for the background job manager (src/jobs.py).
+"""
+
+import os
+
+# Set dummy API key BEFORE importing src modules
+os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
+
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.jobs import JobManager, transcription_job, QUEUED, SUCCEEDED, FAILED
+from src.utils.exceptions import AdmissionRejectedError
+
+
+def _wait(manager, job_id):
+    """Polls until the job has finished."""
+    for _ in range(500):
+        job = manager.get(job_id)
+        if job.finished_at is not None:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestJobManager:
+    """Tests for JobManager."""
+
+    def test_successful_job_stores_result(self):
+        """Test a job's return value becomes its result."""
+        manager = JobManager(max_workers=1)
+        job = manager.submit(lambda: {"answer": 42})
+
+        finished = _wait(manager, job.id)
+
+        assert finished.status == SUCCEEDED
+        assert finished.to_dict()["result"] == {"answer": 42}
+        assert manager.metrics()["succeeded"] == 1
+
+    def test_failed_job_records_error(self):
+        """Test an exception marks the job failed with its message."""
+        def boom():
+            raise RuntimeError("boom")
+
+        manager = JobManager(max_workers=1)
+        finished = _wait(manager, manager.submit(boom).id)
+
+        assert finished.status == FAILED
+        assert finished.error == "boom"
+
+    def test_rejects_when_too_many_pending(self):
+        """Test submissions beyond max_pending are rejected with 429."""
+        gate = threading.Event()
+        manager = JobManager(max_workers=1, max_pending=1)
+        job = manager.submit(lambda: gate.wait(5) and {})
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            manager.submit(lambda: {})
+
+        assert exc_info.value.status_code == 429
+        gate.set()
+        _wait(manager, job.id)
+
+    def test_finished_jobs_expire(self):
+        """Test finished jobs are forgotten after the retention period."""
+        manager = JobManager(max_workers=1, retention_s=60)
+        job = _wait(manager, manager.submit(lambda: {}).id)
+
+        with patch("src.jobs.time.time", return_value=job.finished_at + 61):
+            assert manager.get(job.id) is None
+        assert manager.metrics()["expired"] == 1
+
+    def test_new_job_is_queued(self):
+        """Test a freshly submitted job reports the queued state."""
+        gate = threading.Event()
+        manager = JobManager(max_workers=1)
+        manager.submit(lambda: gate.wait(5) and {})
+        job = manager.submit(lambda: {})
+
+        assert job.status == QUEUED
+        gate.set()
+        _wait(manager, job.id)
+
+
+class TestTranscriptionJob:
+    """Tests for the audio transcription job."""
+
+    def test_runs_pipeline_and_removes_upload(self, tmp_path):
+        """Test the job returns the /api/transcribe fields and deletes the upload."""
+        upload = tmp_path / "job.webm"
+        upload.write_bytes(b"audio")
+        voice_llm = MagicMock()
+        voice_llm.process_audio_upload.return_value = ("hi", "hello", "data/audio/output/ab/abc.mp3")
+
+        result = transcription_job(lambda: voice_llm, str(upload))()
+
+        assert result == {"transcription": "hi", "response": "hello", "audio_url": "/api/audio/abc.mp3"}
+        assert not upload.exists()
+        voice_llm.close.assert_called_once()
+
+    def test_each_job_gets_its_own_pipeline(self, tmp_path):
+        """Test jobs don't share a VoiceLLM (and so its conversation memory)."""
+        pipelines = []
+
+        def new_pipeline():
+            pipeline = MagicMock()
+            pipeline.process_audio_upload.return_value = ("hi", "hello", None)
+            pipelines.append(pipeline)
+            return pipeline
+
+        for name in ("a.webm", "b.webm"):
+            (tmp_path / name).write_bytes(b"audio")
+            transcription_job(new_pipeline, str(tmp_path / name))()
+
+        assert len(pipelines) == 2
+        assert all(p.process_audio_upload.call_count == 1 for p in pipelines)
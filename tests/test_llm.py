@@ -20,8 +20,13 @@ from src.llm.memory import (
     load_conversation,
     list_saved_conversations,
 )
-from src.llm.prompts import get_default_prompt, get_creative_prompt, get_technical_prompt
-from src.llm.chains import get_conversation_chain
+from src.llm.prompts import (
+    PromptRegistry,
+    get_default_prompt,
+    get_creative_prompt,
+    get_technical_prompt,
+)
+from src.llm.chains import ChainPool, get_conversation_chain
 
 
 # ═══════════════════════════════════════════════════
@@ -139,6 +144,87 @@ class TestPrompts:
         assert creative is not technical
 
 
+class TestPromptRegistry:
+    """Tests for the cached, hot-reloading prompt registry."""
+
+    def test_loads_prompt_from_file(self, tmp_path):
+        """Test the system prompt text comes from <name>.txt."""
+        (tmp_path / "pirate.txt").write_text("You are a pirate.")
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=0)
+
+        prompt = registry.get("pirate")
+
+        assert prompt.messages[0].prompt.template == "You are a pirate."
+        assert len(prompt.messages) == 3
+
+    def test_braces_in_prompt_file_are_literal(self, tmp_path):
+        """Test JSON-like text in a prompt file doesn't become a template variable."""
+        (tmp_path / "json.txt").write_text('Reply as {"a": 1}.')
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=0)
+
+        prompt = registry.get("json")
+
+        assert set(prompt.input_variables) == {"chat_history", "input"}
+        messages = prompt.format_messages(chat_history=[], input="Hi")
+        assert messages[0].content == 'Reply as {"a": 1}.'
+
+    def test_caches_compiled_template(self, tmp_path):
+        """Test repeated lookups return the same compiled object."""
+        (tmp_path / "default.txt").write_text("Be brief.")
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=60)
+
+        assert registry.get("default") is registry.get("default")
+
+    def test_hot_reloads_changed_file(self, tmp_path):
+        """Test an edited prompt file is recompiled on the next lookup."""
+        path = tmp_path / "default.txt"
+        path.write_text("Version one.")
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=0)
+        first = registry.get("default")
+
+        path.write_text("Version two.")
+        mtime = os.stat(path).st_mtime
+        os.utime(path, (mtime, mtime + 10))  # Ensure the mtime visibly changes
+        second = registry.get("default")
+
+        assert second is not first
+        assert second.messages[0].prompt.template == "Version two."
+
+    def test_failed_reload_keeps_previous_template(self, tmp_path):
+        """Test a prompt edit that fails to compile doesn't break later lookups."""
+        path = tmp_path / "default.txt"
+        path.write_text("Version one.")
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=0)
+        first = registry.get("default")
+
+        path.write_text("Version two.")
+        mtime = os.stat(path).st_mtime
+        os.utime(path, (mtime, mtime + 10))
+        with patch("src.llm.prompts.build_chat_prompt", side_effect=ValueError("bad template")):
+            assert registry.get("default") is first
+            assert registry.get("default") is first
+
+    def test_empty_file_falls_back_to_builtin(self, tmp_path):
+        """Test an empty prompt file uses the built-in text."""
+        (tmp_path / "creative.txt").write_text("")
+        registry = PromptRegistry(prompts_dir=str(tmp_path), reload_interval=0)
+
+        prompt = registry.get("creative")
+        assert "creative" in prompt.messages[0].prompt.template
+
+    def test_unknown_prompt_raises(self, tmp_path):
+        """Test looking up a prompt with no file and no built-in raises KeyError."""
+        registry = PromptRegistry(prompts_dir=str(tmp_path))
+        with pytest.raises(KeyError):
+            registry.get("does-not-exist")
+
+    def test_names_lists_files_and_builtins(self, tmp_path):
+        """Test names() includes both prompt files and built-in prompts."""
+        (tmp_path / "pirate.txt").write_text("Arr.")
+        registry = PromptRegistry(prompts_dir=str(tmp_path))
+        assert {"default", "creative", "technical", "pirate"} <= set(registry.names())
+
+
 # ═══════════════════════════════════════════════════
 # Chains Tests
 # ═══════════════════════════════════════════════════
@@ -207,6 +293,44 @@ class TestConversationChain:
         assert chain_quiet.verbose is False
 
 
+class TestChainPool:
+    """Tests for the shared LLM client / chain pool."""
+
+    @patch("src.llm.chains.get_llm_for_profile")
+    def test_llm_created_once_per_profile(self, mock_get_llm):
+        """Test the pool reuses one LLM client per profile."""
+        mock_get_llm.side_effect = lambda profile: FakeListLLM(responses=[profile.name])
+        pool = ChainPool(profiles=_profiles())
+
+        first = pool.get_llm("fast")
+        second = pool.get_llm("fast")
+
+        assert first is second
+        assert mock_get_llm.call_count == 1
+
+    @patch("src.llm.chains.get_llm_for_profile")
+    def test_persona_chains_share_client(self, mock_get_llm):
+        """Test chains for different personas share the same LLM client."""
+        mock_get_llm.return_value = FakeListLLM(responses=["test"])
+        pool = ChainPool(profiles=_profiles())
+        memory = get_conversation_memory()
+
+        creative = pool.get_chain(memory, persona="creative")
+        technical = pool.get_chain(memory, persona="technical")
+
+        assert creative.llm is technical.llm
+        assert creative.prompt is not technical.prompt
+        # Pydantic shallow-copies the memory wrapper; the history object is shared
+        assert creative.memory.chat_memory is memory.chat_memory
+        mock_get_llm.assert_called_once()
+
+    def test_unknown_profile_raises(self):
+        """Test requesting an undefined profile raises KeyError."""
+        pool = ChainPool(profiles=_profiles())
+        with pytest.raises(KeyError):
+            pool.get_llm("missing")
+
+
 # ═══════════════════════════════════════════════════
 # Persistence Tests
 # ═══════════════════════════════════════════════════
@@ -244,3 +368,193 @@ class TestConversationPersistence:
         assert len(result) == 2
         assert all(f.endswith(".json") for f in result)
 
+
+# ═══════════════════════════════════════════════════
+# Model Profile & Routing Tests
+# ═══════════════════════════════════════════════════
+
+from src.llm.models import ModelProfile, load_model_profiles, load_routing_settings
+from src.llm.router import ModelRouter
+
+MODELS_YAML = """
+default_model:
+  name: gpt-3.5-turbo
+gpt-4o-mini:
+  name: gpt-4o-mini
+  max_tokens: 200
+  temperature: 0.5
+gpt-4-turbo:
+  name: gpt-4-turbo
+  max_tokens: 300
+routing:
+  fast_profile: gpt-4o-mini
+  heavy_profile: gpt-4-turbo
+  latency_budget_s: 2.0
+"""
+
+
+def _profiles():
+    return {
+        "default_model": ModelProfile("default_model", "gpt-3.5-turbo", 150, 0.7),
+        "fast": ModelProfile("fast", "gpt-4o-mini", 200, 0.5),
+        "heavy": ModelProfile("heavy", "gpt-4-turbo", 300, 0.6),
+    }
+
+
+class TestModelProfiles:
+    """Tests for loading model profiles from models.yaml."""
+
+    def test_load_profiles_from_yaml(self, tmp_path):
+        """Test profiles are parsed and missing fields fall back to config."""
+        path = tmp_path / "models.yaml"
+        path.write_text(MODELS_YAML)
+
+        profiles = load_model_profiles(str(path))
+
+        assert set(profiles) == {"default_model", "gpt-4o-mini", "gpt-4-turbo"}
+        assert profiles["gpt-4o-mini"].max_tokens == 200
+        assert profiles["gpt-4o-mini"].temperature == 0.5
+        assert "routing" not in profiles
+
+    def test_missing_file_yields_default_only(self, tmp_path):
+        """Test a missing config file still yields the default profile."""
+        profiles = load_model_profiles(str(tmp_path / "missing.yaml"))
+        assert list(profiles) == ["default_model"]
+
+    def test_load_routing_settings(self, tmp_path):
+        """Test the routing section is returned separately."""
+        path = tmp_path / "models.yaml"
+        path.write_text(MODELS_YAML)
+
+        settings = load_routing_settings(str(path))
+        assert settings["fast_profile"] == "gpt-4o-mini"
+
+
+class TestModelRouter:
+    """Tests for the latency-aware model router."""
+
+    def test_short_input_routes_to_fast(self):
+        """Test chit-chat goes to the fast profile."""
+        router = ModelRouter(_profiles(), fast_profile="fast", heavy_profile="heavy")
+        assert router.route("Hi there!").profile.key == "fast"
+
+    def test_complex_input_routes_to_heavy(self):
+        """Test analytical questions go to the heavy profile."""
+        router = ModelRouter(_profiles(), fast_profile="fast", heavy_profile="heavy")
+        decision = router.route(
+            "Can you explain step by step how TCP congestion control works "
+            "and compare it with the approach QUIC takes?"
+        )
+        assert decision.profile.key == "heavy"
+        assert decision.reason == "complex"
+
+    def test_slow_heavy_model_falls_back(self):
+        """Test a heavy profile over its latency budget is skipped."""
+        router = ModelRouter(_profiles(), fast_profile="fast", heavy_profile="heavy",
+                             latency_budget_s=1.0)
+        for _ in range(3):
+            router.record_latency("heavy", 5.0)
+
+        decision = router.route("Explain and compare the difference between TCP and UDP?")
+        assert decision.profile.key != "heavy"
+        assert decision.reason == "latency_fallback"
+
+    def test_slow_profile_recovers_when_samples_expire(self):
+        """Test a skipped profile is chosen again once its slow samples age out."""
+        router = ModelRouter(_profiles(), fast_profile="fast", heavy_profile="heavy",
+                             latency_budget_s=1.0, latency_max_age_s=60)
+        question = "Explain and compare the difference between TCP and UDP?"
+        with patch("src.llm.router.time.monotonic", return_value=1000.0):
+            router.record_latency("heavy", 5.0)
+            assert router.route(question).profile.key != "heavy"
+        with patch("src.llm.router.time.monotonic", return_value=1061.0):
+            assert router.route(question).profile.key == "heavy"
+            assert router.metrics()["rolling_median_latency_s"]["heavy"] is None
+
+    def test_metrics_count_decisions(self):
+        """Test routing decisions are exposed in metrics."""
+        router = ModelRouter(_profiles(), fast_profile="fast", heavy_profile="heavy")
+        router.route("Hello")
+        router.route("Hey")
+
+        metrics = router.metrics()
+        assert metrics["decisions"]["fast"] == 2
+        assert metrics["last_decision"]["profile"] == "fast"
+
+    def test_unknown_profile_raises(self):
+        """Test configuring an unknown profile name raises ValueError."""
+        with pytest.raises(ValueError):
+            ModelRouter(_profiles(), fast_profile="nope")
+
+
+# ═══════════════════════════════════════════════════
+# Speculative Generation Tests
+# ═══════════════════════════════════════════════════
+
+from src.llm.speculative import SpeculativeGenerator, same_transcript
+
+
+class TestSpeculativeGenerator:
+    """Tests for speculative generation on partial transcripts."""
+
+    def test_same_transcript_ignores_case_and_punctuation(self):
+        """Test transcripts differing only in casing/punctuation are the same."""
+        assert same_transcript("Hello, how are you?", "hello how are you")
+        assert not same_transcript("what time is it", "tell me a joke about cats")
+
+    def test_matching_transcript_keeps_provisional_response(self):
+        """Test a final transcript with nothing new returns the provisional answer."""
+        generator = SpeculativeGenerator(lambda text, decision: f"answer to {text}")
+
+        speculation = generator.start("what is the capital of France")
+        response = generator.resolve(speculation, "What is the capital of France?")
+
+        assert response == "answer to what is the capital of France"
+        metrics = generator.metrics()
+        assert metrics["hits"] == 1
+        assert metrics["hit_rate"] == 1.0
+        generator.shutdown()
+
+    def test_mismatched_transcript_discards_response(self):
+        """Test a diverging final transcript discards the speculation."""
+        generator = SpeculativeGenerator(lambda text, decision: "provisional")
+
+        speculation = generator.start("what is the capital")
+        response = generator.resolve(speculation, "what is the capital of France and Spain")
+
+        assert response is None
+        assert generator.metrics()["misses"] == 1
+        generator.shutdown()
+
+    def test_final_transcript_extending_the_partial_discards_it(self):
+        """Test an answer to the start of the question is not kept for the whole question."""
+        final = "Can you tell me what the weather will be like in Paris tomorrow morning?"
+        partial = "Can you tell me what the weather will be like in Par"
+        generator = SpeculativeGenerator(lambda text, decision: ("provisional", decision))
+
+        speculation = generator.start(partial, decision="fast")
+
+        assert generator.resolve(speculation, final) is None
+        assert speculation.decision == "fast"
+        assert generator.resolve(generator.start(final.lower().rstrip("?")), final) == ("provisional", None)
+        generator.shutdown()
+
+    def test_failed_generation_counts_as_error(self):
+        """Test an exception in the provisional generation falls back cleanly."""
+        def boom(text, decision):
+            raise RuntimeError("LLM down")
+
+        generator = SpeculativeGenerator(boom)
+        speculation = generator.start("hello there")
+
+        assert generator.resolve(speculation, "hello there") is None
+        assert generator.metrics()["errors"] == 1
+        generator.shutdown()
+
+    def test_blank_partial_is_not_speculated(self):
+        """Test blank partial transcripts don't start a generation."""
+        generator = SpeculativeGenerator(lambda text, decision: "x")
+        assert generator.start("   ") is None
+        assert generator.resolve(None, "final") is None
+        assert generator.metrics()["attempts"] == 0
+        generator.shutdown()
@@ -2,8 +2,11 @@
 Tests for the utils module (config, helpers, logger).
 """
 
+import asyncio
+import json
 import os
 import logging
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -191,3 +194,397 @@ class TestLogger:
 
         root_logger = logging.getLogger()
         assert root_logger.level == logging.INFO
+
+    @patch("src.utils.logger.config")
+    def test_records_are_queued_with_context(self, mock_config, tmp_path):
+        """Test log calls only enqueue; the listener writes JSON lines with context fields."""
+        mock_config.DEBUG = False
+        mock_config.LOG_FORMAT = "text"
+        mock_config.LOG_DEBUG_SAMPLE_RATE = 1.0
+
+        from src.utils.logger import log_context, setup_logging, shutdown_logging
+        from src.utils.tracing import span
+        setup_logging(log_file="ctx.log", log_dir=str(tmp_path))
+        assert [type(h).__name__ for h in logging.getLogger().handlers] == ["QueueHandler"]
+
+        with span("request") as root, log_context(path="/api/chat"):
+            logging.getLogger("src.test").info("handled %s", "turn")
+        shutdown_logging()  # Flushes the queue
+
+        with open(os.path.join(str(tmp_path), "ctx.log"), encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        entry = next(e for e in entries if e["logger"] == "src.test")
+        assert entry["message"] == "handled turn"
+        assert entry["path"] == "/api/chat"
+        assert entry["trace_id"] == root.trace_id
+
+    def test_debug_sampler(self):
+        """Test debug records are sampled per trace and INFO+ is never dropped."""
+        from src.utils.logger import DebugSampler
+
+        def record(level, trace_id=None):
+            rec = logging.LogRecord("src", level, __file__, 1, "msg", (), None)
+            if trace_id:
+                rec.trace_id = trace_id
+            return rec
+
+        assert DebugSampler(0.0).filter(record(logging.INFO))
+        assert not DebugSampler(0.0).filter(record(logging.DEBUG))
+
+        sampler = DebugSampler(0.5)
+        trace_ids = [f"{i:032x}" for i in range(200)]
+        kept = [t for t in trace_ids if sampler.filter(record(logging.DEBUG, t))]
+        assert 50 < len(kept) < 150
+        # Same decision for every record of a trace
+        assert all(sampler.filter(record(logging.DEBUG, t)) for t in kept)
+
+
+# ═══════════════════════════════════════════════════
+# Admission Control Tests
+# ═══════════════════════════════════════════════════
+
+class TestAdmissionController:
+    """Tests for the bounded worker pool with admission control."""
+
+    @staticmethod
+    def _controller(**kwargs):
+        os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
+        from src.utils.admission import AdmissionController
+        options = {"max_concurrency": 1, "max_queue": 1, "max_queue_wait_s": 0.05}
+        options.update(kwargs)
+        return AdmissionController("test", **options)
+
+    def test_admits_up_to_concurrency(self):
+        """Test free slots are taken without queuing."""
+        controller = self._controller(max_concurrency=2)
+        assert controller.acquire() == 0.0
+        assert controller.acquire() == 0.0
+        assert controller.metrics()["active"] == 2
+
+    def test_rejects_with_429_when_queue_full(self):
+        """Test a request beyond the queue limit is shed immediately."""
+        from src.utils.exceptions import AdmissionRejectedError
+        controller = self._controller(max_queue=0)
+        controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            controller.acquire()
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after >= 1
+        assert controller.metrics()["rejected_queue_full"] == 1
+
+    def test_rejects_with_503_after_queue_wait(self):
+        """Test a queued request gives up after the max queue wait."""
+        from src.utils.exceptions import AdmissionRejectedError
+        controller = self._controller()
+        controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            controller.acquire()
+
+        assert exc_info.value.status_code == 503
+        metrics = controller.metrics()
+        assert metrics["rejected_timeout"] == 1
+        assert metrics["queued"] == 0
+
+    def test_release_hands_slot_to_waiter(self):
+        """Test a queued thread is admitted when a slot is released."""
+        import threading
+        controller = self._controller(max_queue_wait_s=5)
+        controller.acquire()
+        waited = []
+        waiter = threading.Thread(target=lambda: waited.append(controller.acquire()))
+        waiter.start()
+        while controller.metrics()["queued"] == 0:
+            pass
+
+        controller.release(0.5)
+        waiter.join(timeout=5)
+
+        assert waited and waited[0] > 0
+        metrics = controller.metrics()
+        assert metrics["active"] == 1
+        assert metrics["admitted"] == 2
+
+    def test_async_waiter_is_admitted(self):
+        """Test the async path waits on the event loop and is handed the slot."""
+        import asyncio
+        controller = self._controller(max_queue_wait_s=5)
+
+        async def scenario():
+            await controller.aacquire()
+            waiter = asyncio.create_task(controller.aacquire())
+            await asyncio.sleep(0.01)
+            assert controller.metrics()["queued"] == 1
+            controller.release()
+            return await waiter
+
+        assert asyncio.run(scenario()) > 0
+        assert controller.metrics()["active"] == 1
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        """Test a disconnected client doesn't keep its place or leak a slot."""
+        import asyncio
+        controller = self._controller(max_queue_wait_s=5)
+
+        async def scenario():
+            await controller.aacquire()
+            waiter = asyncio.create_task(controller.aacquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            controller.release()
+
+        asyncio.run(scenario())
+        metrics = controller.metrics()
+        assert metrics["queued"] == 0
+        assert metrics["active"] == 0
+
+
+# ═══════════════════════════════════════════════════
+# Metrics Registry Tests
+# ═══════════════════════════════════════════════════
+
+class TestMetricsRegistry:
+    """Tests for the in-process Prometheus metrics registry."""
+
+    def test_counter_renders_with_labels(self):
+        """Test counters accumulate per label set and render in text format."""
+        from src.utils.metrics import MetricsRegistry
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests.", ["endpoint"])
+
+        counter.inc(endpoint="chat")
+        counter.inc(2, endpoint="chat")
+
+        assert counter.value(endpoint="chat") == 3
+        output = registry.render()
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{endpoint="chat"} 3' in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram observations fill cumulative le buckets, sum and count."""
+        from src.utils.metrics import MetricsRegistry
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stages.", ["stage"], buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, stage="generate")
+
+        output = registry.render()
+        assert 'stage_seconds_bucket{stage="generate",le="0.1"} 1' in output
+        assert 'stage_seconds_bucket{stage="generate",le="1"} 2' in output
+        assert 'stage_seconds_bucket{stage="generate",le="+Inf"} 3' in output
+        assert 'stage_seconds_count{stage="generate"} 3' in output
+        assert histogram.snapshot(stage="generate") == (3, 5.55)
+
+    def test_histogram_time_records_on_error(self):
+        """Test the timing context manager observes even when the body raises."""
+        from src.utils.metrics import Histogram
+        histogram = Histogram("h", "H.", ["stage"])
+
+        with pytest.raises(RuntimeError):
+            with histogram.time(stage="transcribe"):
+                raise RuntimeError("boom")
+
+        assert histogram.snapshot(stage="transcribe")[0] == 1
+
+    def test_wrong_labels_rejected(self):
+        """Test observations with the wrong label names raise ValueError."""
+        from src.utils.metrics import Counter
+        with pytest.raises(ValueError):
+            Counter("c", "C.", ["endpoint"]).inc(stage="x")
+
+    def test_callback_gauge(self):
+        """Test callback gauges are read at render time."""
+        from src.utils.metrics import MetricsRegistry
+        registry = MetricsRegistry()
+        depth = {"chat": 4}
+        registry.gauge_callback("queue_depth", "Depth.", ["group"],
+                                lambda: [({"group": g}, v) for g, v in depth.items()])
+
+        depth["chat"] = 7
+
+        assert 'queue_depth{group="chat"} 7' in registry.render()
+
+
+# ═══════════════════════════════════════════════════
+# Tracing Tests
+# ═══════════════════════════════════════════════════
+
+class _CollectingExporter:
+    """Span exporter keeping finished spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def span_exporter():
+    """Routes finished spans to an in-memory exporter for the test."""
+    from src.utils import tracing
+    exporter = _CollectingExporter()
+    tracing.set_exporters([exporter])
+    yield exporter
+    tracing.set_exporters(None)
+
+
+class TestTracing:
+    """Tests for span nesting, export and the waterfall renderer."""
+
+    def test_nested_spans_share_trace(self, span_exporter):
+        """Test child spans join the parent's trace and are exported innermost first."""
+        from src.utils.tracing import current_span, span
+        with span("turn") as root:
+            with span("transcribe") as child:
+                assert current_span() is child
+            assert current_span() is root
+
+        assert current_span() is None
+        child_span, root_span = span_exporter.spans
+        assert child_span.trace_id == root_span.trace_id
+        assert child_span.parent_id == root_span.span_id
+        assert root_span.parent_id is None
+
+    def test_error_marks_span(self, span_exporter):
+        """Test an exception marks the span failed and propagates."""
+        from src.utils.tracing import span
+        with pytest.raises(RuntimeError):
+            with span("generate"):
+                raise RuntimeError("boom")
+
+        assert span_exporter.spans[0].status == "error"
+        assert "boom" in span_exporter.spans[0].attributes["error"]
+
+    def test_context_propagates_to_threads(self, span_exporter):
+        """Test asyncio.to_thread keeps the current trace."""
+        from src.utils.tracing import span
+
+        def work():
+            with span("worker"):
+                pass
+
+        async def run():
+            with span("request"):
+                await asyncio.to_thread(work)
+
+        asyncio.run(run())
+        worker, request = span_exporter.spans
+        assert worker.parent_id == request.span_id
+
+    def test_parse_trace_headers(self):
+        """Test traceparent and X-Trace-Id headers are honoured, garbage ignored."""
+        from src.utils.tracing import parse_trace_headers
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+        assert parse_trace_headers({"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}) == (
+            trace_id, "00f067aa0ba902b7"
+        )
+        assert parse_trace_headers({"x-trace-id": trace_id.upper()}) == (trace_id, None)
+        assert parse_trace_headers({"x-trace-id": "not-a-trace"}) == (None, None)
+
+    def test_jsonl_exporter_rotates(self, tmp_path):
+        """Test spans are written as JSON lines and the file rotates at max_bytes."""
+        from src.utils.tracing import JsonlSpanExporter, Span, load_spans
+        path = str(tmp_path / "spans.jsonl")
+        exporter = JsonlSpanExporter(path, max_bytes=600, backup_count=2)
+
+        for i in range(6):
+            s = Span(name=f"span-{i}", trace_id="a" * 32)
+            s.end_time = s.start_time
+            exporter.export(s)
+        exporter.shutdown()
+
+        assert os.path.exists(path + ".1")
+        assert not os.path.exists(path + ".3")
+        names = {s["name"] for s in load_spans(path)}
+        assert "span-5" in names
+
+    def test_jsonl_exporter_writes_in_the_background(self, tmp_path):
+        """Test export only queues the span and each process gets its own file."""
+        import threading
+        from src.utils.tracing import JsonlSpanExporter, Span, _process_path, load_spans
+        path = str(tmp_path / "spans.jsonl")
+        exporter = JsonlSpanExporter(_process_path(path))
+        writers = []
+        write = exporter._write
+        s = Span(name="turn", trace_id="a" * 32)
+        s.end_time = s.start_time
+
+        with patch.object(exporter, "_write", lambda spans: (writers.append(threading.current_thread()), write(spans))):
+            exporter.export(s)
+            exporter.shutdown()
+
+        assert threading.current_thread() not in writers
+        assert os.path.basename(exporter.path) == f"spans.{os.getpid()}.jsonl"
+        assert [span["name"] for span in load_spans(path)] == ["turn"]
+
+    def test_render_waterfall(self):
+        """Test the waterfall indents children and shows durations and retries."""
+        from src.utils.tracing import render_waterfall
+        spans = [
+            {"trace_id": "t", "span_id": "a", "parent_id": None, "name": "POST /api/chat",
+             "start_time": 0.0, "end_time": 2.0, "duration_ms": 2000.0, "status": "ok", "events": []},
+            {"trace_id": "t", "span_id": "b", "parent_id": "a", "name": "openai.chat",
+             "start_time": 0.5, "end_time": 1.5, "duration_ms": 1000.0, "status": "error",
+             "events": [{"name": "retry", "time": 1.0, "attributes": {}}]},
+        ]
+
+        lines = render_waterfall(spans, width=20).splitlines()
+
+        assert lines[1].startswith("POST /api/chat")
+        assert "|" + "█" * 20 + "|" in lines[1]
+        assert lines[2].startswith("  openai.chat")
+        assert "|     " + "█" * 10 in lines[2]
+        assert lines[2].endswith("1000.0 ms  !  (1 retry)")
+
+
+# ═══════════════════════════════════════════════════
+# Deadline Tests
+# ═══════════════════════════════════════════════════
+
+from src.utils import deadline as turn
+from src.utils.exceptions import DeadlineExceededError
+
+
+class TestDeadline:
+    """Tests for per-turn deadlines."""
+
+    def test_no_deadline_by_default(self):
+        """Test there is no deadline outside a deadline block."""
+        assert turn.remaining() is None
+        assert turn.has_time_for(1000)
+        turn.check("generate")
+
+    def test_nested_deadline_only_shortens(self):
+        """Test an inner deadline can shorten the turn but not extend it."""
+        with turn.deadline(10):
+            with turn.deadline(60):
+                assert turn.remaining() <= 10
+            with turn.deadline(1):
+                assert turn.remaining() <= 1
+                assert not turn.has_time_for(2)
+            assert 1 < turn.remaining() <= 10
+        assert turn.remaining() is None
+
+    def test_expired_deadline_fails_check(self):
+        """Test check raises once the deadline has passed."""
+        with turn.deadline(0.001):
+            time.sleep(0.01)
+            assert turn.expired()
+            with pytest.raises(DeadlineExceededError):
+                turn.check("transcribe")
+
+    def test_parse_timeout(self):
+        """Test header values parse to positive seconds or None."""
+        assert turn.parse_timeout("2.5") == 2.5
+        assert turn.parse_timeout(None) is None
+        assert turn.parse_timeout("soon") is None
+        assert turn.parse_timeout("0") is None
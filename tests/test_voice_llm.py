@@ -8,13 +8,22 @@ import os
 # Set dummy API key BEFORE importing src modules
 os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
 
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 
 
+@pytest.fixture(autouse=True)
+def mock_store_audio():
+    """Synthesis is mocked, so there is no file to move into the audio store."""
+    with patch("src.voice_llm.store_audio", side_effect=lambda path: path) as mock_store:
+        yield mock_store
+
+
 class TestVoiceLLM:
     """Tests for VoiceLLM orchestrator class."""
 
+    @patch("src.voice_llm._directories_ready", False)
     @patch("src.voice_llm.AudioPlayer")
     @patch("src.voice_llm.AudioRecorder")
     @patch("src.voice_llm.OpenAIClient")
@@ -33,6 +42,27 @@ class TestVoiceLLM:
         mock_makedirs.assert_called()
         mock_chain_fn.assert_called_once()
 
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_headless_has_no_audio_devices(self, mock_makedirs, mock_chain_fn,
+                                           mock_client, mock_recorder, mock_player):
+        """Test a headless VoiceLLM never creates the recorder or player."""
+        from src.voice_llm import VoiceLLM
+        from src.utils.exceptions import VoiceLLMError
+
+        llm_app = VoiceLLM(headless=True)
+
+        with pytest.raises(VoiceLLMError):
+            llm_app.audio_recorder
+        with pytest.raises(VoiceLLMError):
+            llm_app.start_conversation()
+        llm_app.close()
+        mock_recorder.assert_not_called()
+        mock_player.assert_not_called()
+
     @patch("src.voice_llm.AudioPlayer")
     @patch("src.voice_llm.AudioRecorder")
     @patch("src.voice_llm.OpenAIClient")
@@ -105,6 +135,8 @@ class TestVoiceLLM:
         result = llm_app._synthesize_speech("Hello world")
 
         assert result == "data/audio/output/response.mp3"
+        temp_path = mock_client_instance.synthesize_speech.call_args.args[1]
+        assert temp_path.startswith(os.path.join("data", "audio", "output", "tmp"))
 
     @patch("src.voice_llm.AudioPlayer")
     @patch("src.voice_llm.AudioRecorder")
@@ -186,7 +218,288 @@ class TestVoiceLLM:
         from src.voice_llm import VoiceLLM
 
         llm_app = VoiceLLM()
+        # Audio devices are opened on first use only
+        mock_recorder_cls.assert_not_called()
+        mock_player_cls.assert_not_called()
+        llm_app.audio_recorder, llm_app.audio_player
         llm_app.close()
 
         mock_recorder_cls.return_value.close.assert_called_once()
         mock_player_cls.return_value.close.assert_called_once()
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_chain_pool")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_set_persona_reuses_pooled_chain(self, mock_makedirs, mock_chain_fn,
+                                             mock_pool_fn, mock_client,
+                                             mock_recorder, mock_player):
+        """Test persona switches build each chain once and keep the memory."""
+        from src.voice_llm import VoiceLLM
+
+        mock_pool = mock_pool_fn.return_value
+        creative_chain = MagicMock()
+        mock_pool.get_chain.return_value = creative_chain
+
+        llm_app = VoiceLLM()
+        default_chain = llm_app.conversation_chain
+
+        llm_app.set_persona("creative")
+        assert llm_app.conversation_chain is creative_chain
+        llm_app.set_persona("default")
+        assert llm_app.conversation_chain is default_chain
+        llm_app.set_persona("creative")
+
+        mock_pool.get_chain.assert_called_once()
+        assert mock_pool.get_chain.call_args.args[0] is llm_app.memory
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_chain_pool")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_reloaded_prompt_rebuilds_chain(self, mock_makedirs, mock_chain_fn,
+                                            mock_pool_fn, mock_client,
+                                            mock_recorder, mock_player):
+        """Test a hot-reloaded prompt reaches the next turn instead of the cached chain's copy."""
+        from src.voice_llm import VoiceLLM
+
+        mock_pool = mock_pool_fn.return_value
+        reloaded_chain = MagicMock()
+        reloaded_chain.predict.return_value = "reloaded"
+        mock_pool.get_chain.return_value = reloaded_chain
+
+        llm_app = VoiceLLM()
+        with patch("src.voice_llm.get_prompt", return_value=MagicMock()):
+            assert llm_app._generate_response("Hi") == "reloaded"
+            assert llm_app._generate_response("Hi") == "reloaded"
+
+        mock_pool.get_chain.assert_called_once()
+        mock_chain_fn.return_value.predict.assert_not_called()
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_finish_turn_keeps_matching_speculation(self, mock_makedirs, mock_chain_fn,
+                                                    mock_client, mock_recorder, mock_player):
+        """Test a kept speculative answer is committed to memory without regenerating."""
+        from src.voice_llm import VoiceLLM
+
+        llm_app = VoiceLLM()
+        llm_app.speculator = MagicMock()
+        llm_app.speculator.resolve.return_value = "Paris."
+
+        response = llm_app.finish_turn("What is the capital of France?", MagicMock())
+
+        assert response == "Paris."
+        mock_chain_fn.return_value.predict.assert_not_called()
+        history = llm_app.memory.load_memory_variables({})["chat_history"]
+        assert history[-1].content == "Paris."
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_discarded_speculation_routes_turn_once(self, mock_makedirs, mock_chain_fn,
+                                                    mock_client, mock_recorder, mock_player):
+        """Test a missed speculation regenerates with the turn's routing decision, under the breaker."""
+        from src.api.breaker import CircuitBreaker
+        from src.llm.speculative import SpeculativeGenerator
+        from src.utils.exceptions import ChatUnavailableError
+        from src.voice_llm import VoiceLLM
+
+        llm_app = VoiceLLM()
+        llm_app.router = MagicMock()
+        llm_app._get_chain = MagicMock(return_value=mock_chain_fn.return_value)
+        mock_chain_fn.return_value.llm.invoke.return_value = MagicMock(content="provisional")
+        mock_chain_fn.return_value.predict.return_value = "final"
+        llm_app.speculator = SpeculativeGenerator(llm_app._generate_provisional)
+
+        speculation = llm_app.speculate("what is the capital")
+        speculation.future.result()
+        response = llm_app.finish_turn("tell me a joke about cats instead", speculation)
+
+        assert response == "final"
+        llm_app.router.route.assert_called_once_with("what is the capital")
+        assert llm_app.router.record_latency.call_count == 2
+
+        open_breaker = CircuitBreaker("chat", failure_threshold=1, reset_timeout=60)
+        open_breaker.record(False)
+        with patch("src.api.breaker.get_breaker", return_value=open_breaker):
+            speculation = llm_app.speculate("what is the capital")
+            with pytest.raises(ChatUnavailableError):
+                speculation.future.result()
+        assert mock_chain_fn.return_value.llm.invoke.call_count == 1
+        llm_app.speculator.shutdown()
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_astream_text_input_speaks_sentences_in_order(self, mock_makedirs, mock_chain_fn,
+                                                          mock_client_cls, mock_recorder,
+                                                          mock_player):
+        """Test tokens stream first and each finished sentence run becomes an audio chunk."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.voice_llm import VoiceLLM
+
+        tokens = ["The first sentence is long enough. ", "Then ", "a short end."]
+
+        async def fake_astream(messages):
+            for token in tokens:
+                yield MagicMock(content=token)
+
+        chain = mock_chain_fn.return_value
+        chain.prompt.format_messages.return_value = []
+        chain.llm.astream = fake_astream
+        mock_client_cls.return_value.asynthesize_speech = AsyncMock(
+            side_effect=lambda text, path: f"{text}.mp3"
+        )
+
+        llm_app = VoiceLLM()
+        llm_app.config = MagicMock(STREAM_TTS_MIN_CHARS=10, TURN_DEADLINE=0, TURN_TTS_MIN_BUDGET=0)
+
+        async def collect():
+            return [event async for event in llm_app.astream_text_input("Hi")]
+
+        events = asyncio.run(collect())
+
+        assert [e["text"] for e in events if e["type"] == "token"] == tokens
+        audio = [e for e in events if e["type"] == "audio"]
+        assert [(e["index"], e["path"]) for e in audio] == [
+            (0, "The first sentence is long enough..mp3"),
+            (1, "Then a short end..mp3"),
+        ]
+        spoken = [c.args[0] for c in mock_client_cls.return_value.asynthesize_speech.call_args_list]
+        assert spoken == ["The first sentence is long enough.", "Then a short end."]
+        assert events[-1] == {"type": "done", "response": "".join(tokens)}
+        history = llm_app.memory.load_memory_variables({})["chat_history"]
+        assert history[-1].content == "".join(tokens)
+
+        # A turn deadline shorter than the TTS budget streams text only
+        mock_client_cls.return_value.asynthesize_speech.reset_mock()
+        llm_app.config = MagicMock(STREAM_TTS_MIN_CHARS=10, TURN_DEADLINE=1, TURN_TTS_MIN_BUDGET=5)
+        events = asyncio.run(collect())
+
+        assert [e["type"] for e in events if e["type"] != "token"] == ["done"]
+        mock_client_cls.return_value.asynthesize_speech.assert_not_called()
+
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_degraded_answers_while_circuits_open(self, mock_makedirs, mock_chain_fn,
+                                                  mock_client_cls, mock_recorder, mock_player,
+                                                  tmp_path):
+        """Test open circuits give a text-only reply, reuse earlier audio, and skip the LLM."""
+        from src.api.breaker import CircuitBreaker
+        from src.utils.exceptions import SynthesisUnavailableError
+        from src.voice_llm import UNAVAILABLE_RESPONSE, VoiceLLM
+
+        earlier = tmp_path / "earlier.mp3"
+        earlier.write_bytes(b"mp3")
+        mock_chain_instance = mock_chain_fn.return_value
+        mock_chain_instance.predict.return_value = "AI response"
+        mock_client_instance = mock_client_cls.return_value
+        mock_client_instance.synthesize_speech.side_effect = [
+            str(earlier), SynthesisUnavailableError("down", "speech"), SynthesisUnavailableError("down", "speech"),
+        ]
+
+        llm_app = VoiceLLM()
+        assert llm_app.process_text_input("Hi") == ("AI response", str(earlier))
+        assert llm_app.process_text_input("Hi") == ("AI response", str(earlier))
+        mock_chain_instance.predict.return_value = "Something new"
+        assert llm_app.process_text_input("Hi") == ("Something new", None)
+
+        open_breaker = CircuitBreaker("chat", failure_threshold=1, reset_timeout=60)
+        open_breaker.record(False)
+        with patch("src.api.breaker.get_breaker", return_value=open_breaker):
+            assert llm_app._generate_response("Hi") == UNAVAILABLE_RESPONSE
+        assert mock_chain_instance.predict.call_count == 3
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_astream_text_input_while_chat_circuit_open(self, mock_makedirs, mock_chain_fn,
+                                                        mock_client_cls, mock_recorder, mock_player):
+        """Test a streamed turn skips the LLM and streams the degraded reply while the circuit is open."""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from src.api.breaker import CircuitBreaker
+        from src.voice_llm import UNAVAILABLE_RESPONSE, VoiceLLM
+
+        chain = mock_chain_fn.return_value
+        chain.prompt.format_messages.return_value = []
+        chain.llm.astream = MagicMock()
+        mock_client_cls.return_value.asynthesize_speech = AsyncMock(return_value="reply.mp3")
+
+        llm_app = VoiceLLM()
+
+        async def collect():
+            return [event async for event in llm_app.astream_text_input("Hi")]
+
+        open_breaker = CircuitBreaker("chat", failure_threshold=1, reset_timeout=60)
+        open_breaker.record(False)
+        with patch("src.api.breaker.get_breaker", return_value=open_breaker):
+            events = asyncio.run(collect())
+
+        chain.llm.astream.assert_not_called()
+        assert [e["text"] for e in events if e["type"] == "token"] == [UNAVAILABLE_RESPONSE]
+        assert events[-1] == {"type": "done", "response": UNAVAILABLE_RESPONSE}
+        assert llm_app.memory.load_memory_variables({})["chat_history"] == []
+
+
+    @patch("src.voice_llm.AudioPlayer")
+    @patch("src.voice_llm.AudioRecorder")
+    @patch("src.voice_llm.OpenAIClient")
+    @patch("src.voice_llm.get_conversation_chain")
+    @patch("src.voice_llm.os.makedirs")
+    def test_turn_deadline_skips_speech(self, mock_makedirs, mock_chain_fn, mock_client_cls,
+                                        mock_recorder, mock_player):
+        """Test a turn short of time answers with text only, and fails when out of time."""
+        from src.utils.deadline import deadline
+        from src.utils.exceptions import DeadlineExceededError
+        from src.voice_llm import VoiceLLM
+
+        mock_chain_fn.return_value.predict.return_value = "AI response"
+        mock_client_instance = mock_client_cls.return_value
+
+        llm_app = VoiceLLM()
+        with deadline(llm_app.config.TURN_TTS_MIN_BUDGET / 2):
+            assert llm_app.process_text_input("Hi") == ("AI response", None)
+        mock_client_instance.synthesize_speech.assert_not_called()
+
+        with deadline(0.001):
+            time.sleep(0.01)
+            with pytest.raises(DeadlineExceededError):
+                llm_app.process_text_input("Hi")
+
+
+class TestSplitSpeakable:
+    """Tests for the sentence splitter used by streaming TTS."""
+
+    def test_holds_back_incomplete_sentence(self):
+        from src.voice_llm import split_speakable
+        assert split_speakable("Hello there, how", 5) == ("", "Hello there, how")
+
+    def test_splits_at_last_sentence_end(self):
+        from src.voice_llm import split_speakable
+        ready, rest = split_speakable('One. "Two!" Three', 5)
+        assert ready == 'One. "Two!"'
+        assert rest == "Three"
+
+    def test_waits_for_minimum_length(self):
+        from src.voice_llm import split_speakable
+        assert split_speakable("Hi. The", 10) == ("", "Hi. The")
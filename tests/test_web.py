@@ -85,6 +85,17 @@ class TestChatAPI:
         data = response.get_json()
         assert data["response"] == "Hello!"
 
+    def test_chat_continues_incoming_trace(self, client, mock_voice_llm):
+        """Test the request span reuses the caller's trace ID and returns it."""
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+        response = client.post("/api/chat",
+                                data=json.dumps({"text": "Hi"}),
+                                content_type="application/json",
+                                headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+        assert response.headers["X-Trace-Id"] == trace_id
+
     def test_chat_no_body(self, client):
         """Test chat with no request body returns 400."""
         response = client.post("/api/chat",
@@ -196,3 +207,179 @@ class TestAudioServing:
         """Test serving nonexistent audio file returns 404."""
         response = client.get("/api/audio/nonexistent.mp3")
         assert response.status_code == 404
+
+    @pytest.fixture
+    def stored_audio(self, tmp_path):
+        """Store a content-addressed file in a temporary output directory."""
+        from src.audio import storage
+        temp = tmp_path / "t.mp3"
+        temp.write_bytes(b"0123456789")
+        path = storage.store_audio(str(temp), output_dir=str(tmp_path))
+        with patch("src.web.resolve_audio", lambda name: storage.resolve_audio(name, str(tmp_path))):
+            yield os.path.basename(path)
+
+    def test_audio_caching_headers(self, client, stored_audio):
+        """Test audio is served with a strong ETag and immutable caching."""
+        response = client.get(f"/api/audio/{stored_audio}")
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == f'"{stored_audio[:-4]}"'
+        assert "immutable" in response.headers["Cache-Control"]
+
+    def test_audio_conditional_get(self, client, stored_audio):
+        """Test a matching If-None-Match returns 304."""
+        response = client.get(
+            f"/api/audio/{stored_audio}",
+            headers={"If-None-Match": f'"{stored_audio[:-4]}"'},
+        )
+        assert response.status_code == 304
+
+    def test_audio_range(self, client, stored_audio):
+        """Test Range requests return partial content."""
+        response = client.get(f"/api/audio/{stored_audio}", headers={"Range": "bytes=2-5"})
+
+        assert response.status_code == 206
+        assert response.data == b"2345"
+
+
+# ═══════════════════════════════════════════════════
+# Admission Control Tests
+# ═══════════════════════════════════════════════════
+
+class TestAdmissionControl:
+    """Tests for load shedding on the pipeline endpoints."""
+
+    def test_saturated_chat_returns_429_with_retry_after(self, client, mock_voice_llm):
+        """Test a full pool and queue sheds the request without running the pipeline."""
+        from src.utils.admission import AdmissionController
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=0, max_queue_wait_s=1)
+        controller.acquire()
+
+        with patch("src.web.get_admission_controller", return_value=controller):
+            response = client.post("/api/chat", json={"text": "Hi"})
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        mock_voice_llm.process_text_input.assert_not_called()
+
+    def test_admitted_request_releases_slot(self, client):
+        """Test the slot is returned after the request completes."""
+        from src.utils.admission import AdmissionController
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=0, max_queue_wait_s=1)
+
+        with patch("src.web.get_admission_controller", return_value=controller):
+            assert client.post("/api/chat", json={"text": "Hi"}).status_code == 200
+            assert client.post("/api/chat", json={"text": "Hi"}).status_code == 200
+
+        assert controller.metrics()["active"] == 0
+
+
+# ═══════════════════════════════════════════════════
+# Job API Tests
+# ═══════════════════════════════════════════════════
+
+class TestJobsAPI:
+    """Tests for /api/jobs endpoints."""
+
+    def test_create_job_returns_202_and_status_url(self, client, mock_voice_llm):
+        """Test an upload is queued and its status can be polled."""
+        from src.jobs import JobManager
+        manager = JobManager(max_workers=1)
+        job_llm = MagicMock()
+        job_llm.process_audio_upload.return_value = ("Hello", "Hi there", None)
+
+        with patch("src.web.get_job_manager", return_value=manager), \
+                patch("src.voice_llm.VoiceLLM", return_value=job_llm) as job_llm_cls:
+            response = client.post(
+                "/api/jobs",
+                data={"audio": (BytesIO(b"fake audio data"), "long.webm")},
+                content_type="multipart/form-data",
+            )
+            assert response.status_code == 202
+            job_id = response.get_json()["job_id"]
+            assert response.headers["Location"] == f"/api/jobs/{job_id}"
+
+            for _ in range(500):
+                status = client.get(f"/api/jobs/{job_id}").get_json()
+                if status["status"] == "succeeded":
+                    break
+
+        assert status["result"]["transcription"] == "Hello"
+        assert status["result"]["response"] == "Hi there"
+        # The job ran on its own headless pipeline, not the live chat's
+        assert job_llm_cls.call_args.kwargs["headless"] is True
+        mock_voice_llm.process_audio_upload.assert_not_called()
+        # The upload waited outside the janitor's size-capped input directory
+        from src.audio.storage import JOB_UPLOAD_DIR
+        upload = job_llm.process_audio_upload.call_args.args[0]
+        assert os.path.dirname(upload) == JOB_UPLOAD_DIR
+
+    def test_create_job_without_audio(self, client):
+        """Test a job without an audio file returns 400."""
+        response = client.post("/api/jobs", data={}, content_type="multipart/form-data")
+        assert response.status_code == 400
+
+    def test_unknown_job_returns_404(self, client):
+        """Test polling an unknown or expired job returns 404."""
+        response = client.get("/api/jobs/does-not-exist")
+        assert response.status_code == 404
+
+
+# ═══════════════════════════════════════════════════
+# Metrics API Tests
+# ═══════════════════════════════════════════════════
+
+class TestMetricsAPI:
+    """Tests for /api/metrics endpoint."""
+
+    def test_prometheus_metrics_endpoint(self, client):
+        """Test /metrics serves the Prometheus text format with stage histograms."""
+        from src.utils.metrics import STAGE_SECONDS
+        STAGE_SECONDS.observe(0.2, stage="transcribe")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        body = response.get_data(as_text=True)
+        assert "# TYPE voice_llm_stage_duration_seconds histogram" in body
+        assert 'voice_llm_stage_duration_seconds_count{stage="transcribe"}' in body
+
+    def test_metrics_includes_routing(self, client, mock_voice_llm):
+        """Test metrics endpoint exposes routing decisions."""
+        mock_voice_llm.get_routing_metrics.return_value = {"decisions": {"fast": 1}}
+        mock_voice_llm.get_speculation_metrics.return_value = {}
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert response.get_json()["routing"]["decisions"]["fast"] == 1
+
+
+# ═══════════════════════════════════════════════════
+# Startup Tests
+# ═══════════════════════════════════════════════════
+
+class TestStartup:
+    """Tests for fast, lazy imports of the web entry points."""
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        """Test importing the servers loads no audio, LangChain or OpenAI modules and no config."""
+        import subprocess
+        import sys
+
+        probe = (
+            "import sys, src.web, src.asgi; "
+            "from src.utils import config as c; "
+            "heavy = [m for m in ('sounddevice', 'soundfile', 'pydub', 'langchain', 'openai') if m in sys.modules]; "
+            "print(heavy, c.config._config is None)"
+        )
+        env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+        result = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env, capture_output=True, text=True,
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[] True"
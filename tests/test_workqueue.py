@@ -0,0 +1,135 @@
+"""
+Tests for the shared-directory batch work queue (src/workqueue.py).
+"""
+
+import os
+
+# Set dummy API key BEFORE importing src modules
+os.environ.setdefault("OPENAI_API_KEY", "test-key-for-testing")
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from src.batch import TEXT, BatchItem
+from src.workqueue import QueueWorker, WorkQueue, _item_name
+
+
+def _pipeline_factory(calls):
+    """Returns a factory of mock pipelines recording the texts they process."""
+    lock = threading.Lock()
+
+    def process_text_input(text):
+        with lock:
+            calls.append(text)
+        time.sleep(0.01)
+        return f"echo {text}", None
+
+    def factory():
+        pipeline = MagicMock()
+        pipeline.process_text_input.side_effect = process_text_input
+        return pipeline
+    return factory
+
+
+class TestWorkQueue:
+    """Tests for WorkQueue and QueueWorker."""
+
+    def test_enqueue_groups_duplicates_and_is_idempotent(self, tmp_path):
+        """Test identical inputs share one entry and re-enqueueing adds nothing."""
+        queue = WorkQueue(str(tmp_path))
+        items = [BatchItem("a", TEXT, "x"), BatchItem("b", TEXT, "x"), BatchItem("c", TEXT, "y")]
+
+        assert queue.enqueue(items) == 2
+        assert queue.enqueue(items) == 0
+        assert queue.status()["open"] == 2
+
+    def test_workers_share_the_queue(self, tmp_path):
+        """Test several workers process every item exactly once and collect covers all IDs."""
+        calls = []
+        queue = WorkQueue(str(tmp_path))
+        queue.enqueue([BatchItem(str(i), TEXT, f"text {i}") for i in range(20)] + [BatchItem("dup", TEXT, "text 0")])
+        workers = [
+            QueueWorker(WorkQueue(str(tmp_path)), concurrency=2, worker_id=f"w{i}", poll_interval=0.05,
+                        pipeline_factory=_pipeline_factory(calls))
+            for i in range(3)
+        ]
+
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert sorted(calls) == sorted(f"text {i}" for i in range(20))
+        assert sum(worker.summary.succeeded for worker in workers) == 20
+        output = tmp_path / "results.jsonl"
+        assert queue.collect(str(output)) == 21
+        records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+        assert records["dup"]["response"] == "echo text 0"
+        assert records["dup"]["duplicate_of"] == "0"
+        assert os.listdir(tmp_path / "leases") == []
+
+    def test_abandoned_lease_is_taken_over(self, tmp_path):
+        """Test a live lease blocks other workers but an expired one doesn't."""
+        queue = WorkQueue(str(tmp_path), lease_ttl=30)
+        queue.enqueue([BatchItem("a", TEXT, "x")])
+        name = _item_name("a")
+
+        assert queue.try_claim(name, "crashed")
+        assert not queue.try_claim(name, "other")
+        old = time.time() - 60
+        os.utime(tmp_path / "leases" / f"{name}.lease", (old, old))
+
+        assert queue.try_claim(name, "other")
+        assert not queue.heartbeat(name, "crashed")
+        assert queue.heartbeat(name, "other")
+
+    def test_takeover_race_keeps_the_new_holders_lease(self, tmp_path):
+        """Test a lease claimed by another worker just before the stale rename is put back."""
+        queue = WorkQueue(str(tmp_path), lease_ttl=30)
+        queue.enqueue([BatchItem("a", TEXT, "x")])
+        name = _item_name("a")
+        lease = tmp_path / "leases" / f"{name}.lease"
+        assert queue.try_claim(name, "crashed")
+        old = time.time() - 60
+        os.utime(lease, (old, old))
+        real_rename = os.rename
+
+        def rename_after_other_takeover(src, dst):
+            # Another worker takes the stale lease over and claims the item first
+            os.remove(src)
+            assert queue.try_claim(name, "other")
+            real_rename(src, dst)
+
+        with patch("src.workqueue.os.rename", side_effect=rename_after_other_takeover):
+            assert not queue.try_claim(name, "late")
+
+        assert queue.heartbeat(name, "other")
+        assert [p for p in os.listdir(tmp_path / "leases") if p.endswith(".stale")] == []
+
+    def test_unreadable_item_gets_an_error_result(self, tmp_path):
+        """Test a corrupt queue entry is recorded as failed instead of being claimed forever."""
+        queue = WorkQueue(str(tmp_path))
+        queue.enqueue([BatchItem("a", TEXT, "x")])
+        (tmp_path / "items" / f"{_item_name('a')}.json").write_text("{not json")
+        worker = QueueWorker(queue, concurrency=1, worker_id="w", poll_interval=0.05,
+                             pipeline_factory=_pipeline_factory([]))
+
+        worker.run()
+
+        assert worker.summary.failed == 1
+        assert queue.status()["failed"] == 1
+        assert queue.open_items() == []
+
+    def test_failed_items_are_requeued(self, tmp_path):
+        """Test enqueueing again retries items whose result is an error."""
+        queue = WorkQueue(str(tmp_path))
+        items = [BatchItem("a", TEXT, "x")]
+        queue.enqueue(items)
+        queue.complete(_item_name("a"), {"status": "error", "error": "boom"})
+
+        assert queue.status()["failed"] == 1
+        assert queue.enqueue(items) == 1
+        assert queue.open_items() == [_item_name("a")]